@@ -0,0 +1,92 @@
+import itertools
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from state_backend import state_backend
+class AnalysisQueue:
+    """Runs analysis jobs one at a time on a single worker thread. A trigger for a key that is
+    already waiting to run joins that job instead of queueing another one. With a shared state backend the
+    waiting keys and job records live there, so a trigger joins a job queued on another worker and any
+    worker can report a job's status; the job still runs on the worker that queued it"""
+    def __init__(self, max_finished_jobs=500, state=None):
+        self.max_finished_jobs = max_finished_jobs
+        self.state = state if state is not None and state.shared else None
+        self._queue = queue.Queue()
+        self._jobs = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._worker = None
+    def submit(self, key, fn, *args):
+        with self._lock:
+            job_id = self._pending.get(key)
+            if job_id is not None:
+                self._jobs[job_id]["merged_triggers"] += 1
+                if self.state:
+                    self.state.update_analysis_job(job_id, {}, incr="merged_triggers")
+                return job_id
+            job_id = f"jd_job_{int(time.time())}_{self.state.incr_counter('analysis_jobs') if self.state else next(self._ids)}"
+            job = {"job_id": job_id, "key": str(key), "status": "QUEUED", "submitted_at": datetime.now().isoformat(), "merged_triggers": 0}
+            if self.state:
+                self.state.save_analysis_job(job)
+                owner = self.state.claim_analysis_key(str(key), job_id)
+                if owner != job_id:
+                    self.state.update_analysis_job(owner, {}, incr="merged_triggers")
+                    return owner
+            self._jobs[job_id] = job
+            self._pending[key] = job_id
+            self._trim()
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="jd-analysis", daemon=True)
+                self._worker.start()
+        self._queue.put((job_id, key, fn, args))
+        return job_id
+    def get(self, job_id):
+        if self.state:
+            return self.state.get_analysis_job(job_id)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+    def depth(self):
+        return self._queue.qsize()
+    def join(self):
+        self._queue.join()
+    def _share(self, job, key=None):
+        if self.state:
+            try:
+                if key is not None:
+                    self.state.release_analysis_key(str(key), job["job_id"])
+                self.state.update_analysis_job(job["job_id"], {field: value for field, value in job.items() if field != "merged_triggers"})
+            except Exception as e:
+                print(f"[ERROR] Could not share JD analysis job {job['job_id']}: {e}")
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in ("COMPLETED", "FAILED")]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            self._jobs.pop(job_id, None)
+    def _run(self):
+        while True:
+            job_id, key, fn, args = self._queue.get()
+            with self._lock:
+                self._pending.pop(key, None)
+                job = self._jobs.get(job_id, {"job_id": job_id})
+                job["status"] = "RUNNING"
+                job["started_at"] = datetime.now().isoformat()
+            self._share(job, key)
+            try:
+                result = fn(*args)
+                failed = isinstance(result, dict) and "error" in result
+                with self._lock:
+                    job["status"] = "FAILED" if failed else "COMPLETED"
+                    job["error" if failed else "result"] = result.get("error") if failed else result
+            except Exception as e:
+                print(f"[ERROR] JD analysis job {job_id} failed: {e}")
+                with self._lock:
+                    job["status"] = "FAILED"
+                    job["error"] = str(e)
+            finally:
+                job["finished_at"] = datetime.now().isoformat()
+                self._share(job)
+                self._queue.task_done()
+analysis_queue = AnalysisQueue(state=state_backend)
@@ -0,0 +1,25 @@
+from array import array
+ULAW_BIAS = 0x84
+ULAW_SILENCE = b"\xff"
+def _encode_sample(sample):
+    """G.711 on the top 14 bits, matching the reference encoder (and audioop) byte for byte"""
+    sample >>= 2
+    mask = 0x7F if sample < 0 else 0xFF
+    magnitude = min(-sample if sample < 0 else sample, 8158) + (ULAW_BIAS >> 2)
+    segment = max(0, magnitude.bit_length() - 6)
+    return ((segment << 4) | ((magnitude >> (segment + 1)) & 0x0F)) ^ mask
+def _decode_byte(byte):
+    byte = ~byte & 0xFF
+    magnitude = ((((byte & 0x0F) << 3) + ULAW_BIAS) << ((byte >> 4) & 0x07)) - ULAW_BIAS
+    return -magnitude if byte & 0x80 else magnitude
+ULAW_TO_PCM16 = array('h', (_decode_byte(byte) for byte in range(256)))
+PCM16_TO_ULAW = bytes(_encode_sample(sample - 65536 if sample > 32767 else sample) for sample in range(65536))
+def ulaw_to_pcm16(data):
+    """G.711 mu-law bytes (Twilio Media Streams payloads) to 16-bit little-endian PCM bytes"""
+    return array('h', [ULAW_TO_PCM16[byte] for byte in data]).tobytes()
+def pcm16_to_ulaw(data):
+    samples = array('h')
+    samples.frombytes(data[:len(data) - len(data) % 2])
+    return bytes([PCM16_TO_ULAW[sample & 0xFFFF] for sample in samples])
+def ulaw_silence(seconds, sample_rate=8000):
+    return ULAW_SILENCE * int(seconds * sample_rate)
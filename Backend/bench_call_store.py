@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from call_store import CallStore
+def time_call(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1e6
+def legacy_json_append(mapping_file, call_sid, entry):
+    if os.path.exists(mapping_file):
+        with open(mapping_file, 'r') as f:
+            mappings = json.load(f)
+    else:
+        mappings = {}
+    mappings[call_sid] = entry
+    with open(mapping_file, 'w') as f:
+        json.dump(mappings, f, indent=2)
+def legacy_json_lookup(mapping_file, call_sid):
+    with open(mapping_file, 'r') as f:
+        return json.load(f).get(call_sid, {}).get("phone_number")
+def bench_call_store(work_dir, total, checkpoints, samples):
+    store = CallStore(os.path.join(work_dir, "calls.db"))
+    rows = []
+    inserted = 0
+    for checkpoint in checkpoints:
+        append_times = []
+        while inserted < checkpoint:
+            call_sid = f"CA{inserted:032x}"
+            elapsed = time_call(store.record_contact, call_sid, {"phone": f"+91{9000000000 + inserted}", "status": "initiated"}, "single_call")
+            if checkpoint - inserted <= samples:
+                append_times.append(elapsed)
+            inserted += 1
+        lookup_times = [time_call(store.get_phone, f"CA{(i * 7919) % inserted:032x}") for i in range(samples)]
+        rows.append((checkpoint, statistics.median(append_times), statistics.median(lookup_times)))
+    return rows
+def bench_legacy_json(work_dir, checkpoints, samples):
+    mapping_file = os.path.join(work_dir, "call_phone_mapping.json")
+    rows = []
+    inserted = 0
+    for checkpoint in checkpoints:
+        mappings = {f"CA{i:032x}": {"call_sid": f"CA{i:032x}", "phone_number": f"+91{9000000000 + i}", "initiated_time": "", "status": "initiated"} for i in range(checkpoint - samples)}
+        with open(mapping_file, 'w') as f:
+            json.dump(mappings, f, indent=2)
+        inserted = checkpoint - samples
+        append_times = []
+        while inserted < checkpoint:
+            call_sid = f"CA{inserted:032x}"
+            append_times.append(time_call(legacy_json_append, mapping_file, call_sid, {"call_sid": call_sid, "phone_number": f"+91{9000000000 + inserted}", "initiated_time": "", "status": "initiated"}))
+            inserted += 1
+        lookup_times = [time_call(legacy_json_lookup, mapping_file, f"CA{(i * 7919) % inserted:032x}") for i in range(samples)]
+        rows.append((checkpoint, statistics.median(append_times), statistics.median(lookup_times)))
+    return rows
+def print_rows(title, rows):
+    print(title)
+    print(f"{'mappings':>10} {'append us':>12} {'lookup us':>12}")
+    for count, append_us, lookup_us in rows:
+        print(f"{count:>10} {append_us:>12.1f} {lookup_us:>12.1f}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-call cost of the call mapping store as it grows")
+    parser.add_argument("--total", type=int, default=100000)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--legacy", action="store_true", help="also time the old call_phone_mapping.json read-modify-write")
+    args = parser.parse_args()
+    checkpoints = [count for count in (1000, 10000, 50000, 100000, 250000, 1000000) if count < args.total] + [args.total]
+    work_dir = tempfile.mkdtemp(prefix="bench_call_store_")
+    try:
+        print_rows("CallStore (SQLite WAL)", bench_call_store(work_dir, args.total, checkpoints, args.samples))
+        if args.legacy:
+            print_rows("call_phone_mapping.json", bench_legacy_json(work_dir, [count for count in checkpoints if count <= 10000], min(args.samples, 20)))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
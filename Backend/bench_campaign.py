@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import contextlib
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+import httpx
+import uvicorn
+from fake_twilio import FakeTwilio, create_app, FAKE_TWILIO_OUTCOMES, FAKE_TWILIO_RING_SECONDS, FAKE_TWILIO_BUSY_SECONDS, FAKE_TWILIO_NO_ANSWER_SECONDS, FAKE_TWILIO_TALK_SECONDS, FAKE_TWILIO_API_LATENCY_MS, FAKE_TWILIO_CALLBACK_LATENCY_MS
+from dialer import BULK_MAX_CONCURRENT_CALLS, BULK_CALLS_PER_SECOND
+def configure_backend(args):
+    """Points main at the fake REST API and this process's own webhook server, and divides the dialer's
+    timeouts by the time scale. Set before main is imported, since it reads them at import time"""
+    os.environ["account_sid"] = "ACfake0000000000000000000000000000"
+    os.environ["auth_token"] = "fake"
+    os.environ["WEBHOOK_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ["TWILIO_API_BASE_URL"] = f"http://127.0.0.1:{args.fake_port}"
+    os.environ["CALL_TIMEOUT"] = str(args.call_timeout / args.time_scale)
+    os.environ["CALL_STATUS_SILENCE_TIMEOUT"] = str(args.silence_timeout / args.time_scale)
+def classify(result):
+    message = result.get("message", "")
+    if result.get("status") == "SUCCESS":
+        return "completed"
+    if "failed with status: " in message:
+        return message.rsplit(": ", 1)[1]
+    if "timed out" in message:
+        return "timed out"
+    return "not placed"
+async def serve(servers):
+    for server in servers:
+        server.install_signal_handlers = lambda: None
+    tasks = [asyncio.create_task(server.serve()) for server in servers]
+    while not all(server.started for server in servers):
+        if any(task.done() for task in tasks):
+            raise SystemExit("could not start the webhook or fake Twilio server; are the ports free?")
+        await asyncio.sleep(0.05)
+    return tasks
+async def run_campaign(args):
+    import main
+    fake = FakeTwilio(args.outcomes, args.ring, args.busy, args.no_answer, args.talk, args.api_latency_ms, args.callback_latency_ms, args.time_scale, args.seed)
+    servers = [uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+               for app, port in ((main.app, args.port), (create_app(fake), args.fake_port))]
+    tasks = await serve(servers)
+    contacts = [{"name": f"Candidate {index}", "phone": f"+1555{index:07d}"} for index in range(args.contacts)]
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=30) as http:
+            started = time.perf_counter()
+            response = await http.post("/bulk-call", json=contacts, params={"max_concurrent": args.max_concurrent, "calls_per_second": args.calls_per_second * args.time_scale})
+            bulk_call_id = response.json()["bulk_call_id"]
+            while True:
+                await asyncio.sleep(0.05)
+                campaign = (await http.get(f"/bulk-call-status/{bulk_call_id}")).json()
+                if campaign.get("status") in ("COMPLETED", "STOPPED", "ERROR"):
+                    break
+            elapsed = time.perf_counter() - started
+    finally:
+        for server in servers:
+            server.should_exit = True
+        await asyncio.gather(*tasks)
+    return campaign, fake.stats(), elapsed
+def print_report(args, campaign, stats, elapsed):
+    call_seconds = elapsed * args.time_scale
+    results = campaign.get("results", [])
+    rest_calls = sum(stats["rest_calls"].values())
+    callbacks = sum(stats["callbacks"].values())
+    print(f"campaign: {args.contacts} contacts, {args.max_concurrent} concurrent, {args.calls_per_second:g} calls/s, outcomes {args.outcomes}, time scale {args.time_scale:g}x")
+    print(f"finished {campaign.get('status')} after {call_seconds:.0f}s of call time ({elapsed:.1f}s wall): {len(results) / call_seconds * 3600:.0f} contacts per hour")
+    print(f"results: {', '.join(f'{count} {outcome}' for outcome, count in Counter(classify(result) for result in results).most_common())}")
+    print(f"Twilio REST calls: {', '.join(f'{count} {name}' for name, count in sorted(stats['rest_calls'].items()))} -> {rest_calls / max(1, len(results)):.2f} per contact")
+    print(f"status callbacks: {callbacks} posted ({callbacks / max(1, len(results)):.2f} per contact)"
+          + (f", not accepted: {', '.join(f'{count} {error}' for error, count in stats['callbacks'].items() if error != 'ok')}" if stats["callbacks"].keys() - {"ok"} else ""))
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-call campaign against a fake Twilio REST API: contacts per hour and REST calls per contact")
+    parser.add_argument("--contacts", type=int, default=100)
+    parser.add_argument("--max-concurrent", type=int, default=BULK_MAX_CONCURRENT_CALLS)
+    parser.add_argument("--calls-per-second", type=float, default=BULK_CALLS_PER_SECOND, help="in call time; 0 is unlimited")
+    parser.add_argument("--outcomes", default=FAKE_TWILIO_OUTCOMES, help="weights of completed, no-answer, busy and failed")
+    parser.add_argument("--ring", default=FAKE_TWILIO_RING_SECONDS, help="seconds before an answered call is picked up, low:high")
+    parser.add_argument("--busy", default=FAKE_TWILIO_BUSY_SECONDS)
+    parser.add_argument("--no-answer", default=FAKE_TWILIO_NO_ANSWER_SECONDS)
+    parser.add_argument("--talk", default=FAKE_TWILIO_TALK_SECONDS, help="length of an answered call")
+    parser.add_argument("--api-latency-ms", default=FAKE_TWILIO_API_LATENCY_MS)
+    parser.add_argument("--callback-latency-ms", default=FAKE_TWILIO_CALLBACK_LATENCY_MS)
+    parser.add_argument("--call-timeout", type=float, default=300, help="CALL_TIMEOUT in call time")
+    parser.add_argument("--silence-timeout", type=float, default=60, help="CALL_STATUS_SILENCE_TIMEOUT in call time")
+    parser.add_argument("--time-scale", type=float, default=100, help="call seconds per wall second")
+    parser.add_argument("--port", type=int, default=8130)
+    parser.add_argument("--fake-port", type=int, default=8131)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="keep the backend's logging")
+    args = parser.parse_args()
+    configure_backend(args)
+    work_dir = tempfile.mkdtemp(prefix="bench_campaign_")
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        if args.verbose:
+            campaign, stats, elapsed = asyncio.run(run_campaign(args))
+        else:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                campaign, stats, elapsed = asyncio.run(run_campaign(args))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print_report(args, campaign, stats, elapsed)
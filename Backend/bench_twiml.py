@@ -0,0 +1,34 @@
+import argparse
+import timeit
+from twiml_cache import TwimlCache, build_opening, build_question, build_reprompt
+BENCH_BASE_URL = "https://interviewer.example.com"
+BENCH_CALL_SID = "CA05cdb9f767c656f7e51d108b0e5f8eea"
+BENCH_QUESTIONS = {
+    1: "Introduce yourself.",
+    2: "What technical skills do you have?",
+    3: "Are you open to relocation or looking for remote work?",
+    4: "The first interview round will be on-site. Can you attend in person?",
+    5: "What is your current notice period?",
+    6: "What is your current CTC and expected salary?",
+    7: "If selected, how soon can you join?"}
+def bench_cases(cache):
+    return [
+        ("opening", lambda: build_opening(BENCH_BASE_URL, BENCH_CALL_SID, BENCH_QUESTIONS), lambda: cache.opening(BENCH_CALL_SID)),
+        ("question 4", lambda: build_question(BENCH_BASE_URL, BENCH_CALL_SID, BENCH_QUESTIONS, 4), lambda: cache.question(BENCH_CALL_SID, 4)),
+        ("reprompt 4", lambda: build_reprompt(BENCH_BASE_URL, BENCH_CALL_SID, BENCH_QUESTIONS, 4), lambda: cache.reprompt(BENCH_CALL_SID, 4))]
+def per_call_us(fn, number, repeat):
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="VoiceResponse builder vs pre-rendered TwiML templates, per response")
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    cache = TwimlCache()
+    cache.configure(BENCH_BASE_URL, BENCH_QUESTIONS)
+    print(f"{'prompt':<12} {'builder us':>12} {'cached us':>12} {'speedup':>9}")
+    for name, build, render in bench_cases(cache):
+        assert build() == render(), f"cached {name} differs from the builder output"
+        builder_us = per_call_us(build, args.number // 10, args.repeat)
+        cached_us = per_call_us(render, args.number, args.repeat)
+        print(f"{name:<12} {builder_us:>12.2f} {cached_us:>12.3f} {builder_us / cached_us:>8.0f}x")
+    print(f"{'configure':<12} {per_call_us(lambda: TwimlCache().configure(BENCH_BASE_URL, BENCH_QUESTIONS), 20, args.repeat):>12.0f} us (once per base URL / question set)")
@@ -0,0 +1,70 @@
+import argparse
+import glob
+import os
+import time
+import tracemalloc
+import wave
+from audio_codec import ULAW_TO_PCM16, pcm16_to_ulaw
+from vad import VoiceActivityDetector
+FRAME_BYTES = 160
+def load_recordings(directory):
+    recordings = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        with wave.open(path, 'rb') as wav:
+            if wav.getframerate() != 8000 or wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+                print(f"skipping {path}: not 8 kHz 16-bit mono")
+                continue
+            recordings.append(pcm16_to_ulaw(wav.readframes(wav.getnframes())))
+    return recordings
+def python_energy(frame):
+    """The per-frame pure-Python RMS check the stream endpointer used before the VAD, for reference"""
+    return sum(ULAW_TO_PCM16[byte] ** 2 for byte in frame) / len(frame) >= 500 * 500
+def run_stream(recordings):
+    detector = VoiceActivityDetector()
+    for audio in recordings:
+        for start in range(0, len(audio) - FRAME_BYTES + 1, FRAME_BYTES):
+            detector.feed(audio[start:start + FRAME_BYTES])
+def run_batch(recordings):
+    detector = VoiceActivityDetector()
+    for audio in recordings:
+        detector.process(audio)
+def run_python(recordings):
+    for audio in recordings:
+        for start in range(0, len(audio) - FRAME_BYTES + 1, FRAME_BYTES):
+            python_energy(audio[start:start + FRAME_BYTES])
+def frames_per_cpu_second(fn, recordings, frames, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.process_time()
+        fn(recordings)
+        best = min(best, time.process_time() - started)
+    return frames / best
+def allocations(recordings):
+    """Blocks and bytes the streaming path keeps after a pass, and the peak it needs while running"""
+    detector = VoiceActivityDetector()
+    frames = [audio[start:start + FRAME_BYTES] for audio in recordings for start in range(0, len(audio) - FRAME_BYTES + 1, FRAME_BYTES)]
+    detector.feed(frames[0])
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for frame in frames:
+        detector.feed(frame)
+    _, peak = tracemalloc.get_traced_memory()
+    retained = tracemalloc.take_snapshot().compare_to(before, "filename")
+    tracemalloc.stop()
+    return sum(stat.count_diff for stat in retained if stat.count_diff > 0), sum(stat.size_diff for stat in retained if stat.size_diff > 0), peak - baseline
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Voice activity detection throughput and allocations on recorded interview audio")
+    parser.add_argument("--dir", default="interviews/audio_recordings")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    recordings = load_recordings(args.dir)
+    frames = sum(len(audio) // FRAME_BYTES for audio in recordings)
+    print(f"{len(recordings)} recordings, {frames} frames of 20 ms ({frames / 50:.0f} s of audio), single thread")
+    print(f"{'path':<28} {'frames/cpu-s':>13} {'x realtime':>11}")
+    for name, fn in (("vad feed (per frame)", run_stream), ("vad process (batch)", run_batch), ("python rms loop", run_python)):
+        rate = frames_per_cpu_second(fn, recordings, frames, args.repeat)
+        print(f"{name:<28} {rate:>13.0f} {rate / 50:>10.0f}x")
+    blocks, size, peak = allocations(recordings)
+    print(f"vad feed allocations over {frames} frames: {blocks} blocks / {size} bytes retained, {peak} bytes peak above baseline")
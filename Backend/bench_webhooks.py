@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import re
+import tempfile
+import time
+import urllib.parse
+import uuid
+from xml.sax.saxutils import unescape
+import httpx
+from gather_timeouts import percentile
+TWILIO_WEBHOOK_TIMEOUT = 15.0
+ANSWERS = {
+    1: ["Hi, I am Ravi Kumar, a backend developer with two years of experience at a fintech startup in Bangalore",
+        "My name is Asha, I graduated in computer science last year and have been working on web applications since then",
+        "I am Imran, I work as a software engineer building internal tools and APIs for a logistics company"],
+    2: ["Mostly python and java, and some react on the frontend",
+        "I have worked with javascript and react for two years and also write python scripts",
+        "C++ in college and java with spring at work"],
+    3: ["Yes, I am happy to relocate", "Sure, relocation is fine for me", "I am open to relocation if the role is right"],
+    4: ["Yes, I can attend in person", "Sure, I will be there", "That works for me, I can come to the office"],
+    5: ["15 days", "My notice period is 30 days", "I can join immediately", "Two weeks"],
+    6: ["Currently 8 lakh per annum, expecting around 12", "I am at 10 lakh and looking for 14", "6 lakh now, expecting 9"],
+    7: ["Within two weeks", "Right after my notice period", "In about a month"]}
+REJECTED_ANSWERS = {
+    2: ["I mostly do data entry and spreadsheets"],
+    3: ["No, I want to stay in my city", "I'm not willing to relocate"],
+    4: ["No, I cannot travel for it", "Remote only, sorry"],
+    5: ["My notice period is 3 months", "90 days"]}
+ERROR_REPLIES = ("Sorry, there was an error", "Technical difficulty occurred", "Interview session not found")
+def webhook_path(url):
+    """TwiML URLs are absolute (WEBHOOK_BASE_URL); the load is sent to --base-url or the in-process app instead"""
+    parts = urllib.parse.urlsplit(unescape(url))
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+def next_step(twiml):
+    """What Twilio does with a reply: the Gather action and the Redirect it falls through to when nothing is heard"""
+    action = re.search(r'<Gather[^>]* action="([^"]+)"', twiml)
+    redirect = re.search(r'<Redirect[^>]*>([^<]+)</Redirect>', twiml)
+    return (action.group(1) if action else None), (redirect.group(1) if redirect else None)
+class WebhookLoad:
+    """Plays Twilio for many simultaneous calls: starts each with /voice, answers every <Gather> after a think
+    time (or stays silent and follows the <Redirect> to /voice/no-response), and posts the completed status
+    callback when the reply has no Gather left. Every webhook's latency and outcome is recorded"""
+    def __init__(self, client, rng, think_seconds, silence_rate, reject_rate, timeout):
+        self.client = client
+        self.rng = rng
+        self.think_seconds = think_seconds
+        self.silence_rate = silence_rate
+        self.reject_rate = reject_rate
+        self.timeout = timeout
+        self.samples = []
+        self.calls = {"ended": 0, "failed": 0}
+    async def post(self, call_sid, url, form):
+        path = webhook_path(url)
+        endpoint = urllib.parse.urlsplit(path).path.replace(call_sid, "{call_sid}")
+        started = time.perf_counter()
+        try:
+            response = await self.client.post(path, data=form, timeout=self.timeout)
+        except httpx.HTTPError as e:
+            self.samples.append((endpoint, time.perf_counter() - started, f"exception: {type(e).__name__}"))
+            return None
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            self.samples.append((endpoint, elapsed, f"http {response.status_code}"))
+            return None
+        if any(message in response.text for message in ERROR_REPLIES):
+            self.samples.append((endpoint, elapsed, "error reply"))
+            return None
+        self.samples.append((endpoint, elapsed, None))
+        return response.text
+    async def think(self):
+        if self.think_seconds:
+            await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.think_seconds)
+    async def run_call(self, call_sid):
+        started = time.perf_counter()
+        call = {"AccountSid": "ACloadgen", "CallSid": call_sid, "From": f"+1555{self.rng.randrange(10 ** 7):07d}", "To": "+15550199", "Direction": "outbound-api"}
+        rejected_question = self.rng.choice(sorted(REJECTED_ANSWERS)) if self.rng.random() < self.reject_rate else None
+        twiml = await self.post(call_sid, "/voice", {**call, "CallStatus": "in-progress"})
+        while twiml is not None:
+            if "<Connect>" in twiml:
+                raise SystemExit("/voice returned a <Connect><Stream>; this generator drives Gather mode, use stream_replay.py for INTERVIEW_MODE=stream")
+            action, redirect = next_step(twiml)
+            if action is None and redirect is None:
+                break
+            await self.think()
+            if action is None or (redirect is not None and self.rng.random() < self.silence_rate):
+                twiml = await self.post(call_sid, redirect, {**call, "CallStatus": "in-progress"})
+                continue
+            question_number = int(urllib.parse.parse_qs(urllib.parse.urlsplit(unescape(action)).query).get("q", ["1"])[0])
+            answers = REJECTED_ANSWERS[question_number] if question_number == rejected_question else ANSWERS.get(question_number, ANSWERS[7])
+            twiml = await self.post(call_sid, action, {**call, "CallStatus": "in-progress", "SpeechResult": self.rng.choice(answers),
+                                                       "Confidence": f"{self.rng.uniform(0.7, 0.95):.8f}"})
+        self.calls["ended" if twiml is not None else "failed"] += 1
+        await self.post(call_sid, f"/voice/status/{call_sid}", {**call, "CallStatus": "completed", "CallDuration": str(round(time.perf_counter() - started))})
+    async def run(self, calls, concurrency, arrival_rate):
+        slots = asyncio.Semaphore(concurrency)
+        async def one(index):
+            if arrival_rate:
+                await asyncio.sleep(index / arrival_rate)
+            async with slots:
+                await self.run_call(f"CAload{uuid.uuid4().hex[:26]}")
+        await asyncio.gather(*(one(index) for index in range(calls)))
+def print_report(load, calls, elapsed):
+    print(f"{calls} calls, {len(load.samples)} webhooks in {elapsed:.1f}s: {len(load.samples) / elapsed:.1f} req/s, "
+          f"{load.calls['ended']} calls ran to the end of their TwiML, {load.calls['failed']} cut short by an error")
+    print(f"{'endpoint':<32} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}")
+    endpoints = sorted({endpoint for endpoint, _, _ in load.samples}) + ["all"]
+    for endpoint in endpoints:
+        rows = [(seconds, error) for name, seconds, error in load.samples if endpoint in ("all", name)]
+        latencies = [seconds * 1000 for seconds, _ in rows]
+        print(f"{endpoint:<32} {len(rows):>7} {percentile(latencies, 0.5):>9.1f} {percentile(latencies, 0.95):>9.1f} "
+              f"{percentile(latencies, 0.99):>9.1f} {max(latencies):>9.1f} {sum(1 for _, error in rows if error):>7}")
+    errors = {}
+    for _, _, error in load.samples:
+        if error:
+            errors[error] = errors.get(error, 0) + 1
+    slow = sum(1 for _, seconds, _ in load.samples if seconds >= TWILIO_WEBHOOK_TIMEOUT)
+    print(f"error rate {sum(errors.values()) / max(1, len(load.samples)):.2%}" + (f" ({', '.join(f'{count} {error}' for error, count in sorted(errors.items()))})" if errors else ""))
+    print(f"{slow} webhooks at or over Twilio's {TWILIO_WEBHOOK_TIMEOUT:.0f}s timeout")
+async def bench(args):
+    """In-process, main is imported with dummy Twilio credentials from a temporary directory, so the
+    simulated interviews, journals and catalog never touch the real interviews/ tree. The analyses they queue
+    are drained and checkpointed before leaving it, or the exit-time checkpoint would land in the caller's"""
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url.rstrip("/"), limits=httpx.Limits(max_connections=args.concurrency))
+        return await run_load(args, client)
+    os.environ["account_sid"] = "ACloadgen000000000000000000000000"
+    os.environ["auth_token"] = "loadgen"
+    os.environ.setdefault("WEBHOOK_BASE_URL", "http://loadgen")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench_webhooks_") as work_dir:
+        os.chdir(work_dir)
+        try:
+            import main
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://loadgen")
+            return await run_load(args, client)
+        finally:
+            if "main" in locals():
+                main.analysis_queue.join()
+                main.bulk_summary.checkpoint(force=True)
+            os.chdir(cwd)
+async def run_load(args, client):
+    load = WebhookLoad(client, random.Random(args.seed), args.think, args.silence_rate, args.reject_rate, args.timeout)
+    started = time.perf_counter()
+    async with client:
+        await load.run(args.calls, args.concurrency or args.calls, args.arrival_rate)
+    return load, time.perf_counter() - started
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulated Twilio calls against the voice webhooks: throughput, tail latency and error rate")
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=0, help="calls in progress at once (default: all of them)")
+    parser.add_argument("--arrival-rate", type=float, default=0, help="new calls per second; 0 starts them all at once")
+    parser.add_argument("--think", type=float, default=2.0, help="mean seconds between a reply and the next webhook, +/- 50%%")
+    parser.add_argument("--silence-rate", type=float, default=0.1, help="fraction of Gathers left unanswered (/voice/no-response)")
+    parser.add_argument("--reject-rate", type=float, default=0.2, help="fraction of calls that give a disqualifying answer")
+    parser.add_argument("--base-url", help="a running server, e.g. http://localhost:8000; default runs main.app in-process")
+    parser.add_argument("--timeout", type=float, default=TWILIO_WEBHOOK_TIMEOUT)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="keep the in-process server's logging")
+    args = parser.parse_args()
+    if args.base_url or args.verbose:
+        load, elapsed = asyncio.run(bench(args))
+    else:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            load, elapsed = asyncio.run(bench(args))
+    print_report(load, args.calls, elapsed)
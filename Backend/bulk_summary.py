@@ -0,0 +1,176 @@
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from storage_layout import iter_interview_paths
+from state_backend import state_backend
+BULK_SUMMARY_PATH = "interviews/BULK_SUMMARY.json"
+BULK_SUMMARY_CHECKPOINT_INTERVAL = int(os.getenv("BULK_SUMMARY_CHECKPOINT_INTERVAL", "30"))
+MATCH_BUCKETS = ("excellent_match", "strong_match", "good_match", "moderate_match", "low_match")
+def match_bucket(recommendation):
+    if "EXCELLENT" in recommendation:
+        return "excellent_match"
+    elif "STRONG" in recommendation:
+        return "strong_match"
+    elif "GOOD" in recommendation:
+        return "good_match"
+    elif "MODERATE" in recommendation:
+        return "moderate_match"
+    return "low_match"
+def candidate_entry(report, file_path):
+    analysis = report.get("candidate_analysis", {})
+    return {"name": report.get("candidate_name", "Unknown"), "call_id": report.get("call_id", ""), "overall_score": analysis.get("overall_score", 0), "recommendation": analysis.get("recommendation", ""), "matched_skills": analysis.get("matched_skills", []), "analysis_file": file_path}
+class RollingBulkSummary:
+    """Candidate ranking and match-bucket counts kept in memory and updated one report at a time; per process,
+    so only for a single worker (SharedBulkSummary is used with a shared state backend).
+    The aggregate is checkpointed to a single BULK_SUMMARY.json at most every checkpoint_interval seconds; a
+    change made inside the interval is written by a timer when it ends, so the last report of a burst is not
+    left unsaved until the next one"""
+    def __init__(self, checkpoint_path=BULK_SUMMARY_PATH, checkpoint_interval=BULK_SUMMARY_CHECKPOINT_INTERVAL):
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self._candidates = {}
+        self._ranking = []
+        self.statistics = Counter({bucket: 0 for bucket in MATCH_BUCKETS})
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._dirty = False
+        self._last_checkpoint = 0.0
+        self._timer = None
+        self.updated_at = None
+        atexit.register(self.checkpoint, True)
+    def _rank_key(self, entry):
+        return (-entry["overall_score"], entry["call_id"])
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        for entry in self._load_entries():
+            self._insert(entry)
+        self.checkpoint()
+    def _load_entries(self):
+        """The checkpoint, reconciled with the analysis reports in the sharded layout (analysis/<shard>/<call_sid>.json
+        under the checkpoint's directory): reports written after it (a crash inside the checkpoint interval,
+        another process) are read and folded in, and entries whose file is gone are dropped. Only new or newer
+        files are opened"""
+        entries, checkpoint_mtime = [], None
+        if os.path.exists(self.checkpoint_path):
+            try:
+                checkpoint_mtime = os.path.getmtime(self.checkpoint_path)
+                with open(self.checkpoint_path, 'r') as f:
+                    checkpoint = json.load(f)
+                entries = checkpoint.get("candidates", [])
+                self.updated_at = checkpoint.get("analysis_date")
+            except Exception as e:
+                print(f"[BULK SUMMARY] Could not read checkpoint {self.checkpoint_path}: {e}")
+                entries, checkpoint_mtime = [], None
+        known = {os.path.normpath(entry.get("analysis_file", "")): entry for entry in entries}
+        reconciled, seen = {}, set()
+        folded = 0
+        for _, file_path in iter_interview_paths("analysis", os.path.dirname(self.checkpoint_path) or "."):
+            path = os.path.normpath(file_path)
+            seen.add(path)
+            try:
+                if path in known and checkpoint_mtime is not None and os.path.getmtime(file_path) <= checkpoint_mtime:
+                    entry = known[path]
+                else:
+                    with open(file_path, 'r') as f:
+                        entry = candidate_entry(json.load(f), file_path)
+                    folded += 1
+            except Exception:
+                continue
+            reconciled[entry["call_id"]] = entry
+        dropped = len(known.keys() - seen)
+        if folded or dropped:
+            print(f"[BULK SUMMARY] Reconciled checkpoint with analysis files: {folded} read, {dropped} dropped")
+            self._dirty = True
+        return list(reconciled.values())
+    def _insert(self, entry):
+        self._candidates[entry["call_id"]] = entry
+        bisect.insort(self._ranking, (self._rank_key(entry), entry["call_id"]))
+        self.statistics[match_bucket(entry["recommendation"])] += 1
+    def _remove(self, call_id):
+        entry = self._candidates.pop(call_id, None)
+        if entry is None:
+            return
+        item = (self._rank_key(entry), call_id)
+        index = bisect.bisect_left(self._ranking, item)
+        if index < len(self._ranking) and self._ranking[index] == item:
+            self._ranking.pop(index)
+        self.statistics[match_bucket(entry["recommendation"])] -= 1
+    def upsert(self, report, file_path):
+        with self._lock:
+            self._ensure_loaded()
+            self._replace(candidate_entry(report, file_path))
+            self._touch()
+    def _replace(self, entry):
+        self._remove(entry["call_id"])
+        self._insert(entry)
+    def _entries(self):
+        return [dict(self._candidates[call_id]) for _, call_id in self._ranking], self.statistics
+    def _touch(self):
+        self._dirty = True
+        self.updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.checkpoint()
+    def snapshot(self):
+        with self._lock:
+            self._ensure_loaded()
+            candidates, statistics = self._entries()
+            return {"total_candidates": len(candidates), "analysis_date": self.updated_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "candidates": candidates, "statistics": {bucket: statistics.get(bucket, 0) for bucket in MATCH_BUCKETS}}
+    def _schedule_checkpoint(self, delay):
+        if self._timer is None:
+            self._timer = threading.Timer(delay, self._scheduled_checkpoint)
+            self._timer.daemon = True
+            self._timer.start()
+    def _scheduled_checkpoint(self):
+        with self._lock:
+            self._timer = None
+        self.checkpoint()
+    def checkpoint(self, force=False):
+        with self._lock:
+            if not self._dirty:
+                return False
+            wait = self.checkpoint_interval - (time.monotonic() - self._last_checkpoint)
+            if not force and wait > 0:
+                self._schedule_checkpoint(wait)
+                return False
+            try:
+                os.makedirs(os.path.dirname(self.checkpoint_path) or ".", exist_ok=True)
+                temp_path = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+                with open(temp_path, 'w') as f:
+                    json.dump(self.snapshot(), f, indent=2)
+                os.replace(temp_path, self.checkpoint_path)
+                self._dirty = False
+                self._last_checkpoint = time.monotonic()
+                return True
+            except Exception as e:
+                print(f"[BULK SUMMARY] Checkpoint failed: {e}")
+                self._schedule_checkpoint(self.checkpoint_interval)
+                return False
+class SharedBulkSummary(RollingBulkSummary):
+    """The same summary kept in the shared state backend, so reports analysed on any worker land in one
+    ranking. The first worker to start seeds it from the checkpoint; each worker checkpoints what it sees"""
+    def __init__(self, state, checkpoint_path=BULK_SUMMARY_PATH, checkpoint_interval=BULK_SUMMARY_CHECKPOINT_INTERVAL):
+        super().__init__(checkpoint_path, checkpoint_interval)
+        self.state = state
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.state.claim_summary_load():
+            for entry in self._load_entries():
+                self._insert(entry)
+            self.checkpoint()
+    def _insert(self, entry):
+        self.state.put_summary_entry(entry["call_id"], entry, -entry["overall_score"], match_bucket(entry["recommendation"]))
+    def _replace(self, entry):
+        self._insert(entry)
+    def _entries(self):
+        return self.state.get_summary()
+def create_bulk_summary(state=state_backend):
+    return SharedBulkSummary(state) if state.shared else RollingBulkSummary()
+bulk_summary = create_bulk_summary()
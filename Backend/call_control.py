@@ -0,0 +1,42 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
+TWILIO_MAX_WORKERS = int(os.getenv("TWILIO_MAX_WORKERS", "8"))
+TWILIO_HTTP_TIMEOUT = float(os.getenv("TWILIO_HTTP_TIMEOUT", "15"))
+TWILIO_API_BASE_URL = os.getenv("TWILIO_API_BASE_URL")
+TWILIO_API_HOST = "https://api.twilio.com"
+class RedirectedHttpClient(TwilioHttpClient):
+    """Sends the REST API requests to base_url instead of api.twilio.com, e.g. the fake_twilio server"""
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/")
+    def request(self, method, url, *args, **kwargs):
+        if url.startswith(TWILIO_API_HOST):
+            url = self.base_url + url[len(TWILIO_API_HOST):]
+        return super().request(method, url, *args, **kwargs)
+def create_http_client(max_workers=TWILIO_MAX_WORKERS, timeout=TWILIO_HTTP_TIMEOUT, base_url=TWILIO_API_BASE_URL):
+    """Keep-alive session sized so every pool thread can hold its own connection. TWILIO_API_BASE_URL points
+    the client at a stand-in for the REST API"""
+    if base_url:
+        http_client = RedirectedHttpClient(base_url, pool_connections=True, timeout=timeout)
+    else:
+        http_client = TwilioHttpClient(pool_connections=True, timeout=timeout)
+    http_client.session.mount(f"{(base_url or TWILIO_API_HOST).split(':', 1)[0]}://", HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+    return http_client
+class AsyncCallControl:
+    """Runs the blocking Twilio REST calls on a bounded thread pool so the event loop keeps serving webhooks"""
+    def __init__(self, client, max_workers=TWILIO_MAX_WORKERS):
+        self.client = client
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="twilio-rest")
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+    async def create_call(self, **kwargs):
+        return await self._run(self.client.calls.create, **kwargs)
+    async def fetch_call(self, call_sid):
+        return await self._run(lambda: self.client.calls(call_sid).fetch())
+    async def cancel_call(self, call_sid):
+        return await self._run(lambda: self.client.calls(call_sid).update(status='canceled'))
@@ -0,0 +1,83 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+CALL_STORE_DB_PATH = os.getenv("CALL_STORE_DB_PATH", "interviews/calls.db")
+CALL_STORE_BUSY_TIMEOUT = float(os.getenv("CALL_STORE_BUSY_TIMEOUT", "5"))
+LEGACY_MAPPING_FILES = (("bulk_call_mapping.json", "csv_bulk_call"), ("call_phone_mapping.json", "single_call"))
+CALL_COLUMNS = ["call_sid", "phone", "name", "email", "data", "source", "bulk_call_id", "initiated_time", "status"]
+class CallStore:
+    """Persistent call_sid -> contact index filled when calls are dialed, with a secondary index on phone.
+    SQLite in WAL mode, so each new call is one small append and concurrent writers (threads or worker
+    processes) serialize on the database lock instead of overwriting each other"""
+    def __init__(self, db_path=CALL_STORE_DB_PATH):
+        self.db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+    def _connect(self):
+        if self._conn is not None:
+            return self._conn
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=CALL_STORE_BUSY_TIMEOUT, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS calls (
+            call_sid TEXT PRIMARY KEY, phone TEXT, name TEXT, email TEXT, data TEXT,
+            source TEXT, bulk_call_id TEXT, initiated_time TEXT, status TEXT)""")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_calls_phone ON calls(phone, initiated_time)")
+        conn.execute("CREATE TABLE IF NOT EXISTS imports (name TEXT PRIMARY KEY, imported_at TEXT)")
+        conn.commit()
+        self._conn = conn
+        for file_name, source in LEGACY_MAPPING_FILES:
+            self._import_legacy_mapping(file_name, source)
+        return conn
+    def _import_legacy_mapping(self, file_name, source):
+        if not os.path.exists(file_name):
+            return
+        if self._conn.execute("SELECT 1 FROM imports WHERE name = ?", (file_name,)).fetchone():
+            return
+        try:
+            with open(file_name, 'r') as f:
+                mapping = json.load(f)
+            for call_sid, contact in mapping.items():
+                self._write(call_sid, contact, contact.get("source", source), None)
+            self._conn.execute("INSERT INTO imports (name, imported_at) VALUES (?, ?)", (file_name, datetime.now().isoformat()))
+            self._conn.commit()
+            print(f"[CALL STORE] Imported {len(mapping)} mappings from {file_name}")
+        except Exception as e:
+            print(f"[CALL STORE] Failed to import {file_name}: {e}")
+    def _write(self, call_sid, contact, source, bulk_call_id, status="initiated"):
+        row = {
+            "call_sid": call_sid,
+            "phone": contact.get("phone") or contact.get("phone_number"),
+            "name": contact.get("name"),
+            "email": contact.get("email"),
+            "data": contact.get("data"),
+            "source": source,
+            "bulk_call_id": bulk_call_id,
+            "initiated_time": contact.get("initiated_time") or datetime.now().isoformat(),
+            "status": contact.get("status", status)}
+        placeholders = ", ".join("?" for _ in CALL_COLUMNS)
+        self._conn.execute(f"INSERT OR REPLACE INTO calls ({', '.join(CALL_COLUMNS)}) VALUES ({placeholders})", [row[column] for column in CALL_COLUMNS])
+    def record_contact(self, call_sid, contact, source="csv_bulk_call", bulk_call_id=None):
+        try:
+            with self._lock:
+                self._connect()
+                self._write(call_sid, contact, source, bulk_call_id)
+                self._conn.commit()
+        except Exception as e:
+            print(f"[CALL STORE] Failed to record contact for {call_sid}: {e}")
+    def get_contact(self, call_sid):
+        with self._lock:
+            row = self._connect().execute("SELECT * FROM calls WHERE call_sid = ?", (call_sid,)).fetchone()
+        return dict(row) if row else None
+    def get_phone(self, call_sid):
+        contact = self.get_contact(call_sid)
+        return contact.get("phone") if contact else None
+    def find_by_phone(self, phone):
+        with self._lock:
+            row = self._connect().execute("SELECT * FROM calls WHERE phone = ? ORDER BY initiated_time DESC LIMIT 1", (phone,)).fetchone()
+        return dict(row) if row else None
+call_store = CallStore()
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+BULK_MAX_CONCURRENT_CALLS = int(os.getenv("BULK_MAX_CONCURRENT_CALLS", "5"))
+BULK_CALLS_PER_SECOND = float(os.getenv("BULK_CALLS_PER_SECOND", "1"))
+CALL_STATUS_POLL_INTERVAL = float(os.getenv("CALL_STATUS_POLL_INTERVAL", "1"))
+TERMINAL_CALL_STATUSES = ('completed', 'busy', 'failed', 'no-answer', 'canceled')
+class CallRateLimiter:
+    """Spaces call starts so no more than calls_per_second are placed"""
+    def __init__(self, calls_per_second):
+        self.interval = 1.0 / calls_per_second if calls_per_second and calls_per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            wait = self._next_slot - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+                now = loop.time()
+            self._next_slot = max(now, self._next_slot) + self.interval
+class CampaignDialer:
+    """Keeps up to max_concurrent calls of a campaign in flight"""
+    def __init__(self, dial_contact, max_concurrent=None, calls_per_second=None):
+        self.dial_contact = dial_contact
+        self.max_concurrent = max(1, int(max_concurrent or BULK_MAX_CONCURRENT_CALLS))
+        self.calls_per_second = calls_per_second if calls_per_second is not None else BULK_CALLS_PER_SECOND
+        self.rate_limiter = CallRateLimiter(self.calls_per_second)
+    async def run(self, campaign, contacts):
+        """campaign is a state_backend.CampaignState, so a stop requested on any worker is seen here"""
+        slots = asyncio.Semaphore(self.max_concurrent)
+        tasks = []
+        await campaign.update(in_flight=0)
+        for index, contact in enumerate(contacts):
+            await slots.acquire()
+            if await campaign.status() != "STOPPED":
+                await self.rate_limiter.acquire()
+            if await campaign.status() == "STOPPED":
+                slots.release()
+                break
+            await campaign.update(current_index=index)
+            await campaign.incr("in_flight")
+            tasks.append(asyncio.create_task(self._dial(slots, campaign, index, len(contacts), contact)))
+        if tasks:
+            await asyncio.gather(*tasks)
+    async def _dial(self, slots, campaign, index, total_contacts, contact):
+        try:
+            print(f"Starting call {index + 1}/{total_contacts} to {contact['name']} at {contact['phone']}")
+            result = await self.dial_contact(contact)
+            await campaign.append_result(result)
+            print(f"Call {index + 1} completed: {result['status']}")
+        finally:
+            await campaign.incr("in_flight", -1)
+            slots.release()
+class CallStatusTracker:
+    """Wakes dialer tasks as soon as Twilio posts a terminal call status. With several workers the callback
+    may land on another process; remote_status (a coroutine function) then reads the shared status every
+    poll_interval seconds"""
+    def __init__(self, max_entries=5000, remote_status=None, poll_interval=CALL_STATUS_POLL_INTERVAL):
+        self.max_entries = max_entries
+        self.remote_status = remote_status
+        self.poll_interval = poll_interval
+        self._calls = OrderedDict()
+    def _entry(self, call_sid):
+        entry = self._calls.get(call_sid)
+        if entry is None:
+            entry = {"status": None, "duration": None, "bulk_call_id": None, "updated": time.monotonic(), "done": asyncio.Event()}
+            self._calls[call_sid] = entry
+            while len(self._calls) > self.max_entries:
+                self._calls.popitem(last=False)
+        return entry
+    def watch(self, call_sid, bulk_call_id=None):
+        entry = self._entry(call_sid)
+        entry["bulk_call_id"] = bulk_call_id
+        entry["updated"] = time.monotonic()
+        return entry
+    def record(self, call_sid, status, duration=None):
+        entry = self._entry(call_sid)
+        entry["status"] = status
+        if duration is not None:
+            entry["duration"] = duration
+        entry["updated"] = time.monotonic()
+        if status in TERMINAL_CALL_STATUSES:
+            entry["done"].set()
+        return entry
+    def touch(self, call_sid):
+        self._entry(call_sid)["updated"] = time.monotonic()
+    def get(self, call_sid):
+        return self._calls.get(call_sid)
+    async def _check_remote(self, call_sid, entry):
+        try:
+            remote = await self.remote_status(call_sid)
+        except Exception as e:
+            print(f"[ERROR] Shared call status lookup failed for {call_sid}: {e}")
+            return
+        if remote and remote.get("status") and remote["status"] != entry["status"]:
+            self.record(call_sid, remote["status"], remote.get("duration"))
+    def forget(self, call_sid):
+        self._calls.pop(call_sid, None)
+    async def wait_until_final(self, call_sid, silence_timeout):
+        """Returns the entry once terminal, or None after silence_timeout seconds without callbacks"""
+        entry = self._entry(call_sid)
+        while not entry["done"].is_set():
+            remaining = entry["updated"] + silence_timeout - time.monotonic()
+            if remaining <= 0:
+                return None
+            if self.remote_status is not None:
+                remaining = min(remaining, self.poll_interval)
+            try:
+                await asyncio.wait_for(entry["done"].wait(), remaining)
+            except asyncio.TimeoutError:
+                if self.remote_status is not None:
+                    await self._check_remote(call_sid, entry)
+        return entry
@@ -0,0 +1,193 @@
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from dialer import TERMINAL_CALL_STATUSES
+FAKE_TWILIO_OUTCOMES = os.getenv("FAKE_TWILIO_OUTCOMES", "completed:0.6,no-answer:0.2,busy:0.15,failed:0.05")
+FAKE_TWILIO_RING_SECONDS = os.getenv("FAKE_TWILIO_RING_SECONDS", "3:12")
+FAKE_TWILIO_BUSY_SECONDS = os.getenv("FAKE_TWILIO_BUSY_SECONDS", "1:4")
+FAKE_TWILIO_NO_ANSWER_SECONDS = os.getenv("FAKE_TWILIO_NO_ANSWER_SECONDS", "30")
+FAKE_TWILIO_TALK_SECONDS = os.getenv("FAKE_TWILIO_TALK_SECONDS", "60:240")
+FAKE_TWILIO_API_LATENCY_MS = os.getenv("FAKE_TWILIO_API_LATENCY_MS", "80:250")
+FAKE_TWILIO_CALLBACK_LATENCY_MS = os.getenv("FAKE_TWILIO_CALLBACK_LATENCY_MS", "50:300")
+FAKE_TWILIO_TIME_SCALE = float(os.getenv("FAKE_TWILIO_TIME_SCALE", "1"))
+API_PREFIX = "/2010-04-01/Accounts/{account_sid}"
+CALLBACK_EVENTS = {"ringing": "ringing", "in-progress": "answered"}
+def parse_range(value):
+    """"3:12" is uniform between 3 and 12, "30" is always 30"""
+    low, _, high = str(value).partition(":")
+    return float(low), float(high or low)
+def parse_outcomes(value):
+    """"completed:0.6,busy:0.4" -> [("completed", 0.6), ("busy", 0.4)]"""
+    outcomes = []
+    for item in str(value).split(","):
+        name, _, weight = item.strip().partition(":")
+        if name not in ("completed", "busy", "no-answer", "failed"):
+            raise ValueError(f"unknown call outcome {name!r}")
+        outcomes.append((name, float(weight or 1)))
+    return outcomes
+class FakeTwilio:
+    """Stand-in for the Calls resource of the Twilio REST API. A created call is queued, rings, and then is
+    answered (in-progress, then completed after a talk time), busy, unanswered or failed, drawn from the
+    outcome weights; the status callbacks the call asked for are posted as it goes. Durations are in call
+    time and divided by time_scale, so a campaign of hour-long calls can run in seconds"""
+    def __init__(self, outcomes=FAKE_TWILIO_OUTCOMES, ring_seconds=FAKE_TWILIO_RING_SECONDS, busy_seconds=FAKE_TWILIO_BUSY_SECONDS,
+                 no_answer_seconds=FAKE_TWILIO_NO_ANSWER_SECONDS, talk_seconds=FAKE_TWILIO_TALK_SECONDS, api_latency_ms=FAKE_TWILIO_API_LATENCY_MS,
+                 callback_latency_ms=FAKE_TWILIO_CALLBACK_LATENCY_MS, time_scale=FAKE_TWILIO_TIME_SCALE, seed=None):
+        self.outcomes = parse_outcomes(outcomes)
+        self.ring_seconds = parse_range(ring_seconds)
+        self.busy_seconds = parse_range(busy_seconds)
+        self.no_answer_seconds = parse_range(no_answer_seconds)
+        self.talk_seconds = parse_range(talk_seconds)
+        self.api_latency = tuple(ms / 1000 for ms in parse_range(api_latency_ms))
+        self.callback_latency = tuple(ms / 1000 for ms in parse_range(callback_latency_ms))
+        self.time_scale = time_scale
+        self.rng = random.Random(seed)
+        self.calls = {}
+        self.rest_calls = Counter()
+        self.callbacks = Counter()
+        self.outcome_counts = Counter()
+        self._tasks = {}
+        self._callbacks = set()
+        self._http = None
+    async def sleep(self, bounds):
+        await asyncio.sleep(self.rng.uniform(*bounds) / self.time_scale)
+    def resource(self, call):
+        now = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S +0000")
+        return {"sid": call["sid"], "account_sid": call["account_sid"], "to": call["to"], "from": call["from"], "status": call["status"],
+                "direction": "outbound-api", "duration": str(call["duration"]) if call["duration"] is not None else None,
+                "date_created": call["date_created"], "date_updated": now, "start_time": call.get("start_time"), "end_time": call.get("end_time"),
+                "price": None, "price_unit": "USD", "uri": f"{API_PREFIX.format(account_sid=call['account_sid'])}/Calls/{call['sid']}.json"}
+    async def create_call(self, account_sid, form):
+        sid = f"CA{uuid.uuid4().hex}"
+        call = {"sid": sid, "account_sid": account_sid, "to": form.get("To"), "from": form.get("From"), "url": form.get("Url"), "status": "queued",
+                "status_callback": form.get("StatusCallback"), "status_callback_method": form.get("StatusCallbackMethod") or "POST",
+                "status_callback_events": set(form.getlist("StatusCallbackEvent")) or {"completed"}, "duration": None, "sequence": 0,
+                "date_created": datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S +0000")}
+        self.calls[sid] = call
+        self._tasks[sid] = asyncio.create_task(self.progress(call))
+        return call
+    def set_status(self, call, status, **fields):
+        """Moves the call on and queues the status callback; callbacks for one call are delivered in order"""
+        call["status"] = status
+        call.update(fields)
+        if status in TERMINAL_CALL_STATUSES:
+            self.outcome_counts[status] += 1
+        event = CALLBACK_EVENTS.get(status, "completed")
+        if call["status_callback"] and event in call["status_callback_events"]:
+            call["sequence"] += 1
+            form = {"AccountSid": call["account_sid"], "CallSid": call["sid"], "CallStatus": status, "From": call["from"], "To": call["to"],
+                    "Direction": "outbound-api", "CallbackSource": "call-progress-events", "SequenceNumber": str(call["sequence"] - 1),
+                    "Timestamp": datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S +0000")}
+            if call["duration"] is not None:
+                form["CallDuration"] = str(call["duration"])
+            task = asyncio.create_task(self.post_callback(call, form, call.get("callback")))
+            call["callback"] = task
+            self._callbacks.add(task)
+            task.add_done_callback(self._callbacks.discard)
+    async def post_callback(self, call, form, previous):
+        await self.sleep(self.callback_latency)
+        if previous is not None:
+            await previous
+        try:
+            if self._http is None:
+                self._http = httpx.AsyncClient(timeout=15)
+            response = await self._http.request(call["status_callback_method"], call["status_callback"], data=form)
+            self.callbacks["ok" if response.status_code < 400 else f"http {response.status_code}"] += 1
+        except httpx.HTTPError as e:
+            self.callbacks[f"exception: {type(e).__name__}"] += 1
+    async def progress(self, call):
+        outcome = self.rng.choices([name for name, _ in self.outcomes], [weight for _, weight in self.outcomes])[0]
+        try:
+            await self.sleep((0.2, 0.6))
+            if outcome == "failed":
+                self.set_status(call, "failed", duration=0)
+                return
+            self.set_status(call, "ringing")
+            if outcome == "busy":
+                await self.sleep(self.busy_seconds)
+                self.set_status(call, "busy", duration=0)
+            elif outcome == "no-answer":
+                await self.sleep(self.no_answer_seconds)
+                self.set_status(call, "no-answer", duration=0)
+            else:
+                await self.sleep(self.ring_seconds)
+                call["answered_at"] = time.monotonic()
+                self.set_status(call, "in-progress", start_time=datetime.now(timezone.utc).isoformat())
+                talk = self.rng.uniform(*self.talk_seconds)
+                await asyncio.sleep(talk / self.time_scale)
+                self.set_status(call, "completed", duration=round(talk), end_time=datetime.now(timezone.utc).isoformat())
+        finally:
+            self._tasks.pop(call["sid"], None)
+    async def update_call(self, call, form):
+        """Status=canceled ends a queued or ringing call, Status=completed hangs up an answered one"""
+        task = self._tasks.get(call["sid"])
+        if form.get("Status") in ("canceled", "completed") and task is not None:
+            task.cancel()
+            if call["status"] == "in-progress":
+                self.set_status(call, "completed", duration=round((time.monotonic() - call["answered_at"]) * self.time_scale), end_time=datetime.now(timezone.utc).isoformat())
+            else:
+                self.set_status(call, "canceled", duration=0)
+        return call
+    def stats(self):
+        return {"calls": len(self.calls), "rest_calls": dict(self.rest_calls), "callbacks": dict(self.callbacks), "outcomes": dict(self.outcome_counts)}
+    async def close(self):
+        for task in list(self._tasks.values()) + list(self._callbacks):
+            task.cancel()
+        if self._http is not None:
+            await self._http.aclose()
+def twilio_error(status, code, message):
+    return JSONResponse({"code": code, "message": message, "more_info": f"https://www.twilio.com/docs/errors/{code}", "status": status}, status_code=status)
+def create_app(fake):
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        try:
+            yield
+        finally:
+            await fake.close()
+    app = FastAPI(title="Fake Twilio REST API", lifespan=lifespan)
+    @app.post(API_PREFIX + "/Calls.json")
+    async def create_call(account_sid: str, request: Request):
+        fake.rest_calls["calls.create"] += 1
+        form = await request.form()
+        await fake.sleep(fake.api_latency)
+        if not form.get("To") or not form.get("From") or not (form.get("Url") or form.get("Twiml")):
+            return twilio_error(400, 21205, "To, From and Url are required")
+        call = await fake.create_call(account_sid, form)
+        return JSONResponse(fake.resource(call), status_code=201)
+    @app.get(API_PREFIX + "/Calls/{call_sid}.json")
+    async def fetch_call(account_sid: str, call_sid: str):
+        fake.rest_calls["calls.fetch"] += 1
+        await fake.sleep(fake.api_latency)
+        call = fake.calls.get(call_sid)
+        if call is None:
+            return twilio_error(404, 20404, f"The requested resource /Calls/{call_sid}.json was not found")
+        return JSONResponse(fake.resource(call))
+    @app.post(API_PREFIX + "/Calls/{call_sid}.json")
+    async def update_call(account_sid: str, call_sid: str, request: Request):
+        fake.rest_calls["calls.update"] += 1
+        form = await request.form()
+        await fake.sleep(fake.api_latency)
+        call = fake.calls.get(call_sid)
+        if call is None:
+            return twilio_error(404, 20404, f"The requested resource /Calls/{call_sid}.json was not found")
+        return JSONResponse(fake.resource(await fake.update_call(call, form)))
+    @app.get("/stats")
+    async def get_stats():
+        return fake.stats()
+    return app
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Fake Twilio REST API for offline dialing; point the backend at it with TWILIO_API_BASE_URL")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    uvicorn.run(create_app(FakeTwilio(seed=args.seed)), host="127.0.0.1", port=args.port)
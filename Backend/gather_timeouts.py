@@ -0,0 +1,112 @@
+import json
+import math
+import os
+import threading
+from collections import namedtuple
+from datetime import datetime
+GATHER_SPEECH_TIMEOUT = int(os.getenv("GATHER_SPEECH_TIMEOUT", "8"))
+GATHER_TIMEOUT = int(os.getenv("GATHER_TIMEOUT", "4"))
+GATHER_MIN_SPEECH_TIMEOUT = int(os.getenv("GATHER_MIN_SPEECH_TIMEOUT", "2"))
+GATHER_MIN_TIMEOUT = int(os.getenv("GATHER_MIN_TIMEOUT", "3"))
+GATHER_PROFILE_REFRESH_SECONDS = float(os.getenv("GATHER_PROFILE_REFRESH_SECONDS", "600"))
+GATHER_PROFILE_MIN_SAMPLES = int(os.getenv("GATHER_PROFILE_MIN_SAMPLES", "5"))
+GATHER_PROFILE_MAX_INTERVIEWS = int(os.getenv("GATHER_PROFILE_MAX_INTERVIEWS", "500"))
+GATHER_PROFILE_MAX_TURN_SECONDS = 120
+PROMPT_WORDS_PER_SECOND = 2.5
+ANSWER_WORDS_PER_SECOND = 2.5
+TURN_OVERHEAD_SECONDS = 2.0
+OPENING_PROMPT_WORDS = 10
+GatherTimeouts = namedtuple("GatherTimeouts", ["speech_timeout", "timeout"])
+DEFAULT_GATHER_TIMEOUTS = GatherTimeouts(GATHER_SPEECH_TIMEOUT, GATHER_TIMEOUT)
+def reprompt_timeouts(timeouts):
+    """A reprompt repeats a question the candidate already heard, so it listens a little less (8/4 -> 6/3)"""
+    return GatherTimeouts(max(GATHER_MIN_SPEECH_TIMEOUT, round(timeouts.speech_timeout * 0.75)), max(GATHER_MIN_TIMEOUT - 1, timeouts.timeout - 1))
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+def prompt_seconds(questions, question_number):
+    """Rough playback time of the prompt before the Gather: the question, "Next question:" or the greeting"""
+    words = len(questions.get(question_number, "").split()) + (OPENING_PROMPT_WORDS if question_number == 1 else 2)
+    return words / PROMPT_WORDS_PER_SECOND + 0.5
+def parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+def answer_timings(interview):
+    """(question_number, turn_seconds, words, speech_timeout) per answered question, where turn_seconds runs
+    from the previous answer (or the start of the call) to this answer's timestamp"""
+    previous = parse_timestamp(interview.get("start_time"))
+    seen = set()
+    for response in sorted(interview.get("responses", []), key=lambda response: response.get("timestamp") or ""):
+        timestamp = parse_timestamp(response.get("timestamp"))
+        question_number = response.get("question_number")
+        if timestamp is None or previous is None or question_number in seen:
+            previous = timestamp or previous
+            continue
+        turn_seconds = (timestamp - previous).total_seconds()
+        previous = timestamp
+        seen.add(question_number)
+        if response.get("answer") == "[SKIPPED]" or not 0 < turn_seconds <= GATHER_PROFILE_MAX_TURN_SECONDS:
+            continue
+        yield question_number, turn_seconds, len(str(response.get("answer", "")).split()), response.get("speech_timeout", GATHER_SPEECH_TIMEOUT)
+def build_profiles(interviews, questions, min_samples=GATHER_PROFILE_MIN_SAMPLES):
+    """Per-question Gather timeouts from past answers. speechTimeout grows with how long answers run (longer
+    answers hold longer pauses): 2 s plus 1 s per 10 words at the 75th percentile. timeout, the wait for the
+    candidate to start, drops below the default when the time left over after the prompt, the speech itself
+    and the old speechTimeout shows candidates start promptly. Questions with too few samples keep defaults"""
+    samples = {}
+    for interview in interviews:
+        for question_number, turn_seconds, words, speech_timeout in answer_timings(interview):
+            if question_number in questions:
+                residual = turn_seconds - prompt_seconds(questions, question_number) - speech_timeout - words / ANSWER_WORDS_PER_SECOND - TURN_OVERHEAD_SECONDS
+                samples.setdefault(question_number, []).append((words, max(0.0, residual)))
+    profiles = {}
+    stats = {}
+    for question_number in questions:
+        points = samples.get(question_number, [])
+        stats[question_number] = {"samples": len(points)}
+        if len(points) < min_samples:
+            profiles[question_number] = DEFAULT_GATHER_TIMEOUTS
+            continue
+        words_p75 = percentile([words for words, _ in points], 0.75)
+        residual_p90 = percentile([residual for _, residual in points], 0.9)
+        profiles[question_number] = GatherTimeouts(
+            min(GATHER_SPEECH_TIMEOUT, max(GATHER_MIN_SPEECH_TIMEOUT, round(GATHER_MIN_SPEECH_TIMEOUT + words_p75 / 10))),
+            min(GATHER_TIMEOUT, max(GATHER_MIN_TIMEOUT, math.ceil(residual_p90) + 1)))
+        stats[question_number].update({"words_p75": words_p75, "residual_p90_seconds": round(residual_p90, 2)})
+    return profiles, stats
+class GatherTimeoutProfiles:
+    """Current per-question timeouts. refresh() recomputes them from the newest finished interviews in the
+    catalog and swaps the dict in one assignment, so readers never see a half-built set"""
+    def __init__(self, catalog, questions, max_interviews=GATHER_PROFILE_MAX_INTERVIEWS):
+        self.catalog = catalog
+        self.questions = dict(questions)
+        self.max_interviews = max_interviews
+        self.profiles = {question_number: DEFAULT_GATHER_TIMEOUTS for question_number in questions}
+        self.stats = {}
+        self.refreshed_at = None
+        self._lock = threading.Lock()
+    def load_interviews(self):
+        rows, _ = self.catalog.page(kinds=["completed", "terminated"], limit=self.max_interviews)
+        for row in rows:
+            try:
+                with open(row["path"], 'r') as f:
+                    yield json.load(f)
+            except (OSError, TypeError, ValueError):
+                continue
+    def refresh(self):
+        with self._lock:
+            profiles, stats = build_profiles(self.load_interviews(), self.questions)
+            changed = profiles != self.profiles
+            self.profiles, self.stats = profiles, stats
+            self.refreshed_at = datetime.now().isoformat()
+            if changed:
+                print(f"[GATHER] Timeouts per question: {', '.join(f'Q{q} {t.speech_timeout}/{t.timeout}' for q, t in sorted(profiles.items()))}")
+            return changed
+    def get(self, question_number):
+        return self.profiles.get(question_number, DEFAULT_GATHER_TIMEOUTS)
+    def snapshot(self):
+        return {"refreshed_at": self.refreshed_at,
+                "questions": {question_number: {"speech_timeout": timeouts.speech_timeout, "timeout": timeouts.timeout, **self.stats.get(question_number, {})}
+                              for question_number, timeouts in sorted(self.profiles.items())}}
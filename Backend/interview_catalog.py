@@ -0,0 +1,152 @@
+import json
+import os
+import sqlite3
+import threading
+from session_journal import session_journal, SessionJournal
+from storage_layout import INTERVIEWS_DIR, iter_interview_paths
+from state_backend import state_backend
+CATALOG_DB_PATH = os.getenv("CATALOG_DB_PATH", "interviews/catalog.db")
+CATALOG_COUNTER_PREFIX = "interviews:"
+CATALOG_COLUMNS = ["interview_id", "status", "kind", "start_time", "end_time", "completion_time", "questions_answered", "total_questions", "all_validations_passed", "termination_reason", "phone_number", "path"]
+def build_catalog_row(interview_data, kind, path=None, total_questions=7):
+    responses = interview_data.get("responses", [])
+    if kind == "session":
+        all_validations_passed = all(v.get('passed', True) for v in interview_data.get('validation_results', {}).values())
+    else:
+        all_validations_passed = interview_data.get("all_validations_passed", False)
+    return {
+        "interview_id": interview_data.get("interview_id"),
+        "status": interview_data.get("status", "IN_PROGRESS" if kind == "session" else "COMPLETED"),
+        "kind": kind,
+        "start_time": interview_data.get("start_time", ""),
+        "end_time": interview_data.get("end_time", ""),
+        "completion_time": interview_data.get("completion_time", ""),
+        "questions_answered": len(responses),
+        "total_questions": interview_data.get("total_questions", total_questions),
+        "all_validations_passed": bool(all_validations_passed),
+        "termination_reason": interview_data.get("termination_reason", None),
+        "phone_number": interview_data.get("phone_number"),
+        "path": path}
+def scan_interview_files(base_dir=INTERVIEWS_DIR, total_questions=7):
+    """Yields catalog rows for everything on disk; final documents come after sessions so they win"""
+    journal = session_journal if os.path.normpath(base_dir) == os.path.normpath(session_journal.base_dir) else SessionJournal(base_dir)
+    for call_sid in journal.list_call_sids():
+        session_data = journal.read(call_sid)
+        if session_data:
+            yield build_catalog_row(session_data, "session", journal.path(call_sid), total_questions)
+    for kind in ("terminated", "completed"):
+        for call_sid, path in iter_interview_paths(kind, base_dir):
+            try:
+                with open(path, 'r') as f:
+                    interview_data = json.load(f)
+                interview_data.setdefault("interview_id", call_sid)
+                yield build_catalog_row(interview_data, kind, path, total_questions)
+            except Exception as e:
+                print(f"[CATALOG] Skipping unreadable interview file {path}: {e}")
+class InterviewCatalog:
+    """One row per interview in SQLite plus per-status counters in the state backend, so list and stats endpoints
+    never scan the interviews folder and every worker reports the same counts"""
+    def __init__(self, db_path=CATALOG_DB_PATH, state=None):
+        self.db_path = db_path
+        self.state = state or state_backend
+        self._conn = None
+        self._lock = threading.RLock()
+    def open(self, total_questions=7):
+        """Returns True when the catalog was just built from the files on disk"""
+        with self._lock:
+            if self._conn is not None:
+                return False
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            is_new = not os.path.exists(self.db_path)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS interviews (
+                interview_id TEXT PRIMARY KEY, status TEXT, kind TEXT, start_time TEXT, end_time TEXT, completion_time TEXT,
+                questions_answered INTEGER, total_questions INTEGER, all_validations_passed INTEGER,
+                termination_reason TEXT, phone_number TEXT, path TEXT)""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_interviews_start_time_id ON interviews(start_time, interview_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_interviews_status ON interviews(status)")
+            self._conn.commit()
+            if is_new:
+                self.rebuild(scan_interview_files(os.path.dirname(self.db_path) or ".", total_questions))
+            else:
+                self._load_counts()
+            return is_new
+    def _load_counts(self):
+        counts = {str(row["status"]): row["n"] for row in self._conn.execute("SELECT status, COUNT(*) AS n FROM interviews GROUP BY status")}
+        self.state.reset_counters(CATALOG_COUNTER_PREFIX, counts)
+    def rebuild(self, rows):
+        with self._lock:
+            self._conn.execute("DELETE FROM interviews")
+            count = 0
+            for row in rows:
+                self._write_row(row)
+                count += 1
+            self._conn.commit()
+            self._load_counts()
+            print(f"[CATALOG] Rebuilt interview catalog with {count} entries")
+    def _write_row(self, row):
+        values = [row.get(column) for column in CATALOG_COLUMNS]
+        placeholders = ", ".join("?" for _ in CATALOG_COLUMNS)
+        self._conn.execute(f"INSERT OR REPLACE INTO interviews ({', '.join(CATALOG_COLUMNS)}) VALUES ({placeholders})", values)
+    def upsert(self, row):
+        try:
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    previous = self._conn.execute("SELECT status FROM interviews WHERE interview_id = ?", (row["interview_id"],)).fetchone()
+                    self._write_row(row)
+                    self._conn.commit()
+                except Exception:
+                    self._conn.rollback()
+                    raise
+                if previous is not None:
+                    self.state.incr_counter(f"{CATALOG_COUNTER_PREFIX}{previous['status']}", -1)
+                self.state.incr_counter(f"{CATALOG_COUNTER_PREFIX}{row.get('status')}")
+        except Exception as e:
+            print(f"[CATALOG] Failed to index interview {row.get('interview_id')}: {e}")
+    def get(self, interview_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM interviews WHERE interview_id = ?", (interview_id,)).fetchone()
+        return self._to_dict(row) if row else None
+    def page(self, kinds=None, statuses=None, start_from=None, start_to=None, after=None, limit=50):
+        """Keyset page ordered by start_time, newest first; after is the (start_time, interview_id) of the last row already returned"""
+        conditions = []
+        params = []
+        if kinds:
+            conditions.append(f"kind IN ({', '.join('?' for _ in kinds)})")
+            params.extend(kinds)
+        if statuses:
+            conditions.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            params.extend(statuses)
+        if start_from:
+            conditions.append("start_time >= ?")
+            params.append(start_from)
+        if start_to:
+            conditions.append("start_time <= ?")
+            params.append(start_to)
+        if after:
+            conditions.append("(start_time < ? OR (start_time = ? AND interview_id < ?))")
+            params.extend([after[0], after[0], after[1]])
+        query = "SELECT * FROM interviews"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY start_time DESC, interview_id DESC LIMIT ?"
+        params.append(limit + 1)
+        with self._lock:
+            rows = [self._to_dict(row) for row in self._conn.execute(query, params).fetchall()]
+        has_more = len(rows) > limit
+        return rows[:limit], has_more
+    def status_counts(self):
+        return self.state.get_counters(CATALOG_COUNTER_PREFIX)
+    def total(self):
+        return sum(self.status_counts().values())
+    def count(self, status):
+        return self.status_counts().get(status, 0)
+    def _to_dict(self, row):
+        data = dict(row)
+        data["all_validations_passed"] = bool(data["all_validations_passed"])
+        return data
+interview_catalog = InterviewCatalog()
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from skill_matcher import get_skill_matcher
+JD_FILES = ("current_jd.json", "config/job_description.json")
+JD_CHECK_INTERVAL = float(os.getenv("JD_CHECK_INTERVAL", "2"))
+DEFAULT_JD_SKILLS = ["python", "javascript", "react"]
+JDSnapshot = namedtuple("JDSnapshot", ["path", "stat_key", "digest", "jd", "skills", "matcher", "version"])
+def jd_skills(jd_data):
+    if not jd_data:
+        return list(DEFAULT_JD_SKILLS)
+    skills = jd_data.get("required_skills", []) or jd_data.get("skills", []) or jd_data.get("technical_skills", [])
+    return skills if skills else list(DEFAULT_JD_SKILLS)
+def file_stat_key(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+class JobDescriptionProvider:
+    """The parsed JD, its skills and compiled matcher as one immutable snapshot. The JD file is stat-ed at most
+    every check_interval seconds and only re-parsed when its mtime or size moved and its content hash changed"""
+    def __init__(self, paths=JD_FILES, check_interval=JD_CHECK_INTERVAL):
+        self.paths = paths
+        self.check_interval = check_interval
+        self._snapshot = self._build(None, None, None, None, 0)
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+    def _build(self, path, stat_key, digest, jd, version):
+        skills = jd_skills(jd)
+        return JDSnapshot(path, stat_key, digest, jd, skills, get_skill_matcher(skills), version)
+    def _refresh(self):
+        current = self._snapshot
+        for path in self.paths:
+            try:
+                stat_key = file_stat_key(path)
+            except FileNotFoundError:
+                continue
+            if path == current.path and stat_key == current.stat_key:
+                return
+            try:
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                digest = hashlib.sha256(raw).hexdigest()
+                if path == current.path and digest == current.digest:
+                    self._snapshot = current._replace(stat_key=stat_key)
+                    return
+                jd = json.loads(raw)
+            except Exception as e:
+                print(f"[JD] Keeping the previous job description, could not read {path}: {e}")
+                return
+            self._snapshot = self._build(path, stat_key, digest, jd, current.version + 1)
+            print(f"[JD] Loaded job description v{self._snapshot.version} from {path}")
+            return
+        if current.path is not None:
+            self._snapshot = self._build(None, None, None, None, current.version + 1)
+    def snapshot(self):
+        now = time.monotonic()
+        if now >= self._next_check:
+            with self._lock:
+                if now >= self._next_check:
+                    self._refresh()
+                    self._next_check = now + self.check_interval
+        return self._snapshot
+    def get(self):
+        """Parsed JD dict or None; shared by every caller, so treat it as read-only"""
+        return self.snapshot().jd
+    def skills(self):
+        return self.snapshot().skills
+    def matcher(self):
+        return self.snapshot().matcher
+    def update(self, jd_config, path=JD_FILES[0]):
+        """Writes the new JD atomically and swaps it in, so the next read sees it without waiting for a stat"""
+        raw = json.dumps(jd_config, indent=2).encode()
+        with self._lock:
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(raw)
+            os.replace(temp_path, path)
+            current = self._snapshot
+            self._snapshot = self._build(path, file_stat_key(path), hashlib.sha256(raw).hexdigest(), json.loads(raw), current.version + 1)
+            self._next_check = time.monotonic() + self.check_interval
+        return self._snapshot
+jd_provider = JobDescriptionProvider()
@@ -1,18 +1,39 @@
-from fastapi import FastAPI, Request, BackgroundTasks, UploadFile, File
-from fastapi.responses import Response
+from fastapi import FastAPI, Request, BackgroundTasks, UploadFile, File, WebSocket
+from fastapi.responses import Response, FileResponse
 import os
 import json
 import boto3
 import time
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
 from twilio.rest import Client
-from twilio.twiml.voice_response import VoiceResponse, Gather
+from twilio.twiml.voice_response import VoiceResponse
 import asyncio
+import contextlib
+import functools
+import base64
+import binascii
 import re
-from summary import run_jd_analysis
-import glob
-from typing import List
+from summary import analyze_completed_interview, analyze_all_completed_interviews
+from analysis_queue import analysis_queue
+from bulk_summary import bulk_summary
+from call_store import call_store
+from dialer import CampaignDialer, CallStatusTracker, TERMINAL_CALL_STATUSES
+from call_control import AsyncCallControl, create_http_client
+from session_journal import session_journal, SessionContext
+from interview_catalog import interview_catalog, build_catalog_row, scan_interview_files
+from jd_provider import jd_provider
+from storage_layout import interview_path, ensure_parent
+from migrate_storage import migrate_flat_files
+from storage import storage
+from state_backend import state_backend, CampaignState
+from twiml_cache import twiml_cache
+from prompt_audio import create_prompt_audio_cache, PROMPT_AUDIO, PROMPT_AUDIO_CACHE_CONTROL
+from media_stream import MediaStreamSession, create_transcriber, transcriber_unavailable, STREAM_TRANSCRIBER
+from speech_dedupe import speech_replay_cache
+from gather_timeouts import GatherTimeoutProfiles, GATHER_PROFILE_REFRESH_SECONDS
+from vad import VAD_END_OF_TURN_MS
+from telemetry import metrics, call_timeline, LatencyMiddleware
+from typing import List, Optional
 import csv
 import io
 from dotenv import load_dotenv
@@ -27,16 +48,32 @@ WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL")
 TRANSCRIPTION_TIMEOUT = 10
 SILENCE_TIMEOUT = 5 
 MAX_SILENCE_PROMPTS = 1 
+CALL_TIMEOUT = float(os.getenv("CALL_TIMEOUT", "300"))
+CALL_STATUS_SILENCE_TIMEOUT = float(os.getenv("CALL_STATUS_SILENCE_TIMEOUT", "60"))
+INTERVIEW_MODE = os.getenv("INTERVIEW_MODE", "gather")
 from fastapi.middleware.cors import CORSMiddleware
-app = FastAPI(title="AI INTERVIEWER")
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Runs the Gather timeout refresh for the life of the server; the task is kept on app.state so it is not
+    garbage-collected, and cancelled at shutdown"""
+    app.state.gather_refresh_task = asyncio.create_task(refresh_gather_timeouts())
+    try:
+        yield
+    finally:
+        app.state.gather_refresh_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await app.state.gather_refresh_task
+app = FastAPI(title="AI INTERVIEWER", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],)
-client = Client(account_sid, auth_token)
-executor = ThreadPoolExecutor(max_workers=10)
+app.add_middleware(LatencyMiddleware, registry=metrics)
+client = Client(account_sid, auth_token, http_client=create_http_client())
+call_control = AsyncCallControl(client)
+call_status_tracker = CallStatusTracker(remote_status=functools.partial(state_backend.run, state_backend.get_call_status) if state_backend.shared else None)
 def create_folders():
     folders = [
         "interviews/audio_recordings",
@@ -58,7 +95,21 @@ try:
     print("AWS clients initialized successfully")
 except Exception as e:
     print(f"Error initializing AWS clients: {e}")
-conversation_state = {}
+try:
+    prompt_audio = create_prompt_audio_cache(PROMPT_AUDIO, boto3.client(
+        'polly',
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+        region_name=AWS_REGION) if PROMPT_AUDIO == "polly" else None)
+except Exception as e:
+    print(f"Error initializing prompt audio, falling back to <Say>: {e}")
+    prompt_audio = None
+if INTERVIEW_MODE == "stream" and prompt_audio is None:
+    print("[STREAM] INTERVIEW_MODE=stream needs PROMPT_AUDIO (stub or polly) to speak over the stream; using Gather mode")
+    INTERVIEW_MODE = "gather"
+if INTERVIEW_MODE == "stream" and transcriber_unavailable(STREAM_TRANSCRIBER):
+    print(f"[STREAM] INTERVIEW_MODE=stream needs a real-time transcriber ({transcriber_unavailable(STREAM_TRANSCRIBER)}); using Gather mode")
+    INTERVIEW_MODE = "gather"
 INTERVIEW_QUESTIONS = {
     1: "Introduce yourself.",
     2: "What are your key skills for this role?",
@@ -67,27 +118,27 @@ INTERVIEW_QUESTIONS = {
     5: "What is your current notice period?",
     6: "What is your current CTC and expected salary?",
     7: "If selected, how soon can you join?"}
-def load_jd_skills():
-    """Load skills from job description JSON file"""
-    try:
-        config_files = ["current_jd.json", "config/job_description.json"]
-        for jd_file_path in config_files:
-            if os.path.exists(jd_file_path):
-                with open(jd_file_path, 'r') as f:
-                    jd_data = json.load(f)
-                skills = jd_data.get("required_skills", []) or jd_data.get("skills", []) or jd_data.get("technical_skills", [])
-                return skills if skills else ["python", "javascript", "react"]
-        return ["python", "javascript", "react"]
-    except Exception as e:
-        print(f"Error loading JD skills: {e}")
-        return ["python", "javascript", "react"]
+twiml_cache.configure(WEBHOOK_BASE_URL, INTERVIEW_QUESTIONS, prompt_audio)
+migrated_files = migrate_flat_files()
+if not interview_catalog.open(len(INTERVIEW_QUESTIONS)) and migrated_files:
+    interview_catalog.rebuild(scan_interview_files(total_questions=len(INTERVIEW_QUESTIONS)))
+gather_profiles = GatherTimeoutProfiles(interview_catalog, INTERVIEW_QUESTIONS)
+async def refresh_gather_timeouts():
+    """Re-learns the per-question Gather timeouts from finished interviews and re-renders the TwiML when they move"""
+    while True:
+        try:
+            if await storage.run_bulk(gather_profiles.refresh):
+                twiml_cache.configure(WEBHOOK_BASE_URL, INTERVIEW_QUESTIONS, prompt_audio, gather_profiles.profiles)
+        except Exception as e:
+            print(f"[ERROR] Gather timeout refresh failed: {e}")
+        await asyncio.sleep(GATHER_PROFILE_REFRESH_SECONDS)
+INTERVIEW_LIST_FIELDS = ("interview_id", "status", "questions_answered", "total_questions", "start_time", "end_time", "completion_time", "all_validations_passed", "termination_reason")
+INTERVIEW_PAGE_SIZE = 50
+INTERVIEW_PAGE_SIZE_MAX = 500
 def check_skills_match(transcript_text):
-    text_lower = transcript_text.lower()
-    jd_skills = load_jd_skills()
-    found_skills = []
-    for skill in jd_skills:
-        if skill.lower() in text_lower:
-            found_skills.append(skill)
+    matcher = jd_provider.matcher()
+    jd_skills = matcher.skills
+    found_skills, _ = matcher.match(transcript_text)
     match_percentage = (len(found_skills) / len(jd_skills)) * 100 if jd_skills else 0
     return match_percentage >= 50, found_skills, match_percentage
 def check_relocation_willingness(transcript_text):
@@ -136,188 +187,203 @@ def check_notice_period(transcript_text):
     return total_days <= 30, total_days, "specified"
 def save_interview_session(call_sid: str, data: dict):
     try:
-        filename = f"interviews/session_{call_sid}.json"
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
+        session_journal.start(call_sid, data)
+        index_interview(data, "session", session_journal.path(call_sid))
+        state_backend.start_live_session(call_sid, {"phone_number": data.get("phone_number"), "start_time": data.get("start_time"), "pid": os.getpid()})
     except Exception as e:
         print(f"Error saving session {call_sid}: {e}")
+def open_session(call_sid: str, session_ctx=None):
+    return session_ctx if session_ctx is not None else SessionContext(call_sid)
 def load_interview_session(call_sid: str):
     try:
-        filename = f"interviews/session_{call_sid}.json"
-        if os.path.exists(filename):
-            with open(filename, 'r') as f:
-                return json.load(f)
-        return None
+        return session_journal.read(call_sid)
     except Exception as e:
         print(f"Error loading session {call_sid}: {e}")
         return None
-def handle_speech(call_sid: str, speech_result: str, confidence: float):
+def index_interview(interview_data: dict, kind: str, path: Optional[str] = None):
+    interview_catalog.upsert(build_catalog_row(interview_data, kind, path, len(INTERVIEW_QUESTIONS)))
+def catalog_summary(row: dict):
+    summary = {key: row[key] for key in INTERVIEW_LIST_FIELDS}
+    if row["kind"] == "session":
+        session_data = load_interview_session(row["interview_id"])
+        if session_data:
+            summary["status"] = session_data.get("status", "IN_PROGRESS")
+            summary["questions_answered"] = len(session_data.get("responses", []))
+            summary["end_time"] = session_data.get("end_time", "")
+            summary["all_validations_passed"] = all(v.get('passed', True) for v in session_data.get('validation_results', {}).values())
+            summary["termination_reason"] = session_data.get("termination_reason", None)
+    return summary
+def encode_interview_cursor(row: dict):
+    return base64.urlsafe_b64encode(json.dumps([row["start_time"] or "", row["interview_id"]]).encode()).decode()
+def decode_interview_cursor(cursor: str):
+    """Raises ValueError for anything encode_interview_cursor could not have produced"""
     try:
-        print(f"[SPEECH] Call {call_sid}: '{speech_result}'")       
-        if not speech_result or speech_result.strip() == "":
-            print(f"[SPEECH ERROR] Empty transcription for {call_sid}")
-            return handle_no_response(call_sid)        
-        interview_data = load_interview_session(call_sid)
-        if not interview_data:
-            print(f"[ERROR] No interview session found for {call_sid}")
-            return handle_error("Interview session not found")       
-        current_question_index = interview_data.get('current_question', 1)
-        questions = INTERVIEW_QUESTIONS     
-        response_data = {
-            'question': questions[current_question_index],
-            'answer': speech_result,
-            'confidence': confidence,
-            'timestamp': datetime.now().isoformat(),
-            'question_number': current_question_index
-        }     
-        interview_data['responses'].append(response_data)
-        interview_data['current_question'] = current_question_index + 1
-        interview_data['last_activity'] = datetime.now().isoformat()
-        interview_data['silence_prompts'] = 0       
-        save_interview_session(call_sid, interview_data)      
-        print(f"[PROGRESS] Call {call_sid}: Question {current_question_index}/{len(questions)} completed")
-        if current_question_index in [2, 3, 4, 5]:
-            should_continue, reason_code, reason_message = validate_response_selected_questions(call_sid, current_question_index, speech_result)
-            print(f"Validation Q{current_question_index}: {'PASS' if should_continue else 'FAIL'} - {reason_message}")          
-            if not should_continue:
-                return terminate_interview(call_sid, reason_code, reason_message)
-        if current_question_index >= len(questions):
-            print(f"[INTERVIEW COMPLETE] All {len(questions)} questions answered for {call_sid}")
-            return complete_interview(call_sid)
-        else:
-            next_question_index = current_question_index + 1
-            print(f"[NEXT] Moving to question {next_question_index} for {call_sid}")
-            return ask_next_question_immediately(call_sid, next_question_index)      
+        decoded = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, binascii.Error, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(decoded, list) or len(decoded) != 2 or not all(isinstance(value, str) for value in decoded):
+        raise ValueError("Invalid cursor")
+    start_time, interview_id = decoded
+    return start_time, interview_id
+def load_interview_responses(row: dict):
+    if row["kind"] == "session":
+        session_data = load_interview_session(row["interview_id"])
+        return session_data.get("responses", []) if session_data else []
+    try:
+        with open(row["path"], 'r') as f:
+            return json.load(f).get("responses", [])
+    except Exception as e:
+        print(f"Error loading responses for {row['interview_id']}: {e}")
+        return []
+def list_interview_page(kinds, limit, cursor, status, start_from, start_to, fields):
+    requested_fields = [field.strip() for field in fields.split(",") if field.strip()] if fields else list(INTERVIEW_LIST_FIELDS)
+    unknown_fields = [field for field in requested_fields if field not in INTERVIEW_LIST_FIELDS and field != "responses"]
+    if unknown_fields:
+        return {"error": f"Unknown fields: {', '.join(unknown_fields)}", "interviews": []}
+    if "interview_id" not in requested_fields:
+        requested_fields.insert(0, "interview_id")
+    statuses = [value.strip().upper() for value in status.split(",") if value.strip()] if status else None
+    if start_to and len(start_to) == 10:
+        start_to = f"{start_to}T23:59:59.999999"
+    try:
+        after = decode_interview_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return {"error": str(e), "interviews": []}
+    limit = max(1, min(limit, INTERVIEW_PAGE_SIZE_MAX))
+    rows, has_more = interview_catalog.page(kinds, statuses, start_from, start_to, after, limit)
+    interviews = []
+    for row in rows:
+        summary = catalog_summary(row)
+        if "responses" in requested_fields:
+            summary["responses"] = load_interview_responses(row)
+        interviews.append({field: summary[field] for field in requested_fields})
+    return {
+        "interviews": interviews,
+        "count": len(interviews),
+        "next_cursor": encode_interview_cursor(rows[-1]) if has_more else None}
+def handle_speech(call_sid: str, speech_result: str, confidence: float, session_ctx=None):
+    try:
+        with open_session(call_sid, session_ctx) as session_ctx:
+            print(f"[SPEECH] Call {call_sid}: '{speech_result}'")       
+            if not speech_result or speech_result.strip() == "":
+                print(f"[SPEECH ERROR] Empty transcription for {call_sid}")
+                return handle_no_response(call_sid, session_ctx)        
+            interview_data = session_ctx.session
+            if not interview_data:
+                print(f"[ERROR] No interview session found for {call_sid}")
+                return handle_error("Interview session not found")       
+            current_question_index = interview_data.get('current_question', 1)
+            questions = INTERVIEW_QUESTIONS     
+            response_data = {
+                'question': questions[current_question_index],
+                'answer': speech_result,
+                'confidence': confidence,
+                'timestamp': datetime.now().isoformat(),
+                'question_number': current_question_index,
+                'speech_timeout': twiml_cache.timeouts_for(current_question_index).speech_timeout if INTERVIEW_MODE == "gather" else VAD_END_OF_TURN_MS / 1000
+            }     
+            session_ctx.record(
+                {"type": "response_appended", "response": response_data},
+                {"type": "question_advanced", "current_question": current_question_index + 1},
+                {"type": "session_updated", "fields": {"last_activity": datetime.now().isoformat(), "silence_prompts": 0}})      
+            print(f"[PROGRESS] Call {call_sid}: Question {current_question_index}/{len(questions)} completed")
+            if current_question_index in [2, 3, 4, 5]:
+                should_continue, reason_code, reason_message = validate_response_selected_questions(call_sid, current_question_index, speech_result, session_ctx)
+                call_timeline.stage(call_sid, "validated")
+                print(f"Validation Q{current_question_index}: {'PASS' if should_continue else 'FAIL'} - {reason_message}")          
+                if not should_continue:
+                    return terminate_interview(call_sid, reason_code, reason_message, session_ctx)
+            if current_question_index >= len(questions):
+                print(f"[INTERVIEW COMPLETE] All {len(questions)} questions answered for {call_sid}")
+                return complete_interview(call_sid, session_ctx)
+            else:
+                next_question_index = current_question_index + 1
+                print(f"[NEXT] Moving to question {next_question_index} for {call_sid}")
+                return ask_next_question_immediately(call_sid, next_question_index, session_ctx)      
     except Exception as e:
         print(f"[ERROR] Error handling speech for {call_sid}: {e}")
         return handle_error("Sorry, there was an error processing your response.")
-def validate_response_instantly(call_sid: str, step: int, transcription: str):
+def validate_response_instantly(call_sid: str, step: int, transcription: str, session_ctx=None):
     try:
-        interview_data = load_interview_session(call_sid)
-        if not interview_data:
-            return True, "continue", "No state found"      
-        validation_result = {"step": step, "passed": True, "reason": ""}
-        if step == 2:
-            skills_match, found_skills, match_percentage = check_skills_match(transcription)
-            validation_result["skills_match"] = skills_match
-            validation_result["found_skills"] = found_skills
-            validation_result["match_percentage"] = match_percentage
-            if not skills_match:
-                validation_result["passed"] = False
-                validation_result["reason"] = f"Insufficient skills match ({match_percentage:.1f}%)"
-                interview_data["validation_results"][step] = validation_result
-                save_interview_session(call_sid, interview_data)
-                return False, "skills_mismatch", f"Skills match only {match_percentage:.1f}%"      
-        elif step == 3:
-            relocation_ok, sentiment = check_relocation_willingness(transcription)
-            validation_result["relocation_willing"] = relocation_ok
-            validation_result["sentiment"] = sentiment
-            if not relocation_ok:
-                validation_result["passed"] = False
-                validation_result["reason"] = "Not willing to relocate"
-                interview_data["validation_results"][step] = validation_result
-                save_interview_session(call_sid, interview_data)
-                return False, "relocation_issue", "Not open to relocation"     
-        elif step == 4:
-            onsite_ok, sentiment = check_onsite_availability(transcription)
-            validation_result["onsite_available"] = onsite_ok
-            validation_result["sentiment"] = sentiment
-            if not onsite_ok:
-                validation_result["passed"] = False
-                validation_result["reason"] = "Cannot attend onsite interview"
-                interview_data["validation_results"][step] = validation_result
-                save_interview_session(call_sid, interview_data)
-                return False, "onsite_unavailable", "Cannot attend onsite interview"      
-        elif step == 5:
-            notice_ok, days, notice_type = check_notice_period(transcription)
-            validation_result["notice_acceptable"] = notice_ok
-            validation_result["notice_days"] = days
-            validation_result["notice_type"] = notice_type
-            if not notice_ok:
-                validation_result["passed"] = False
-                validation_result["reason"] = f"Notice period too long ({days} days)"
-                interview_data["validation_results"][step] = validation_result
-                save_interview_session(call_sid, interview_data)
-                return False, "notice_too_long", f"Notice period {days} days exceeds 30 days"
-        if "validation_results" not in interview_data:
-            interview_data["validation_results"] = {}
-        interview_data["validation_results"][step] = validation_result
-        save_interview_session(call_sid, interview_data)      
-        return True, "continue", "Validation passed"      
+        with open_session(call_sid, session_ctx) as session_ctx:
+            interview_data = session_ctx.session
+            if not interview_data:
+                return True, "continue", "No state found"      
+            validation_result = {"step": step, "passed": True, "reason": ""}
+            if step == 2:
+                skills_match, found_skills, match_percentage = check_skills_match(transcription)
+                validation_result["skills_match"] = skills_match
+                validation_result["found_skills"] = found_skills
+                validation_result["match_percentage"] = match_percentage
+                if not skills_match:
+                    validation_result["passed"] = False
+                    validation_result["reason"] = f"Insufficient skills match ({match_percentage:.1f}%)"
+                    session_ctx.record({"type": "validation_recorded", "step": step, "result": validation_result})
+                    return False, "skills_mismatch", f"Skills match only {match_percentage:.1f}%"      
+            elif step == 3:
+                relocation_ok, sentiment = check_relocation_willingness(transcription)
+                validation_result["relocation_willing"] = relocation_ok
+                validation_result["sentiment"] = sentiment
+                if not relocation_ok:
+                    validation_result["passed"] = False
+                    validation_result["reason"] = "Not willing to relocate"
+                    session_ctx.record({"type": "validation_recorded", "step": step, "result": validation_result})
+                    return False, "relocation_issue", "Not open to relocation"     
+            elif step == 4:
+                onsite_ok, sentiment = check_onsite_availability(transcription)
+                validation_result["onsite_available"] = onsite_ok
+                validation_result["sentiment"] = sentiment
+                if not onsite_ok:
+                    validation_result["passed"] = False
+                    validation_result["reason"] = "Cannot attend onsite interview"
+                    session_ctx.record({"type": "validation_recorded", "step": step, "result": validation_result})
+                    return False, "onsite_unavailable", "Cannot attend onsite interview"      
+            elif step == 5:
+                notice_ok, days, notice_type = check_notice_period(transcription)
+                validation_result["notice_acceptable"] = notice_ok
+                validation_result["notice_days"] = days
+                validation_result["notice_type"] = notice_type
+                if not notice_ok:
+                    validation_result["passed"] = False
+                    validation_result["reason"] = f"Notice period too long ({days} days)"
+                    session_ctx.record({"type": "validation_recorded", "step": step, "result": validation_result})
+                    return False, "notice_too_long", f"Notice period {days} days exceeds 30 days"
+            session_ctx.record({"type": "validation_recorded", "step": step, "result": validation_result})      
+            return True, "continue", "Validation passed"      
     except Exception as e:
         print(f"[ERROR] Validation error for {call_sid}, step {step}: {e}")
         return True, "continue", "Validation error - continuing"
-def ask_next_question_immediately(call_sid: str, question_index: int):
+def ask_next_question_immediately(call_sid: str, question_index: int, session_ctx=None):
     try:
         if question_index > len(INTERVIEW_QUESTIONS):
-            return complete_interview(call_sid)      
-        question = INTERVIEW_QUESTIONS[question_index]     
-        resp = VoiceResponse()
-        
-        if question_index > 1:
-            resp.say("Next question:", voice='Polly.Amy', rate='medium')
-            resp.pause(length=0.2)  # Reduced from 0.3
-        
-        resp.say(question, voice='Polly.Amy', rate='medium')
-        
-        gather = resp.gather(
-            input='speech',
-            action=f'{WEBHOOK_BASE_URL}/voice/speech/{call_sid}',
-            method='POST',
-            speechTimeout='8',  # Reduced from 10
-            timeout='4',        # Reduced from 5
-            language='en-US')
-        resp.redirect(f'{WEBHOOK_BASE_URL}/voice/no-response/{call_sid}')      
-        
-        return str(resp)      
+            return complete_interview(call_sid, session_ctx)      
+        return twiml_cache.question(call_sid, question_index)
     except Exception as e:
         print(f"[ERROR] Error asking question {question_index} for {call_sid}: {e}")
         return handle_error("Sorry, there was an error with the question.")
-def handle_no_response(call_sid: str):
+def handle_no_response(call_sid: str, session_ctx=None):
     try:
-        interview_data = load_interview_session(call_sid)
-        if not interview_data:
-            return handle_error("Interview session not found")       
-        
-        silence_prompts = interview_data.get('silence_prompts', 0)
-        current_question_index = interview_data.get('current_question', 1)        
-        
-        if silence_prompts >= 1:
-            resp = VoiceResponse()
-            resp.say("Thank you for your time. We'll be in touch soon.", voice='Polly.Amy')
-            resp.hangup()           
-            
-            interview_data['status'] = 'INCOMPLETE_SILENCE'
-            interview_data['end_time'] = datetime.now().isoformat()
-            save_interview_session(call_sid, interview_data)          
-            
-            return str(resp)
-        
-        interview_data['silence_prompts'] = silence_prompts + 1
-        save_interview_session(call_sid, interview_data)      
-        
-        resp = VoiceResponse()
-        resp.say("Please respond to the question.", voice='Polly.Amy', rate='medium')
+        with open_session(call_sid, session_ctx) as session_ctx:
+            interview_data = session_ctx.session
+            if not interview_data:
+                return handle_error("Interview session not found")       
         
-        if current_question_index <= len(INTERVIEW_QUESTIONS):
-            resp.pause(length=0.3)  # Reduced from 0.5
-            resp.say(INTERVIEW_QUESTIONS[current_question_index], voice='Polly.Amy', rate='medium')
-            
-            gather = resp.gather(
-                input='speech',
-                action=f'{WEBHOOK_BASE_URL}/voice/speech/{call_sid}',
-                method='POST',
-                speechTimeout='6',  # Reduced from 8
-                timeout='3',        # Reduced from 4
-                language='en-US'
-            )           
-            resp.redirect(f'{WEBHOOK_BASE_URL}/voice/no-response/{call_sid}')        
+            silence_prompts = interview_data.get('silence_prompts', 0)
+            current_question_index = interview_data.get('current_question', 1)        
         
-        return str(resp)      
-    except Exception as e:
+            if silence_prompts >= 1:
+                session_ctx.record({"type": "session_updated", "fields": {"status": "INCOMPLETE_SILENCE", "end_time": datetime.now().isoformat()}})
+                index_interview(session_ctx.session, "session", session_journal.path(call_sid))
+                session_ctx.release()
+                state_backend.end_live_session(call_sid)
+                return twiml_cache.silence_hangup()
+            session_ctx.record({"type": "session_updated", "fields": {"silence_prompts": silence_prompts + 1}})      
+            return twiml_cache.reprompt(call_sid, current_question_index)
+    except Exception:
         return handle_error("Technical difficulty occurred.")
 @app.post("/voice")
 async def voice_response(request: Request):
+    call_sid = None
     try:
         form_data = await request.form()
         call_sid = form_data.get("CallSid")
@@ -335,39 +401,31 @@ async def voice_response(request: Request):
             "phone_number": caller_phone,  # Store the caller's phone number
             "twilio_number": called_phone  # Store our Twilio number
         }
-        save_interview_session(call_sid, interview_data)    
-        
-        resp = VoiceResponse()
-        resp.pause(length=0.3)  # Reduced from 0.5
-        resp.say("Hello! I'm your AI interviewer from Onelab Ventures.", voice='Polly.Amy', rate='medium')
-        resp.pause(length=0.2)  # Reduced from 0.5
-        resp.say("Let's begin.", voice='Polly.Amy', rate='medium')
-        resp.pause(length=0.2)  # Reduced from 0.3
-        resp.say(INTERVIEW_QUESTIONS[1], voice='Polly.Amy', rate='medium')
-        
-        gather = resp.gather(
-            input='speech',
-            action=f'{WEBHOOK_BASE_URL}/voice/speech/{call_sid}',
-            method='POST',
-            speechTimeout='8',  # Reduced from 10
-            timeout='4',        # Reduced from 5
-            language='en-US')
-        resp.redirect(f'{WEBHOOK_BASE_URL}/voice/no-response/{call_sid}')
-        
-        return Response(str(resp), media_type="application/xml")      
+        call_timeline.begin(call_sid, "voice")
+        await storage.run_call(save_interview_session, call_sid, interview_data)
+        call_timeline.stage(call_sid, "session_saved")
+        if INTERVIEW_MODE == "stream":
+            return Response(twiml_cache.stream_connect(call_sid), media_type="application/xml")
+        return Response(twiml_cache.opening(call_sid), media_type="application/xml")      
     except Exception as e:
         print(f"[ERROR] Voice response error: {e}")
         return Response(handle_error("Sorry, there was an error starting the interview."), media_type="application/xml")
-@app.post("/voice/speech/{call_sid}")
-async def speech_handler(call_sid: str, request: Request):
-    try:
-        form_data = await request.form()
-        speech_result = form_data.get('SpeechResult', '').strip()
-        confidence = float(form_data.get('Confidence', 0.0))
-        print(f"[SPEECH HANDLER] Call {call_sid}: '{speech_result}' (confidence: {confidence})")
+    finally:
+        call_timeline.finish(call_sid)
+def process_speech(call_sid: str, speech_result: str, confidence: float, question_number: Optional[int] = None):
+    call_timeline.stage(call_sid, "dispatched")
+    with SessionContext(call_sid) as session_ctx:
+        call_timeline.stage(call_sid, "session_loaded")
+        if question_number is not None and session_ctx.session:
+            current_question_index = session_ctx.session.get('current_question', 1)
+            if current_question_index != question_number:
+                print(f"[DUPLICATE] Call {call_sid}: answer for question {question_number} already handled, now on {current_question_index}")
+                if current_question_index > len(INTERVIEW_QUESTIONS):
+                    return twiml_cache.completion()
+                return twiml_cache.question(call_sid, current_question_index)
         if speech_result.lower() in ['skip', 'next', 'pass', 'move on', 'next question']:
             print(f"[SKIP] User requested to skip question for {call_sid}")
-            interview_data = load_interview_session(call_sid)
+            interview_data = session_ctx.session
             if interview_data:
                 current_question_index = interview_data.get('current_question', 1)
                 response_data = {
@@ -377,68 +435,124 @@ async def speech_handler(call_sid: str, request: Request):
                     'timestamp': datetime.now().isoformat(),
                     'question_number': current_question_index
                 }              
-                interview_data['responses'].append(response_data)
-                interview_data['current_question'] = current_question_index + 1
-                interview_data['silence_prompts'] = 0
-                save_interview_session(call_sid, interview_data)
+                session_ctx.record(
+                    {"type": "response_appended", "response": response_data},
+                    {"type": "question_advanced", "current_question": current_question_index + 1},
+                    {"type": "session_updated", "fields": {"silence_prompts": 0}})
                 if current_question_index >= len(INTERVIEW_QUESTIONS):
-                    return Response(complete_interview(call_sid), media_type="application/xml")
+                    return complete_interview(call_sid, session_ctx)
                 else:
-                    return Response(ask_next_question_immediately(call_sid, current_question_index + 1), media_type="application/xml")
-        return Response(handle_speech(call_sid, speech_result, confidence), media_type="application/xml")     
+                    return ask_next_question_immediately(call_sid, current_question_index + 1, session_ctx)
+        return handle_speech(call_sid, speech_result, confidence, session_ctx)     
+@app.post("/voice/speech/{call_sid}")
+async def speech_handler(call_sid: str, request: Request, q: Optional[int] = None, attempt: int = 1):
+    call_timeline.begin(call_sid, "speech", q)
+    try:
+        form_data = await request.form()
+        speech_result = form_data.get('SpeechResult', '').strip()
+        confidence = float(form_data.get('Confidence', 0.0))
+        call_timeline.stage(call_sid, "form_parsed")
+        print(f"[SPEECH HANDLER] Call {call_sid}: '{speech_result}' (confidence: {confidence})")
+        replay_key = ("speech", call_sid, q, attempt) if q is not None else ("speech", call_sid, request.headers.get("X-Twilio-Signature"), speech_result)
+        if replay_key[2] is None:
+            twiml = await storage.run_call(process_speech, call_sid, speech_result, confidence)
+        else:
+            twiml = await speech_replay_cache.run(replay_key, functools.partial(storage.run_call, process_speech, call_sid, speech_result, confidence, q))
+        call_timeline.stage(call_sid, "processed")
+        return Response(twiml, media_type="application/xml")
     except Exception as e:
         print(f"[ERROR] Speech handler error for {call_sid}: {e}")
         return Response(handle_error("Sorry, there was an error processing your response."), media_type="application/xml")
-def complete_interview(call_sid):
+    finally:
+        call_timeline.finish(call_sid)
+@app.post("/voice/no-response/{call_sid}")
+async def no_response_handler(call_sid: str, q: Optional[int] = None, attempt: int = 1):
+    """Twilio follows the <Redirect> after a Gather hears nothing: reprompt once, then hang up. A retried
+    redirect for the same question and attempt gets the first reply instead of counting another silence"""
+    call_timeline.begin(call_sid, "no_response", q)
+    try:
+        if q is None:
+            twiml = await storage.run_call(handle_no_response, call_sid)
+        else:
+            twiml = await speech_replay_cache.run(("no_response", call_sid, q, attempt), functools.partial(storage.run_call, handle_no_response, call_sid))
+        call_timeline.stage(call_sid, "processed")
+        return Response(twiml, media_type="application/xml")
+    except Exception as e:
+        print(f"[ERROR] No-response handler error for {call_sid}: {e}")
+        return Response(handle_error("Sorry, there was an error processing your response."), media_type="application/xml")
+    finally:
+        call_timeline.finish(call_sid)
+@app.websocket("/media-stream/{call_sid}")
+async def media_stream(websocket: WebSocket, call_sid: str):
+    """Twilio Media Stream for INTERVIEW_MODE=stream; answers go through process_speech like Gather results"""
+    session = MediaStreamSession(
+        websocket,
+        call_sid,
+        prompt_audio,
+        opening=lambda: twiml_cache.opening(call_sid),
+        answer=lambda question_number, text, confidence: storage.run_call(process_speech, call_sid, text, confidence, question_number),
+        no_answer=lambda: storage.run_call(process_speech, call_sid, "", 0.0),
+        transcriber_factory=lambda parameters: create_transcriber(parameters, region=AWS_REGION),
+        timeline=call_timeline)
+    await session.run()
+@app.get("/prompts/{filename}")
+async def get_prompt_audio(filename: str, request: Request):
+    """Pre-synthesized prompt audio for <Play>. Names are content hashes, so Twilio may cache them forever"""
+    path = prompt_audio.path_for(filename) if prompt_audio is not None else None
+    if path is None:
+        return Response(status_code=404)
+    etag = f'"{filename.split(".")[0]}"'
+    headers = {"ETag": etag, "Cache-Control": PROMPT_AUDIO_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=prompt_audio.backend.media_type, headers=headers)
+def complete_interview(call_sid, session_ctx=None):
     """Complete the interview and save results"""
     try:
-        print(f"[DEBUG] Completing interview for {call_sid}")
+        with open_session(call_sid, session_ctx) as session_ctx:
+            print(f"[DEBUG] Completing interview for {call_sid}")
         
-        # Load from session file instead of conversation_state
-        interview_data = load_interview_session(call_sid)
+            # Load from the session journal
+            interview_data = session_ctx.session
         
-        if not interview_data:
-            print(f"[ERROR] No interview session found for {call_sid}")
-            # Create minimal data if session not found
-            interview_data = {
-                "interview_id": call_sid,
-                "responses": [],
-                "status": "COMPLETED",
-                "start_time": datetime.now().isoformat(),
-                "phone_number": "unknown",
-                "twilio_number": "+14067601762"
-            }
-        responses = interview_data.get("responses", [])
-        print(f"[DEBUG] Found {len(responses)} responses for {call_sid}")
-        interview_data["status"] = "COMPLETED"
-        interview_data["end_time"] = datetime.now().isoformat()
-        interview_data["completion_time"] = datetime.now().isoformat()
-        if "phone_number" not in interview_data:
-            interview_data["phone_number"] = "unknown"
-        if "twilio_number" not in interview_data:
-            interview_data["twilio_number"] = "+14067601762"
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"interviews/{call_sid}_COMPLETED_{timestamp}.json"
-        os.makedirs("interviews", exist_ok=True)
-        with open(filename, 'w') as f:
-            json.dump(interview_data, f, indent=2)
-        print(f"[COMPLETED] Interview {call_sid} saved to {filename}")
-        try:
-            executor.submit(run_jd_analysis)
-        except Exception as e:
-            print(f"[ERROR] Failed to run analysis: {e}")
-        try:
-            session_file = f"interviews/session_{call_sid}.json"
-            if os.path.exists(session_file):
-                os.remove(session_file)
-                print(f"[CLEANUP] Removed session file for {call_sid}")
-        except Exception as e:
-            print(f"[ERROR] Failed to cleanup session file: {e}")
-        conversation_state.pop(call_sid, None)
-        response = VoiceResponse()
-        response.say("Thank you for your time! Your interview has been completed successfully. We will review your responses and get back to you soon. Have a great day!")
-        response.hangup()
-        return str(response)
+            if not interview_data:
+                print(f"[ERROR] No interview session found for {call_sid}")
+                # Create minimal data if session not found
+                interview_data = {
+                    "interview_id": call_sid,
+                    "responses": [],
+                    "status": "COMPLETED",
+                    "start_time": datetime.now().isoformat(),
+                    "phone_number": "unknown",
+                    "twilio_number": "+14067601762"
+                }
+            interview_data = dict(interview_data)
+            responses = interview_data.get("responses", [])
+            print(f"[DEBUG] Found {len(responses)} responses for {call_sid}")
+            interview_data["status"] = "COMPLETED"
+            interview_data["end_time"] = datetime.now().isoformat()
+            interview_data["completion_time"] = datetime.now().isoformat()
+            if "phone_number" not in interview_data:
+                interview_data["phone_number"] = "unknown"
+            if "twilio_number" not in interview_data:
+                interview_data["twilio_number"] = "+14067601762"
+            filename = ensure_parent(interview_path(call_sid, "completed"))
+            with open(filename, 'w') as f:
+                json.dump(interview_data, f, indent=2)
+            print(f"[COMPLETED] Interview {call_sid} saved to {filename}")
+            index_interview(interview_data, "completed", filename)
+            try:
+                job_id = analysis_queue.submit(("interview", call_sid), analyze_completed_interview, filename)
+                print(f"[ANALYSIS] Queued JD analysis job {job_id} for {call_sid}")
+            except Exception as e:
+                print(f"[ERROR] Failed to queue analysis: {e}")
+            try:
+                session_ctx.close()
+                print(f"[CLEANUP] Removed session journal for {call_sid}")
+            except Exception as e:
+                print(f"[ERROR] Failed to cleanup session journal: {e}")
+            state_backend.end_live_session(call_sid)
+            return twiml_cache.completion()
     except Exception as e:
         print(f"[ERROR] Error completing interview for {call_sid}: {e}")
         response = VoiceResponse()
@@ -472,11 +586,11 @@ def save_completed_interview(call_sid, responses):
             "completion_time": datetime.now().isoformat(),
             "status": "COMPLETED"
         }
-        os.makedirs("interviews", exist_ok=True)
-        filename = f"interviews/{call_sid}_COMPLETED_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        filename = ensure_parent(interview_path(call_sid, "completed"))
         with open(filename, 'w') as f:
             json.dump(interview_data, f, indent=2)
         print(f"[SAVED] Interview {call_sid} completed and saved to {filename}")
+        index_interview(interview_data, "completed", filename)
         return filename
     except Exception as e:
         print(f"[ERROR] Failed to save completed interview {call_sid}: {e}")
@@ -498,68 +612,46 @@ def save_incomplete_interview(call_sid: str, interview_data: dict, termination_r
             "start_time": interview_data.get("start_time", ""),
             "end_time": datetime.now().isoformat(),
             "interview_type": "Terminated Interview - Validation Failed"}      
-        summary_filename = f"interviews/{call_sid}_ONELAB_TERMINATED_{timestamp}.json"
+        summary_filename = ensure_parent(interview_path(call_sid, "terminated"))
         with open(summary_filename, 'w') as f:
             json.dump(summary, f, indent=2)       
         print(f"Saved terminated interview: {summary_filename}")      
+        index_interview(summary, "terminated", summary_filename)
+        return summary_filename
     except Exception as e:
         print(f"Error saving terminated interview: {e}")
+        return None
 @app.get("/interviews")
-async def get_interviews():
+async def get_interviews(limit: int = INTERVIEW_PAGE_SIZE, cursor: Optional[str] = None, status: Optional[str] = None, start_from: Optional[str] = None, start_to: Optional[str] = None, fields: Optional[str] = None):
     try:
-        interviews = []
-        pattern = "interviews/*_ONELAB_*.json"
-        files = glob.glob(pattern)     
-        for file_path in files:
-            try:
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                    interviews.append({
-                        "interview_id": data.get("interview_id", "unknown"),
-                        "status": data.get("status", "unknown"),
-                        "questions_answered": data.get("questions_answered", 0),
-                        "total_questions": data.get("total_questions", 7),
-                        "completion_time": data.get("completion_time", ""),
-                        "all_validations_passed": data.get("all_validations_passed", False),
-                        "termination_reason": data.get("termination_reason", None),
-                        "responses": data.get("responses", [])
-                    })
-            except Exception as e:
-                print(f"Error loading interview file {file_path}: {e}")
-                continue   
-        for call_sid in list(conversation_state.keys()):
-            session_data = load_interview_session(call_sid)
-            if session_data:
-                interviews.append({
-                    "interview_id": call_sid,
-                    "status": session_data.get("status", "IN_PROGRESS"),
-                    "questions_answered": len(session_data.get("responses", [])),
-                    "total_questions": len(INTERVIEW_QUESTIONS),
-                    "completion_time": session_data.get("start_time", ""),
-                    "all_validations_passed": all(v.get('passed', True) for v in session_data.get('validation_results', {}).values()),
-                    "termination_reason": None,
-                    "responses": session_data.get("responses", [])
-                })    
-        interviews.sort(key=lambda x: x["completion_time"], reverse=True)
-        return {"interviews": interviews}       
+        return await storage.run_bulk(list_interview_page, ["terminated"], limit, cursor, status, start_from, start_to, fields)
     except Exception as e:
         return {"error": str(e), "interviews": []}
 @app.post("/run-jd-analysis")
 async def run_jd_analysis_endpoint():
     try:
-        report = run_jd_analysis()
-        return report
+        job_id = await storage.run_call(analysis_queue.submit, ("all", None), analyze_all_completed_interviews)
+        return {"success": True, "job_id": job_id, "status": (await storage.run_call(analysis_queue.get, job_id))["status"]}
+    except Exception as e:
+        return {"error": str(e)}
+@app.get("/bulk-summary")
+async def get_bulk_summary():
+    try:
+        return await storage.run_bulk(bulk_summary.snapshot)
     except Exception as e:
         return {"error": str(e)}
+@app.get("/jd-analysis-jobs/{job_id}")
+async def get_jd_analysis_job(job_id: str):
+    job = await storage.run_call(analysis_queue.get, job_id)
+    if not job:
+        return {"error": "JD analysis job not found"}
+    return job
 @app.get("/jd-report/{call_id}")
 async def get_jd_report(call_id: str):
     try:
-        pattern = f"interviews/*{call_id}*JD_*ANALYSIS*.json"
-        files = glob.glob(pattern)      
-        if files:
-            latest_file = max(files, key=os.path.getmtime)
-            with open(latest_file, 'r') as f:
-                return json.load(f)
+        report = await storage.read_json(interview_path(call_id, "analysis"))
+        if report is not None:
+            return report
         else:
             return {"error": "JD report not found"}        
     except Exception as e:
@@ -581,10 +673,8 @@ async def test_aws_services():
 @app.get("/job-description")
 async def get_job_description():
     try:
-        try:
-            from summary import load_job_description
-            jd_config = load_job_description()
-        except:
+        jd_config = await storage.run_call(jd_provider.get)
+        if jd_config is None:
             jd_config = {
                 "title": "Software Developer",
                 "company": "Onelab Ventures",
@@ -626,16 +716,10 @@ async def update_job_description(request: Request):
             "required_skills": skills_list,
             "experience_required": jd_data.get("experience_required", "2-5 years")}  
         try:
-            with open("current_jd.json", "w") as f:
-                json.dump(jd_config, f, indent=2)
+            await storage.run_bulk(jd_provider.update, jd_config)
             print("JD saved successfully")
         except Exception as save_error:
             print(f"Error saving JD: {save_error}")
-        try:
-            from summary import save_job_description
-            save_job_description(jd_config)
-        except Exception as summary_error:
-            print(f"Summary.py update failed: {summary_error}")
         return {
             "success": True,
             "message": "Job Description updated successfully",
@@ -644,150 +728,84 @@ async def update_job_description(request: Request):
         print(f"JD Update Error: {e}")
         return {"success": False, "error": str(e)}
 @app.get("/all-interviews")
-async def get_all_interviews():
+async def get_all_interviews(limit: int = INTERVIEW_PAGE_SIZE, cursor: Optional[str] = None, status: Optional[str] = None, start_from: Optional[str] = None, start_to: Optional[str] = None, fields: Optional[str] = None):
     try:
-        all_interviews = []
-        interview_folder = "interviews"
-        if os.path.exists(interview_folder):
-            json_files = glob.glob(f"{interview_folder}/*.json")
-            for file_path in json_files:
-                if "session_" in file_path:
-                    continue   
-                try:
-                    with open(file_path, 'r') as f:
-                        interview_data = json.load(f)
-                    filename = os.path.basename(file_path)
-                    interview_id = interview_data.get("interview_id", filename.split('_')[0])
-                    responses = interview_data.get("responses", [])
-                    interview_summary = {
-                        "interview_id": interview_id,
-                        "status": interview_data.get("status", "COMPLETED"),
-                        "questions_answered": len(responses),
-                        "total_questions": interview_data.get("total_questions", 7),
-                        "start_time": interview_data.get("start_time", ""),
-                        "end_time": interview_data.get("end_time", ""),
-                        "completion_time": interview_data.get("completion_time", ""),
-                        "all_validations_passed": interview_data.get("all_validations_passed", False),
-                        "termination_reason": interview_data.get("termination_reason", None),
-                        "responses": responses}
-                    all_interviews.append(interview_summary)
-                except Exception as e:
-                    print(f"Error reading {file_path}: {e}")
-                    continue
-        session_files = glob.glob("interviews/session_*.json")
-        for session_file in session_files:
-            try:
-                call_sid = os.path.basename(session_file).replace("session_", "").replace(".json", "")
-                session_data = load_interview_session(call_sid)               
-                if session_data:
-                    exists_in_files = any(interview["interview_id"] == call_sid for interview in all_interviews)   
-                    if not exists_in_files:
-                        interview_summary = {
-                            "interview_id": call_sid,
-                            "status": session_data.get("status", "IN_PROGRESS"),
-                            "questions_answered": len(session_data.get("responses", [])),
-                            "total_questions": len(INTERVIEW_QUESTIONS),
-                            "start_time": session_data.get("start_time", ""),
-                            "end_time": session_data.get("end_time", ""),
-                            "completion_time": session_data.get("start_time", ""),
-                            "all_validations_passed": all(v.get('passed', True) for v in session_data.get('validation_results', {}).values()),
-                            "termination_reason": session_data.get("termination_reason", None),
-                            "responses": session_data.get("responses", [])}                      
-                        all_interviews.append(interview_summary)
-            except Exception as e:
-                print(f"Error reading session {session_file}: {e}")
-                continue      
-        all_interviews.sort(key=lambda x: x.get("start_time", ""), reverse=True)      
-        return {"interviews": all_interviews}    
+        return await storage.run_bulk(list_interview_page, None, limit, cursor, status, start_from, start_to, fields)
     except Exception as e:
         print(f"Error getting all interviews: {e}")
         return {"error": str(e), "interviews": []}
-@app.get("/interview-details/{interview_id}")
-async def get_interview_details(interview_id: str):
-    try:
-        print(f"Getting details for interview: {interview_id}")
-        session_data = load_interview_session(interview_id)
-        if session_data:
-            responses = session_data.get("responses", [])
+def load_interview_details(interview_id: str):
+    session_data = load_interview_session(interview_id)
+    if session_data:
+        responses = session_data.get("responses", [])
+        interview_details = {
+            "interview_id": interview_id,
+            "status": session_data.get("status", "IN_PROGRESS"),
+            "questions_answered": len(responses),
+            "total_questions": len(INTERVIEW_QUESTIONS),
+            "start_time": session_data.get("start_time", ""),
+            "end_time": session_data.get("end_time", ""),
+            "all_validations_passed": all(v.get('passed', True) for v in session_data.get('validation_results', {}).values()),
+            "termination_reason": session_data.get("termination_reason", None),
+            "responses": responses,
+            "source": "session"
+        }
+        return interview_details
+    for kind in ("completed", "terminated"):
+        file_path = interview_path(interview_id, kind)
+        if os.path.exists(file_path):
+            with open(file_path, 'r') as f:
+                file_data = json.load(f)                   
+            responses = file_data.get("responses", [])
             interview_details = {
                 "interview_id": interview_id,
-                "status": session_data.get("status", "IN_PROGRESS"),
+                "status": file_data.get("status", "COMPLETED"),
                 "questions_answered": len(responses),
-                "total_questions": len(INTERVIEW_QUESTIONS),
-                "start_time": session_data.get("start_time", ""),
-                "end_time": session_data.get("end_time", ""),
-                "all_validations_passed": all(v.get('passed', True) for v in session_data.get('validation_results', {}).values()),
-                "termination_reason": session_data.get("termination_reason", None),
+                "total_questions": file_data.get("total_questions", len(INTERVIEW_QUESTIONS)),
+                "start_time": file_data.get("start_time", ""),
+                "end_time": file_data.get("end_time", ""),
+                "completion_time": file_data.get("completion_time", ""),
+                "all_validations_passed": file_data.get("all_validations_passed", False),
+                "termination_reason": file_data.get("termination_reason", None),
                 "responses": responses,
-                "source": "session"
-            }
-            return interview_details
-        interview_folder = "interviews"
-        if os.path.exists(interview_folder):
-            file_patterns = [
-                f"{interview_folder}/{interview_id}_ONELAB_*.json",
-                f"{interview_folder}/*_{interview_id}_*.json",
-                f"{interview_folder}/*{interview_id}*.json"
-            ]
-            for pattern in file_patterns:
-                files = glob.glob(pattern)
-                if files:
-                    file_path = files[0]
-                    with open(file_path, 'r') as f:
-                        file_data = json.load(f)                   
-                    responses = file_data.get("responses", [])
-                    interview_details = {
-                        "interview_id": interview_id,
-                        "status": file_data.get("status", "COMPLETED"),
-                        "questions_answered": len(responses),
-                        "total_questions": file_data.get("total_questions", len(INTERVIEW_QUESTIONS)),
-                        "start_time": file_data.get("start_time", ""),
-                        "end_time": file_data.get("end_time", ""),
-                        "completion_time": file_data.get("completion_time", ""),
-                        "all_validations_passed": file_data.get("all_validations_passed", False),
-                        "termination_reason": file_data.get("termination_reason", None),
-                        "responses": responses,
-                        "source": "file"}
-                    return interview_details      
-        return {"error": f"Interview {interview_id} not found"}      
+                "source": "file"}
+            return interview_details      
+    return {"error": f"Interview {interview_id} not found"}      
+@app.get("/interview-details/{interview_id}")
+async def get_interview_details(interview_id: str):
+    try:
+        print(f"Getting details for interview: {interview_id}")
+        return await storage.run_bulk(load_interview_details, interview_id)
     except Exception as e:
         print(f"Error getting interview details: {e}")
         return {"error": str(e)}
+def call_stats():
+    return {
+        "totalCalls": interview_catalog.total(),
+        "completedCalls": interview_catalog.count("COMPLETED"),
+        "activeCalls": state_backend.live_session_count()
+    }
 @app.get("/call-stats")
 async def get_call_stats():
     try:
-        all_interviews = []
-        pattern = "interviews/*_ONELAB_*.json"
-        files = glob.glob(pattern)      
-        for file_path in files:
-            try:
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                    all_interviews.append(data)
-            except Exception as e:
-                continue
-        session_files = glob.glob("interviews/session_*.json")
-        for session_file in session_files:
-            try:
-                call_sid = os.path.basename(session_file).replace("session_", "").replace(".json", "")
-                session_data = load_interview_session(call_sid)
-                if session_data:
-                    all_interviews.append({
-                        "status": session_data.get("status", "IN_PROGRESS"),
-                        "questions_answered": len(session_data.get("responses", [])),
-                        "total_questions": len(INTERVIEW_QUESTIONS),
-                        "all_validations_passed": all(v.get('passed', True) for v in session_data.get('validation_results', {}).values())})
-            except:
-                continue 
-        total_calls = len(all_interviews)
-        completed_calls = len([i for i in all_interviews if i.get("status") == "COMPLETED"])       
-        return {
-            "totalCalls": total_calls,
-            "completedCalls": completed_calls
-        }      
-    except Exception as e:
-        return {"totalCalls": 0, "completedCalls": 0}
-bulk_call_sessions = {}
+        return await storage.run_call(call_stats)
+    except Exception:
+        return {"totalCalls": 0, "completedCalls": 0, "activeCalls": 0}
+@app.get("/calls/{call_sid}/timeline")
+async def get_call_timeline(call_sid: str):
+    timeline = call_timeline.get(call_sid)
+    if timeline is None:
+        return {"error": "No timeline recorded for this call in this process"}
+    return timeline
+@app.get("/metrics")
+async def get_metrics():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+@app.get("/gather-timeouts")
+async def get_gather_timeouts():
+    return gather_profiles.snapshot()
+@app.get("/storage-metrics")
+async def get_storage_metrics():
+    return {**storage.metrics(), "analysis_queue_depth": analysis_queue.depth(), "speech_replay_cache": speech_replay_cache.metrics()}
 @app.post("/upload-csv")
 async def upload_csv(file: UploadFile = File(...)):
     try:
@@ -815,18 +833,18 @@ async def upload_csv(file: UploadFile = File(...)):
     except Exception as e:
         return {"success": False, "error": f"Error processing CSV: {str(e)}"}
 @app.post("/bulk-call")
-async def bulk_call(contacts: List[dict], background_tasks: BackgroundTasks):
+async def bulk_call(contacts: List[dict], background_tasks: BackgroundTasks, max_concurrent: Optional[int] = None, calls_per_second: Optional[float] = None):
     try:
-        bulk_call_id = f"bulk_{int(time.time())}"
-        bulk_call_sessions[bulk_call_id] = {
+        bulk_call_id = f"bulk_{int(time.time())}_{await state_backend.run(state_backend.incr_counter, 'bulk_calls')}"
+        await state_backend.run(state_backend.create_campaign, bulk_call_id, {
             "contacts": contacts,
             "status": "STARTING",
             "current_index": 0,
-            "results": [],
+            "in_flight": 0,
             "start_time": datetime.now().isoformat(),
             "total_contacts": len(contacts)
-        }      
-        background_tasks.add_task(process_bulk_calls, bulk_call_id, contacts)     
+        })      
+        background_tasks.add_task(process_bulk_calls, bulk_call_id, contacts, max_concurrent, calls_per_second)     
         return {
             "success": True,
             "bulk_call_id": bulk_call_id,
@@ -838,13 +856,15 @@ async def bulk_call(contacts: List[dict], background_tasks: BackgroundTasks):
 @app.get("/bulk-call-status/{bulk_call_id}")
 async def get_bulk_call_status(bulk_call_id: str):
     try:
-        if bulk_call_id not in bulk_call_sessions:
+        session = await state_backend.run(state_backend.get_campaign, bulk_call_id)
+        if session is None:
             return {"error": "Bulk call session not found"} 
-        session = bulk_call_sessions[bulk_call_id]
         return {
             "bulk_call_id": bulk_call_id,
             "status": session["status"],
             "current_index": session["current_index"],
+            "in_flight": session.get("in_flight", 0),
+            "active_calls": session.get("active_calls", {}),
             "total_contacts": session["total_contacts"],
             "completed_calls": len(session["results"]),
             "results": session["results"],
@@ -855,104 +875,123 @@ async def get_bulk_call_status(bulk_call_id: str):
 @app.post("/stop-bulk-call/{bulk_call_id}")
 async def stop_bulk_call(bulk_call_id: str):
     try:
-        if bulk_call_id in bulk_call_sessions:
-            bulk_call_sessions[bulk_call_id]["status"] = "STOPPED"
+        if await state_backend.run(state_backend.get_campaign_field, bulk_call_id, "status") is not None:
+            await state_backend.run(state_backend.update_campaign, bulk_call_id, {"status": "STOPPED"})
             return {"success": True, "message": "Bulk calling stopped"}
         else:
             return {"success": False, "error": "Bulk call session not found"}
     except Exception as e:
         return {"success": False, "error": str(e)}
-async def process_bulk_calls(bulk_call_id: str, contacts: List[dict]):
+def build_call_result(contact, status, call_sid, message, call_duration="0"):
+    return {
+        "contact": contact,
+        "status": status,
+        "call_sid": call_sid,
+        "timestamp": datetime.now().isoformat(),
+        "message": message,
+        "call_duration": call_duration
+    }
+async def dial_contact(contact: dict, bulk_call_id: Optional[str] = None):
     try:
-        session = bulk_call_sessions[bulk_call_id]
-        session["status"] = "IN_PROGRESS"      
-        for index, contact in enumerate(contacts):
-            if session["status"] == "STOPPED":
-                break      
-            session["current_index"] = index
-            print(f"Starting call {index + 1}/{len(contacts)} to {contact['name']} at {contact['phone']}")         
-            try:
-                call = client.calls.create(
-                    url=f"{WEBHOOK_BASE_URL}/voice",
-                    to=contact["phone"],
-                    from_="+14067601762"
-                )              
-                print(f"Call initiated: {call.sid}")
-                call_completed = False
-                timeout_seconds = 300
-                check_interval = 10               
-                for _ in range(timeout_seconds // check_interval):
+        call = await call_control.create_call(
+            url=f"{WEBHOOK_BASE_URL}/voice",
+            to=contact["phone"],
+            from_="+14067601762",
+            status_callback=f"{WEBHOOK_BASE_URL}/voice/status",
+            status_callback_event=['ringing', 'answered', 'completed'],
+            status_callback_method='POST'
+        )              
+        print(f"Call initiated: {call.sid}")
+        await storage.run_call(call_store.record_contact, call.sid, contact, "csv_bulk_call", bulk_call_id)
+        call_status_tracker.watch(call.sid, bulk_call_id)
+        await state_backend.run(state_backend.record_call_status, call.sid, {"status": "initiated", "bulk_call_id": bulk_call_id})
+        campaign = CampaignState(state_backend, bulk_call_id) if bulk_call_id else None
+        if campaign is not None:
+            await campaign.set_active_call(call.sid, {"name": contact.get("name"), "phone": contact["phone"], "status": "initiated", "updated": datetime.now().isoformat()})
+        try:
+            deadline = time.monotonic() + CALL_TIMEOUT
+            while True:
+                entry = await call_status_tracker.wait_until_final(call.sid, min(CALL_STATUS_SILENCE_TIMEOUT, max(deadline - time.monotonic(), 0)))
+                if entry is None:
+                    if time.monotonic() >= deadline:
+                        break
                     try:
-                        updated_call = client.calls(call.sid).fetch()
-                        call_status = updated_call.status
-                        print(f"Call {call.sid} status: {call_status}")                      
-                        if call_status in ['completed', 'busy', 'failed', 'no-answer', 'canceled']:
-                            call_completed = True
-                            if call_status == 'completed':
-                                result = {
-                                    "contact": contact,
-                                    "status": "SUCCESS",
-                                    "call_sid": call.sid,
-                                    "timestamp": datetime.now().isoformat(),
-                                    "message": f"Call completed successfully (Status: {call_status})",
-                                    "call_duration": str(updated_call.duration) if updated_call.duration else "0"
-                                }
-                            else:
-                                result = {
-                                    "contact": contact,
-                                    "status": "FAILED",
-                                    "call_sid": call.sid,
-                                    "timestamp": datetime.now().isoformat(),
-                                    "message": f"Call failed with status: {call_status}",
-                                    "call_duration": "0"
-                                }
-                            break                          
+                        updated_call = await call_control.fetch_call(call.sid)
+                        print(f"Call {call.sid} silent for {CALL_STATUS_SILENCE_TIMEOUT:g}s, polled status: {updated_call.status}")
+                        entry = call_status_tracker.record(call.sid, updated_call.status, updated_call.duration)
+                        await update_campaign_call_status(call.sid, updated_call.status, bulk_call_id)
                     except Exception as status_error:
-                        print(f"Error checking call status: {status_error}")                   
-                    await asyncio.sleep(check_interval)               
-                if not call_completed:
-                    try:
-                        client.calls(call.sid).update(status='canceled')
-                    except:
-                        pass                  
-                    result = {
-                        "contact": contact,
-                        "status": "FAILED",
-                        "call_sid": call.sid,
-                        "timestamp": datetime.now().isoformat(),
-                        "message": "Call timed out after 5 minutes",
-                        "call_duration": "0"
-                    }                  
-            except Exception as call_error:
-                print(f"Error making call to {contact['phone']}: {call_error}")
-                result = {
-                    "contact": contact,
-                    "status": "FAILED",
-                    "call_sid": None,
-                    "timestamp": datetime.now().isoformat(),
-                    "message": f"Call initiation failed: {str(call_error)}",
-                    "call_duration": "0"
-                }          
-            session["results"].append(result)
-            print(f"Call {index + 1} completed: {result['status']}")
-            if index < len(contacts) - 1 and session["status"] != "STOPPED":
-                print(f"Waiting 15 seconds before next call...")
-                await asyncio.sleep(15)     
-        if session["status"] != "STOPPED":
-            session["status"] = "COMPLETED"    
-        session["end_time"] = datetime.now().isoformat()    
+                        print(f"Error checking call status: {status_error}")
+                        call_status_tracker.touch(call.sid)
+                        continue
+                    if updated_call.status not in TERMINAL_CALL_STATUSES:
+                        continue
+                call_status = entry["status"]
+                if call_status == 'completed':
+                    return build_call_result(contact, "SUCCESS", call.sid, f"Call completed successfully (Status: {call_status})", str(entry["duration"]) if entry["duration"] else "0")
+                return build_call_result(contact, "FAILED", call.sid, f"Call failed with status: {call_status}")
+            try:
+                await call_control.cancel_call(call.sid)
+            except:
+                pass                  
+            return build_call_result(contact, "FAILED", call.sid, f"Call timed out after {CALL_TIMEOUT:g} seconds")
+        finally:
+            call_status_tracker.forget(call.sid)
+            if campaign is not None:
+                await campaign.remove_active_call(call.sid)
+    except Exception as call_error:
+        print(f"Error making call to {contact['phone']}: {call_error}")
+        return build_call_result(contact, "FAILED", None, f"Call initiation failed: {str(call_error)}")
+def end_call_session(call_sid: str, call_status: str):
+    """The call is over: an interview the candidate hung up on is marked and indexed, and the session leaves
+    the live count and the journal cache"""
+    with SessionContext(call_sid) as session_ctx:
+        if session_ctx.session and session_ctx.session.get("status", "IN_PROGRESS") == "IN_PROGRESS":
+            print(f"[STATUS] Call {call_sid} ended ({call_status}) during the interview")
+            session_ctx.record({"type": "session_updated", "fields": {"status": "INCOMPLETE_HANGUP", "end_time": datetime.now().isoformat(), "call_status": call_status}})
+            index_interview(session_ctx.session, "session", session_journal.path(call_sid))
+        session_ctx.release()
+    state_backend.end_live_session(call_sid)
+async def update_campaign_call_status(call_sid: str, call_status: str, bulk_call_id: Optional[str] = None):
+    if bulk_call_id:
+        await CampaignState(state_backend, bulk_call_id).update_active_call(call_sid, status=call_status, updated=datetime.now().isoformat())
+@app.post("/voice/status")
+@app.post("/voice/status/{call_sid}")
+async def call_status_callback(request: Request, call_sid: Optional[str] = None):
+    try:
+        form_data = await request.form()
+        call_sid = call_sid or form_data.get("CallSid")
+        call_status = form_data.get("CallStatus")
+        if not call_sid or not call_status:
+            return {"success": False, "error": "CallSid and CallStatus are required"}
+        print(f"[STATUS] Call {call_sid}: {call_status}")
+        call_timeline.event(call_sid, "call_status", status=call_status, duration=form_data.get("CallDuration"))
+        shared_status = await state_backend.run(state_backend.record_call_status, call_sid, {"status": call_status, "duration": form_data.get("CallDuration")})
+        call_status_tracker.record(call_sid, call_status, form_data.get("CallDuration"))
+        await update_campaign_call_status(call_sid, call_status, shared_status.get("bulk_call_id"))
+        if call_status in TERMINAL_CALL_STATUSES:
+            await storage.run_call(end_call_session, call_sid, call_status)
+        return {"success": True}
+    except Exception as e:
+        print(f"[ERROR] Status callback error for {call_sid}: {e}")
+        return {"success": False, "error": str(e)}
+async def process_bulk_calls(bulk_call_id: str, contacts: List[dict], max_concurrent: Optional[int] = None, calls_per_second: Optional[float] = None):
+    campaign = CampaignState(state_backend, bulk_call_id)
+    try:
+        await campaign.update(status="IN_PROGRESS")
+        dialer = CampaignDialer(functools.partial(dial_contact, bulk_call_id=bulk_call_id), max_concurrent, calls_per_second)
+        print(f"Bulk call {bulk_call_id}: {len(contacts)} contacts, {dialer.max_concurrent} concurrent, {dialer.calls_per_second} calls/sec")
+        await dialer.run(campaign, contacts)
+        if await campaign.status() != "STOPPED":
+            await campaign.update(status="COMPLETED")
+        await campaign.update(end_time=datetime.now().isoformat())
     except Exception as e:
-        session["status"] = "ERROR"
-        session["error"] = str(e)
+        await campaign.update(status="ERROR", error=str(e))
         print(f"Bulk call processing error: {e}")
 def check_skills_match_simple(transcript_text):
-    text_lower = transcript_text.lower()
-    jd_skills = load_jd_skills()
-    found_skills = []
-    for skill in jd_skills:
-        skill_lower = skill.lower()
-        if skill_lower in text_lower:
-            found_skills.append(skill)
+    matcher = jd_provider.matcher()
+    jd_skills = matcher.skills
+    found_skills, _ = matcher.match(transcript_text)
     has_skills = len(found_skills) > 0
     match_percentage = (len(found_skills) / len(jd_skills)) * 100 if jd_skills else 0
     return has_skills, found_skills, match_percentage
@@ -994,75 +1033,64 @@ def check_notice_period_days(transcript_text):
         return True, 15
     is_acceptable = total_days <= 30
     return is_acceptable, total_days
-def validate_response_selected_questions(call_sid: str, step: int, transcription: str):
+def validate_response_selected_questions(call_sid: str, step: int, transcription: str, session_ctx=None):
     try:
-        interview_data = load_interview_session(call_sid)
-        if not interview_data:
-            return True, "continue", "No state found"      
-        validation_result = {"step": step, "passed": True, "reason": ""}
-        if step == 2:
-            has_skills, found_skills, match_percentage = check_skills_match_simple(transcription)
-            validation_result["skills_match"] = has_skills
-            validation_result["found_skills"] = found_skills
-            validation_result["match_percentage"] = match_percentage          
-            if not has_skills:
-                validation_result["passed"] = False
-                validation_result["reason"] = "No relevant skills mentioned"
-                interview_data["validation_results"][step] = validation_result
-                save_interview_session(call_sid, interview_data)
-                return False, "no_skills", "No relevant skills found"
-        elif step == 3:
-            willing_to_relocate = check_relocation_simple(transcription)
-            validation_result["relocation_willing"] = willing_to_relocate          
-            if not willing_to_relocate:
-                validation_result["passed"] = False
-                validation_result["reason"] = "Not willing to relocate"
-                interview_data["validation_results"][step] = validation_result
-                save_interview_session(call_sid, interview_data)
-                return False, "relocation_no", "Not willing to relocate"
-        elif step == 4:
-            can_attend_onsite = check_onsite_simple(transcription)
-            validation_result["onsite_available"] = can_attend_onsite          
-            if not can_attend_onsite:
-                validation_result["passed"] = False
-                validation_result["reason"] = "Cannot attend onsite interview"
-                interview_data["validation_results"][step] = validation_result
-                save_interview_session(call_sid, interview_data)
-                return False, "onsite_no", "Cannot attend onsite interview"
-        elif step == 5:
-            notice_acceptable, notice_days = check_notice_period_days(transcription)
-            validation_result["notice_acceptable"] = notice_acceptable
-            validation_result["notice_days"] = notice_days         
-            if not notice_acceptable:
-                validation_result["passed"] = False
-                validation_result["reason"] = f"Notice period too long ({notice_days} days > 30 days)"
-                interview_data["validation_results"][step] = validation_result
-                save_interview_session(call_sid, interview_data)
-                return False, "notice_long", f"Notice period {notice_days} days exceeds 30 days"
-        if "validation_results" not in interview_data:
-            interview_data["validation_results"] = {}
-        interview_data["validation_results"][step] = validation_result
-        save_interview_session(call_sid, interview_data)     
-        return True, "continue", "Validation passed"       
+        with open_session(call_sid, session_ctx) as session_ctx:
+            interview_data = session_ctx.session
+            if not interview_data:
+                return True, "continue", "No state found"      
+            validation_result = {"step": step, "passed": True, "reason": ""}
+            if step == 2:
+                has_skills, found_skills, match_percentage = check_skills_match_simple(transcription)
+                validation_result["skills_match"] = has_skills
+                validation_result["found_skills"] = found_skills
+                validation_result["match_percentage"] = match_percentage          
+                if not has_skills:
+                    validation_result["passed"] = False
+                    validation_result["reason"] = "No relevant skills mentioned"
+                    session_ctx.record({"type": "validation_recorded", "step": step, "result": validation_result})
+                    return False, "no_skills", "No relevant skills found"
+            elif step == 3:
+                willing_to_relocate = check_relocation_simple(transcription)
+                validation_result["relocation_willing"] = willing_to_relocate          
+                if not willing_to_relocate:
+                    validation_result["passed"] = False
+                    validation_result["reason"] = "Not willing to relocate"
+                    session_ctx.record({"type": "validation_recorded", "step": step, "result": validation_result})
+                    return False, "relocation_no", "Not willing to relocate"
+            elif step == 4:
+                can_attend_onsite = check_onsite_simple(transcription)
+                validation_result["onsite_available"] = can_attend_onsite          
+                if not can_attend_onsite:
+                    validation_result["passed"] = False
+                    validation_result["reason"] = "Cannot attend onsite interview"
+                    session_ctx.record({"type": "validation_recorded", "step": step, "result": validation_result})
+                    return False, "onsite_no", "Cannot attend onsite interview"
+            elif step == 5:
+                notice_acceptable, notice_days = check_notice_period_days(transcription)
+                validation_result["notice_acceptable"] = notice_acceptable
+                validation_result["notice_days"] = notice_days         
+                if not notice_acceptable:
+                    validation_result["passed"] = False
+                    validation_result["reason"] = f"Notice period too long ({notice_days} days > 30 days)"
+                    session_ctx.record({"type": "validation_recorded", "step": step, "result": validation_result})
+                    return False, "notice_long", f"Notice period {notice_days} days exceeds 30 days"
+            session_ctx.record({"type": "validation_recorded", "step": step, "result": validation_result})     
+            return True, "continue", "Validation passed"       
     except Exception as e:
         print(f"[ERROR] Validation error for {call_sid}, step {step}: {e}")
         return True, "continue", "Validation error - continuing"
-def terminate_interview(call_sid: str, reason_code: str, reason_message: str):
+def terminate_interview(call_sid: str, reason_code: str, reason_message: str, session_ctx=None):
     try:
-        resp = VoiceResponse()
-        resp.say(
-            "Thank you so much for taking the time to speak with us today. We really appreciate your interest. We'll review everything and get back to you soon. Have a wonderful day!",
-            voice='Polly.Amy', rate='medium')
-        resp.hangup()
-        interview_data = load_interview_session(call_sid)
-        if interview_data:
-            interview_data['status'] = 'TERMINATED'
-            interview_data['termination_reason'] = reason_code
-            interview_data['end_time'] = datetime.now().isoformat()
-            save_interview_session(call_sid, interview_data)          
-            save_incomplete_interview(call_sid, interview_data, reason_code)  
-        print(f"[TERMINATED] Interview {call_sid} terminated due to: {reason_code}")
-        return str(resp)     
+        with open_session(call_sid, session_ctx) as session_ctx:
+            interview_data = session_ctx.session
+            if interview_data:
+                session_ctx.record({"type": "session_updated", "fields": {"status": "TERMINATED", "termination_reason": reason_code, "end_time": datetime.now().isoformat()}})
+                if save_incomplete_interview(call_sid, interview_data, reason_code):
+                    session_ctx.close()
+            state_backend.end_live_session(call_sid)
+            print(f"[TERMINATED] Interview {call_sid} terminated due to: {reason_code}")
+            return twiml_cache.termination()
     except Exception as e:
         print(f"[ERROR] Error terminating interview for {call_sid}: {e}")
         return handle_error("Thank you for your time. Have a great day!")
@@ -1073,29 +1101,16 @@ async def make_call(request: Request):
         phone_number = data.get("phone_number")
         if not phone_number:
             return {"error": "Phone number is required"}
-        call = client.calls.create(
+        call = await call_control.create_call(
             url=f"{WEBHOOK_BASE_URL}/voice",
             to=phone_number,
-            from_="+14067601762"
+            from_="+14067601762",
+            status_callback=f"{WEBHOOK_BASE_URL}/voice/status",
+            status_callback_event=['ringing', 'answered', 'completed'],
+            status_callback_method='POST'
         )
         print(f"Call initiated: {call.sid} to {phone_number}")
-        call_mapping = {
-            "call_sid": call.sid,
-            "phone_number": phone_number,
-            "initiated_time": datetime.now().isoformat(),
-            "status": "initiated"}
-        try:
-            mapping_file = "call_phone_mapping.json"
-            if os.path.exists(mapping_file):
-                with open(mapping_file, 'r') as f:
-                    mappings = json.load(f)
-            else:
-                mappings = {}
-            mappings[call.sid] = call_mapping
-            with open(mapping_file, 'w') as f:
-                json.dump(mappings, f, indent=2)
-        except Exception as e:
-            print(f"Error saving call mapping: {e}")
+        await storage.run_call(call_store.record_contact, call.sid, {"phone": phone_number, "status": "initiated"}, "single_call")
         return {
             "success": True,
             "call_sid": call.sid,
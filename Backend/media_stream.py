@@ -0,0 +1,322 @@
+import asyncio
+import base64
+import json
+import os
+import time
+from collections import deque
+from urllib.parse import urlparse, parse_qs
+from xml.etree import ElementTree
+from audio_codec import ulaw_to_pcm16, ulaw_silence
+from vad import VoiceActivityDetector
+try:
+    from amazon_transcribe.client import TranscribeStreamingClient
+except ImportError:
+    TranscribeStreamingClient = None
+STREAM_SAMPLE_RATE = 8000
+STREAM_FRAME_BYTES = 160
+STREAM_FRAME_MS = 20
+STREAM_MAX_TURN_SECONDS = float(os.getenv("STREAM_MAX_TURN_SECONDS", "60"))
+STREAM_MARK_GRACE_SECONDS = float(os.getenv("STREAM_MARK_GRACE_SECONDS", "10"))
+STREAM_SEND_CHUNK_BYTES = 8000
+STREAM_TRANSCRIBER = os.getenv("STREAM_TRANSCRIBER", "aws")
+STREAM_TRANSCRIPTION_TIMEOUT = float(os.getenv("STREAM_TRANSCRIPTION_TIMEOUT", "3"))
+STREAM_AWS_CHUNK_BYTES = 3200
+class StreamClosed(Exception):
+    pass
+class TurnCollector:
+    """Cuts one answer out of the inbound stream. Keeps a short pre-roll so the first syllable survives the
+    onset delay, and resolves with the mu-law audio of the turn, or None if no speech started in time.
+    on_audio gets the turn's audio as it is cut, starting with the pre-roll, for streaming transcription"""
+    def __init__(self, endpointer, no_speech_seconds, max_turn_seconds=STREAM_MAX_TURN_SECONDS, preroll_frames=10, on_audio=None):
+        self.endpointer = endpointer
+        self.on_audio = on_audio
+        self.no_speech_frames = int(no_speech_seconds * 1000 / STREAM_FRAME_MS)
+        self.max_frames = int(max_turn_seconds * 1000 / STREAM_FRAME_MS)
+        self.preroll = deque(maxlen=preroll_frames)
+        self.audio = None
+        self.frames = 0
+        self.ended_at = None
+        self._pending = bytearray()
+        self.done = asyncio.get_running_loop().create_future()
+        endpointer.reset()
+    def _finish(self, result):
+        if not self.done.done():
+            self.ended_at = time.perf_counter()
+            self.done.set_result(result)
+    def feed(self, payload):
+        self._pending += payload
+        while len(self._pending) >= STREAM_FRAME_BYTES and not self.done.done():
+            frame = bytes(self._pending[:STREAM_FRAME_BYTES])
+            del self._pending[:STREAM_FRAME_BYTES]
+            self.frames += 1
+            event = self.endpointer.feed(frame)
+            if self.audio is None:
+                self.preroll.append(frame)
+                if event == "speech_start":
+                    self.audio = bytearray(b"".join(self.preroll))
+                    if self.on_audio is not None:
+                        self.on_audio(bytes(self.audio))
+                elif self.frames >= self.no_speech_frames:
+                    self._finish(None)
+                continue
+            self.audio += frame
+            if self.on_audio is not None:
+                self.on_audio(frame)
+            if event == "end_of_turn" or self.frames >= self.max_frames:
+                self._finish(bytes(self.audio))
+def twiml_actions(document):
+    """Flattens a TwiML reply into what a Media Stream has to do: speak, pause, listen or hang up"""
+    actions = []
+    for element in ElementTree.fromstring(document).iter():
+        if element.tag == "Say":
+            actions.append(("say", element.text or "", element.get("voice"), element.get("rate")))
+        elif element.tag == "Play":
+            actions.append(("play", (element.text or "").rsplit("/", 1)[-1]))
+        elif element.tag == "Pause":
+            actions.append(("pause", float(element.get("length", "1"))))
+        elif element.tag == "Gather":
+            query = parse_qs(urlparse(element.get("action", "")).query)
+            actions.append(("gather", int(query["q"][0]) if "q" in query else None, float(element.get("timeout", "5"))))
+        elif element.tag == "Hangup":
+            actions.append(("hangup",))
+    return actions
+class ScriptedTurn:
+    def __init__(self, answer):
+        self.answer = answer
+    def feed(self, pcm):
+        pass
+    def cancel(self):
+        pass
+    async def result(self):
+        return self.answer
+class ScriptedTranscriber:
+    """Returns the answers passed in the stream's customParameters ("answers", separated by "|") in order.
+    Lets stream_replay.py drive full interviews offline with recorded audio standing in for the speech"""
+    def __init__(self, answers):
+        self.answers = deque(answers)
+    @classmethod
+    def from_parameters(cls, parameters):
+        answers = parameters.get("answers", "")
+        return cls([answer.strip() for answer in answers.split("|")] if answers else [])
+    def start(self, call_sid, turn, sample_rate):
+        return ScriptedTurn((self.answers.popleft(), 0.9) if self.answers else ("", 0.0))
+class AWSStreamingTurn:
+    """One answer on an Amazon Transcribe streaming session. feed() only queues the audio; a task sends it
+    as it arrives and collects the final results, so they are ready a moment after the turn ends"""
+    def __init__(self, client, call_sid, turn, sample_rate, language_code, timeout):
+        self.call_sid = call_sid
+        self.turn = turn
+        self.timeout = timeout
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._run(client, sample_rate, language_code))
+    def feed(self, pcm):
+        self.queue.put_nowait(pcm)
+    def cancel(self):
+        self.task.cancel()
+    async def _send(self, input_stream):
+        """Sends the queued audio in chunks of up to STREAM_AWS_CHUNK_BYTES (100 ms) until result() closes it"""
+        closed = False
+        while not closed:
+            chunk = bytearray()
+            while not closed and (not chunk or (not self.queue.empty() and len(chunk) < STREAM_AWS_CHUNK_BYTES)):
+                pcm = await self.queue.get()
+                if pcm is None:
+                    closed = True
+                else:
+                    chunk += pcm
+            if chunk:
+                await input_stream.send_audio_event(audio_chunk=bytes(chunk))
+        await input_stream.end_stream()
+    async def _collect(self, output_stream):
+        segments, confidences = [], []
+        async for event in output_stream:
+            for result in getattr(getattr(event, "transcript", None), "results", None) or []:
+                if result.is_partial or not result.alternatives:
+                    continue
+                alternative = result.alternatives[0]
+                segments.append(alternative.transcript)
+                confidences += [item.confidence for item in alternative.items or [] if item.item_type == "pronunciation" and item.confidence is not None]
+        return " ".join(segments).strip(), sum(confidences) / len(confidences) if confidences else 0.0
+    async def _run(self, client, sample_rate, language_code):
+        stream = await client.start_stream_transcription(language_code=language_code, media_sample_rate_hz=sample_rate, media_encoding="pcm")
+        results = asyncio.create_task(self._collect(stream.output_stream))
+        await self._send(stream.input_stream)
+        return await results
+    async def result(self):
+        """Closes the audio and waits up to timeout for the final transcript; ("", 0.0) if it fails"""
+        self.queue.put_nowait(None)
+        try:
+            return await asyncio.wait_for(self.task, self.timeout)
+        except asyncio.TimeoutError:
+            print(f"[STREAM] Streaming transcription for {self.call_sid} turn {self.turn} timed out after {self.timeout}s")
+        except Exception as e:
+            print(f"[ERROR] Streaming transcription failed for {self.call_sid} turn {self.turn}: {e}")
+        return "", 0.0
+class AWSStreamingTranscriber:
+    """Amazon Transcribe streaming, one session per answer opened when speech starts. Credentials come from
+    the usual AWS environment variables"""
+    def __init__(self, region, language_code="en-US", timeout=STREAM_TRANSCRIPTION_TIMEOUT):
+        self.client = TranscribeStreamingClient(region=region)
+        self.language_code = language_code
+        self.timeout = timeout
+    def start(self, call_sid, turn, sample_rate):
+        return AWSStreamingTurn(self.client, call_sid, turn, sample_rate, self.language_code, self.timeout)
+def transcriber_unavailable(kind=STREAM_TRANSCRIBER):
+    """Why kind cannot transcribe while the candidate speaks, or None if it can"""
+    if kind == "scripted":
+        return None
+    if kind != "aws":
+        return f"unknown STREAM_TRANSCRIBER {kind!r}"
+    if TranscribeStreamingClient is None:
+        return "the amazon-transcribe package is not installed"
+    return None
+def create_transcriber(parameters, kind=STREAM_TRANSCRIBER, region=None):
+    if kind == "scripted":
+        return ScriptedTranscriber.from_parameters(parameters)
+    return AWSStreamingTranscriber(region)
+class MediaStreamSession:
+    """Runs one interview over a Twilio Media Stream. The conversation logic is unchanged: every TwiML reply
+    it would have sent is played over the socket instead, and a Gather becomes local end-of-turn detection, so
+    the next question starts as soon as the candidate stops talking rather than after speechTimeout"""
+    def __init__(self, websocket, call_sid, prompt_audio, opening, answer, no_answer, transcriber_factory, endpointer_factory=VoiceActivityDetector, timeline=None):
+        self.websocket = websocket
+        self.call_sid = call_sid
+        self.prompt_audio = prompt_audio
+        self.opening = opening
+        self.answer = answer
+        self.no_answer = no_answer
+        self.transcriber_factory = transcriber_factory
+        self.endpointer = endpointer_factory()
+        self.timeline = timeline
+        self.stream_sid = None
+        self.transcriber = None
+        self.turn = None
+        self.turns = 0
+        self._marks = {}
+        self._mark_count = 0
+        self._started = None
+        self._closed = False
+    async def _send(self, message):
+        if self._closed:
+            raise StreamClosed()
+        await self.websocket.send_text(json.dumps(message))
+    async def _read(self):
+        try:
+            while True:
+                message = json.loads(await self.websocket.receive_text())
+                event = message.get("event")
+                if event == "media":
+                    if self.turn is not None and message["media"].get("track", "inbound") == "inbound":
+                        self.turn.feed(base64.b64decode(message["media"]["payload"]))
+                elif event == "mark":
+                    waiter = self._marks.pop(message.get("mark", {}).get("name"), None)
+                    if waiter is not None and not waiter.done():
+                        waiter.set_result(True)
+                elif event == "start":
+                    self.stream_sid = message["start"]["streamSid"]
+                    self.transcriber = self.transcriber_factory(message["start"].get("customParameters") or {})
+                    if not self._started.done():
+                        self._started.set_result(True)
+                elif event == "stop":
+                    break
+        except Exception:
+            pass
+        finally:
+            self._closed = True
+            for waiter in list(self._marks.values()) + [self._started] + ([self.turn.done] if self.turn else []):
+                if not waiter.done():
+                    waiter.cancel()
+    async def _play(self, audio):
+        for start in range(0, len(audio), STREAM_SEND_CHUNK_BYTES):
+            await self._send({"event": "media", "streamSid": self.stream_sid, "media": {"payload": base64.b64encode(audio[start:start + STREAM_SEND_CHUNK_BYTES]).decode()}})
+    async def _played(self, seconds):
+        """Waits for Twilio to echo a mark sent after the audio, i.e. for playback to finish"""
+        self._mark_count += 1
+        name = f"{self.call_sid}-{self._mark_count}"
+        waiter = asyncio.get_running_loop().create_future()
+        self._marks[name] = waiter
+        await self._send({"event": "mark", "streamSid": self.stream_sid, "mark": {"name": name}})
+        try:
+            await asyncio.wait_for(waiter, seconds + STREAM_MARK_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            self._marks.pop(name, None)
+        except asyncio.CancelledError:
+            raise StreamClosed()
+    async def _audio_for(self, action):
+        if action[0] == "pause":
+            return ulaw_silence(action[1])
+        phrase = action[1:] if action[0] == "say" else self.prompt_audio.phrase_for(action[1])
+        if phrase is None:
+            print(f"[STREAM] No audio for {action} on {self.call_sid}")
+            return b""
+        return await asyncio.to_thread(self.prompt_audio.ulaw_for, *phrase) or b""
+    async def _perform(self, document):
+        """Plays a TwiML reply; returns its Gather (question, timeout), or None when the call should end"""
+        seconds = 0.0
+        for action in twiml_actions(document):
+            if action[0] in ("say", "play", "pause"):
+                audio = await self._audio_for(action)
+                seconds += len(audio) / STREAM_SAMPLE_RATE
+                await self._play(audio)
+            elif action[0] == "gather":
+                await self._played(seconds)
+                return action[1], action[2]
+            elif action[0] == "hangup":
+                break
+        await self._played(seconds)
+        return None
+    async def _listen(self, timeout):
+        """Collects one answer, streaming it to the transcriber from speech onset; returns the audio, when the
+        turn ended and the transcription (None when nobody spoke)"""
+        transcription = None
+        def on_audio(ulaw):
+            nonlocal transcription
+            if transcription is None:
+                self.turns += 1
+                transcription = self.transcriber.start(self.call_sid, self.turns, STREAM_SAMPLE_RATE)
+            transcription.feed(ulaw_to_pcm16(ulaw))
+        self.turn = TurnCollector(self.endpointer, timeout, on_audio=on_audio)
+        try:
+            audio = await self.turn.done
+        except asyncio.CancelledError:
+            if transcription is not None:
+                transcription.cancel()
+            raise StreamClosed()
+        finally:
+            ended_at, self.turn = self.turn.ended_at, None
+        return audio, ended_at, transcription
+    async def run(self):
+        await self.websocket.accept()
+        self._started = asyncio.get_running_loop().create_future()
+        reader = asyncio.create_task(self._read())
+        try:
+            try:
+                await self._started
+            except asyncio.CancelledError:
+                return
+            print(f"[STREAM] Call {self.call_sid} connected on stream {self.stream_sid}")
+            gather = await self._perform(self.opening())
+            while gather is not None:
+                question_number, timeout = gather
+                audio, ended_at, transcription = await self._listen(timeout)
+                if audio is None:
+                    document = await self.no_answer()
+                else:
+                    if self.timeline is not None:
+                        self.timeline.begin(self.call_sid, "stream", question_number)
+                    text, confidence = await transcription.result()
+                    if self.timeline is not None:
+                        self.timeline.stage(self.call_sid, "transcribed")
+                    document = await self.answer(question_number, text, confidence) if text else await self.no_answer()
+                    if self.timeline is not None:
+                        self.timeline.finish(self.call_sid, "reply_ready")
+                    print(f"[STREAM] Call {self.call_sid}: Q{question_number} answered in {len(audio) / STREAM_SAMPLE_RATE:.1f}s, next prompt {(time.perf_counter() - ended_at) * 1000:.0f} ms after end of turn")
+                gather = await self._perform(document)
+            await self.websocket.close()
+        except StreamClosed:
+            print(f"[STREAM] Call {self.call_sid} stream closed by Twilio")
+        except Exception as e:
+            print(f"[ERROR] Media stream error for {self.call_sid}: {e}")
+        finally:
+            self._closed = True
+            reader.cancel()
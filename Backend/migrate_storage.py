@@ -0,0 +1,114 @@
+import argparse
+import json
+import os
+import re
+from collections import defaultdict
+from bulk_summary import BULK_SUMMARY_PATH
+from interview_catalog import InterviewCatalog, interview_catalog, scan_interview_files, CATALOG_DB_PATH
+from state_backend import InMemoryStateBackend
+from storage_layout import INTERVIEWS_DIR, interview_path, ensure_parent
+MIGRATED_DUPLICATES_DIR = "migrated_duplicates"
+LEGACY_FILE_PATTERNS = (
+    ("session", re.compile(r'^session_(?P<sid>[A-Za-z0-9_-]+)\.jsonl?$')),
+    ("completed", re.compile(r'^(?P<sid>[A-Za-z0-9-]+)_COMPLETED_(?P<ts>\d{8}_\d{6})\.json$')),
+    ("terminated", re.compile(r'^(?P<sid>[A-Za-z0-9-]+)_(?:ONELAB_)?TERMINATED_(?P<ts>\d{8}_\d{6})\.json$')),
+    ("analysis", re.compile(r'_(?P<ts>\d{8}_\d{6})_JD_ANALYSIS\.json$')))
+def derived_paths(base_dir=INTERVIEWS_DIR):
+    """The bulk summary checkpoint and catalog database that belong to an interviews tree; session journals
+    already live under it (interview_path(call_sid, "session", base_dir))"""
+    if os.path.normpath(base_dir) == os.path.normpath(INTERVIEWS_DIR):
+        return BULK_SUMMARY_PATH, CATALOG_DB_PATH
+    return os.path.join(base_dir, os.path.basename(BULK_SUMMARY_PATH)), os.path.join(base_dir, os.path.basename(CATALOG_DB_PATH))
+def catalog_for(base_dir=INTERVIEWS_DIR):
+    """The app's catalog for its own tree; any other tree gets its own database and private counters, so
+    rebuilding it never resets the running app's shared counts"""
+    _, catalog_path = derived_paths(base_dir)
+    return interview_catalog if catalog_path == CATALOG_DB_PATH else InterviewCatalog(catalog_path, InMemoryStateBackend())
+def classify_legacy_file(base_dir, name):
+    """Returns (kind, call_sid, sort_key) for a flat interviews/ file, or None if it is not per-call data"""
+    for kind, pattern in LEGACY_FILE_PATTERNS:
+        match = pattern.search(name)
+        if not match:
+            continue
+        if kind != "analysis":
+            return kind, match.group("sid"), match.groupdict().get("ts") or ""
+        try:
+            with open(os.path.join(base_dir, name), 'r') as f:
+                call_sid = json.load(f).get("call_id")
+        except Exception as e:
+            print(f"[MIGRATE] Skipping unreadable analysis file {name}: {e}")
+            return None
+        if not call_sid:
+            print(f"[MIGRATE] Skipping analysis file without call_id: {name}")
+            return None
+        return kind, call_sid, match.group("ts")
+    return None
+def plan_migration(base_dir=INTERVIEWS_DIR):
+    """Maps each flat file to its sharded path; when a call has several files of one kind the newest wins"""
+    grouped = defaultdict(list)
+    with os.scandir(base_dir) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            classified = classify_legacy_file(base_dir, entry.name)
+            if classified:
+                kind, call_sid, sort_key = classified
+                grouped[(kind, call_sid)].append((sort_key, entry.name))
+    plan = []
+    for (kind, call_sid), files in sorted(grouped.items()):
+        files.sort()
+        target = interview_path(call_sid, kind, base_dir)
+        for index, (_, name) in enumerate(files):
+            newest = index == len(files) - 1 and not os.path.exists(target)
+            destination = target if newest else os.path.join(base_dir, MIGRATED_DUPLICATES_DIR, name)
+            plan.append((kind, os.path.join(base_dir, name), destination))
+    return plan
+def migrate_session_file(source, destination):
+    """Pre-journal session snapshots become a one-event journal so the session can still be resumed"""
+    if source.endswith(".jsonl") or not destination.endswith(".jsonl"):
+        os.replace(source, destination)
+        return
+    with open(source, 'r') as f:
+        session = json.load(f)
+    with open(destination, 'w') as f:
+        f.write(json.dumps({"type": "session_started", "data": session}, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.remove(source)
+def migrate_flat_files(base_dir=INTERVIEWS_DIR, dry_run=False):
+    """Moves flat interviews/ files into the sharded layout; safe to run repeatedly"""
+    if not os.path.isdir(base_dir):
+        return []
+    plan = plan_migration(base_dir)
+    if dry_run:
+        return plan
+    moved = []
+    for kind, source, destination in plan:
+        try:
+            ensure_parent(destination)
+            if kind == "session":
+                migrate_session_file(source, destination)
+            else:
+                os.replace(source, destination)
+            moved.append((kind, source, destination))
+        except Exception as e:
+            print(f"[MIGRATE] Failed to move {source} to {destination}: {e}")
+    summary_path, _ = derived_paths(base_dir)
+    if any(kind == "analysis" for kind, _, _ in moved) and os.path.exists(summary_path):
+        os.remove(summary_path)
+    if moved:
+        print(f"[MIGRATE] Moved {len(moved)} interview files into the sharded layout under {base_dir}")
+    return moved
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move flat interviews/ files into the sharded per-call layout")
+    parser.add_argument("--base-dir", default=INTERVIEWS_DIR)
+    parser.add_argument("--dry-run", action="store_true", help="print the moves without touching any file")
+    args = parser.parse_args()
+    moves = migrate_flat_files(args.base_dir, args.dry_run)
+    for kind, source, destination in moves:
+        print(f"{kind:>10}  {source} -> {destination}")
+    if moves and not args.dry_run:
+        catalog = catalog_for(args.base_dir)
+        if not catalog.open():
+            catalog.rebuild(scan_interview_files(args.base_dir))
+    print(f"{len(moves)} files {'to move' if args.dry_run else 'moved'}")
@@ -0,0 +1,122 @@
+import hashlib
+import io
+import math
+import os
+import re
+import struct
+import threading
+import wave
+from audio_codec import pcm16_to_ulaw
+from xml.sax.saxutils import escape
+PROMPT_AUDIO = os.getenv("PROMPT_AUDIO", "off")
+PROMPT_AUDIO_DIR = os.getenv("PROMPT_AUDIO_DIR", "prompt_audio")
+PROMPT_AUDIO_CACHE_CONTROL = "public, max-age=31536000, immutable"
+PROMPT_FILE_PATTERN = re.compile(r'^([0-9a-f]{32})\.(wav|mp3)$')
+class StubTTSBackend:
+    """Offline stand-in for a TTS service: a short 8 kHz tone per word, deterministic for a given text"""
+    name = "stub"
+    extension = "wav"
+    media_type = "audio/wav"
+    def __init__(self, sample_rate=8000, seconds_per_word=0.3):
+        self.sample_rate = sample_rate
+        self.seconds_per_word = seconds_per_word
+    def synthesize_pcm(self, text, voice=None, rate=None):
+        frames = int(self.sample_rate * self.seconds_per_word * max(1, len(text.split())))
+        return struct.pack(f"<{frames}h", *(int(3000 * math.sin(2 * math.pi * 440 * i / self.sample_rate)) for i in range(frames)))
+    def synthesize(self, text, voice=None, rate=None):
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(self.synthesize_pcm(text, voice, rate))
+        return buffer.getvalue()
+class PollyTTSBackend:
+    """Amazon Polly, the engine behind Twilio's Polly.* voices, so <Play> sounds like the <Say> it replaces"""
+    name = "polly"
+    extension = "mp3"
+    media_type = "audio/mpeg"
+    def __init__(self, polly_client, default_voice="Amy"):
+        self.client = polly_client
+        self.default_voice = default_voice
+    def _synthesize(self, text, voice, rate, output_format, sample_rate):
+        voice_id = voice.split(".", 1)[1] if voice and voice.startswith("Polly.") else self.default_voice
+        ssml = f'<speak><prosody rate="{rate or "medium"}">{escape(text)}</prosody></speak>'
+        response = self.client.synthesize_speech(Text=ssml, TextType="ssml", VoiceId=voice_id, OutputFormat=output_format, SampleRate=sample_rate)
+        return response["AudioStream"].read()
+    def synthesize(self, text, voice=None, rate=None):
+        return self._synthesize(text, voice, rate, "mp3", "22050")
+    def synthesize_pcm(self, text, voice=None, rate=None):
+        """16-bit mono 8 kHz, the rate Twilio Media Streams play"""
+        return self._synthesize(text, voice, rate, "pcm", "8000")
+class PromptAudioCache:
+    """Synthesized prompt audio on disk, content-addressed by backend, voice, rate and text. A phrase is only
+    synthesized when no file exists for its key, so audio is regenerated exactly when the text changes"""
+    def __init__(self, backend, directory=PROMPT_AUDIO_DIR):
+        self.backend = backend
+        self.directory = directory
+        self._ready = {}
+        self._phrases = {}
+        self._audio = {}
+        self._lock = threading.Lock()
+        self.synthesized = 0
+    def key_for(self, text, voice=None, rate=None):
+        return hashlib.sha256(f"{self.backend.name}\x00{voice}\x00{rate}\x00{text}".encode()).hexdigest()[:32]
+    def filename(self, key, extension=None):
+        return f"{key}.{extension or self.backend.extension}"
+    def path_for(self, filename):
+        match = PROMPT_FILE_PATTERN.match(filename)
+        if not match or match.group(2) != self.backend.extension:
+            return None
+        path = os.path.join(self.directory, filename)
+        return path if os.path.exists(path) else None
+    def phrase_for(self, filename):
+        """(text, voice, rate) a served file was synthesized from, for phrases ensured by this process"""
+        return self._phrases.get(filename)
+    def _synthesize(self, text, voice, rate, extension):
+        if extension == "ulaw":
+            return pcm16_to_ulaw(self.backend.synthesize_pcm(text, voice, rate))
+        return self.backend.synthesize(text, voice, rate)
+    def ensure(self, text, voice=None, rate=None, extension=None):
+        """File name of the audio for this phrase, synthesizing it on first use; None if synthesis fails.
+        extension "ulaw" stores raw 8 kHz mu-law for Media Streams instead of the backend's own format"""
+        filename = self.filename(self.key_for(text, voice, rate), extension)
+        if filename in self._ready:
+            return filename
+        with self._lock:
+            path = os.path.join(self.directory, filename)
+            if not os.path.exists(path):
+                try:
+                    audio = self._synthesize(text, voice, rate, extension)
+                    os.makedirs(self.directory, exist_ok=True)
+                    temp_path = f"{path}.tmp"
+                    with open(temp_path, 'wb') as f:
+                        f.write(audio)
+                    os.replace(temp_path, path)
+                    self.synthesized += 1
+                except Exception as e:
+                    print(f"[PROMPT AUDIO] Could not synthesize '{text[:40]}' with {self.backend.name}: {e}")
+                    return None
+            self._phrases[filename] = (text, voice, rate)
+            self._ready[filename] = path
+            return filename
+    def ulaw_for(self, text, voice=None, rate=None):
+        """Mu-law audio of a phrase, kept in memory after the first read; None if synthesis fails"""
+        filename = self.ensure(text, voice, rate, "ulaw")
+        if filename is None:
+            return None
+        audio = self._audio.get(filename)
+        if audio is None:
+            with open(self._ready[filename], 'rb') as f:
+                audio = f.read()
+            self._audio[filename] = audio
+        return audio
+    def url_for(self, base_url, text, voice=None, rate=None):
+        filename = self.ensure(text, voice, rate)
+        return f"{base_url}/prompts/{filename}" if filename else None
+def create_prompt_audio_cache(kind=PROMPT_AUDIO, polly_client=None):
+    if kind == "stub":
+        return PromptAudioCache(StubTTSBackend())
+    if kind == "polly":
+        return PromptAudioCache(PollyTTSBackend(polly_client))
+    return None
@@ -0,0 +1,209 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from storage_layout import INTERVIEWS_DIR, interview_path, ensure_parent, iter_interview_paths
+SESSION_DIR = INTERVIEWS_DIR
+SESSION_JOURNAL_FSYNC = os.getenv("SESSION_JOURNAL_FSYNC", "1") == "1"
+SESSION_JOURNAL_CACHE_SIZE = int(os.getenv("SESSION_JOURNAL_CACHE_SIZE", "2000"))
+SESSION_JOURNAL_SHARED = os.getenv("SESSION_JOURNAL_SHARED", "0" if os.getenv("STATE_BACKEND", "memory") == "memory" else "1") == "1"
+def apply_event(session, event):
+    event_type = event.get("type")
+    if event_type == "session_started":
+        session.clear()
+        session.update(event["data"])
+        session.setdefault("responses", [])
+        session.setdefault("validation_results", {})
+    elif event_type == "response_appended":
+        session.setdefault("responses", []).append(event["response"])
+    elif event_type == "question_advanced":
+        session["current_question"] = event["current_question"]
+    elif event_type == "validation_recorded":
+        session.setdefault("validation_results", {})[event["step"]] = event["result"]
+    elif event_type == "session_updated":
+        session.update(event["fields"])
+    return session
+class SessionJournal:
+    """Append-only event log per call. The session dict is rebuilt from it once and kept in memory;
+    callers treat loaded sessions as read-only and change them through append(). When several workers share
+    the journal directory, a cached session first applies whatever other workers appended since it was read.
+    Only live calls are cached: at most cache_size sessions, least recently used first out, and a session
+    leaves as soon as its status is no longer IN_PROGRESS. read() serves listings without caching"""
+    def __init__(self, base_dir=SESSION_DIR, fsync=SESSION_JOURNAL_FSYNC, shared=SESSION_JOURNAL_SHARED, cache_size=SESSION_JOURNAL_CACHE_SIZE):
+        self.base_dir = base_dir
+        self.fsync = fsync
+        self.shared = shared
+        self.cache_size = cache_size
+        self._sessions = OrderedDict()
+        self._offsets = {}
+        self._lock = threading.Lock()
+    def path(self, call_sid):
+        return interview_path(call_sid, "session", self.base_dir)
+    def _write(self, path, events, mode):
+        data = "".join(json.dumps(event, separators=(",", ":")) + "\n" for event in events).encode()
+        with open(path, mode + 'b') as f:
+            f.write(data)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        return len(data)
+    def _apply_lines(self, session, f):
+        consumed = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                apply_event(session, json.loads(line))
+            except ValueError:
+                break
+            consumed += len(line)
+        return consumed
+    def _cache(self, call_sid, session):
+        self._sessions[call_sid] = session
+        self._sessions.move_to_end(call_sid)
+        while len(self._sessions) > self.cache_size:
+            evicted, _ = self._sessions.popitem(last=False)
+            self._offsets.pop(evicted, None)
+    def _evict(self, call_sid):
+        self._sessions.pop(call_sid, None)
+        self._offsets.pop(call_sid, None)
+    def _replay(self, call_sid):
+        path = self.path(call_sid)
+        if not os.path.exists(path):
+            return None
+        session = {}
+        with open(path, 'rb') as f:
+            good_offset = self._apply_lines(session, f)
+        self._offsets[call_sid] = good_offset
+        if good_offset < os.path.getsize(path):
+            print(f"[JOURNAL] Dropping torn tail of {path} at byte {good_offset}")
+            with open(path, 'r+b') as f:
+                f.truncate(good_offset)
+        return session if session else None
+    def _catch_up(self, call_sid, session):
+        """Applies events other workers appended after this process last read or wrote the journal"""
+        offset = self._offsets.get(call_sid, 0)
+        try:
+            size = os.path.getsize(self.path(call_sid))
+        except FileNotFoundError:
+            size = -1
+        if size == offset:
+            return session
+        if size < offset:
+            self._evict(call_sid)
+            return None
+        with open(self.path(call_sid), 'rb') as f:
+            f.seek(offset)
+            self._offsets[call_sid] = offset + self._apply_lines(session, f)
+        return session
+    def start(self, call_sid, data):
+        session = apply_event({}, {"type": "session_started", "data": data})
+        with self._lock:
+            self._offsets[call_sid] = self._write(ensure_parent(self.path(call_sid)), [{"type": "session_started", "data": data}], 'w')
+            self._cache(call_sid, session)
+        return session
+    def load(self, call_sid):
+        with self._lock:
+            session = self._sessions.get(call_sid)
+            if session is not None and self.shared:
+                session = self._catch_up(call_sid, session)
+            if session is None:
+                session = self._replay(call_sid)
+            if session is not None and session.get("status", "IN_PROGRESS") == "IN_PROGRESS":
+                self._cache(call_sid, session)
+            else:
+                self._evict(call_sid)
+            return session
+    def read(self, call_sid):
+        """The session for a listing or report: the cached copy of a live call, otherwise rebuilt from the
+        journal and not kept"""
+        with self._lock:
+            session = self._sessions.get(call_sid)
+            if session is not None and self.shared:
+                session = self._catch_up(call_sid, session)
+            if session is not None:
+                return session
+        path = self.path(call_sid)
+        try:
+            with open(path, 'rb') as f:
+                session = {}
+                self._apply_lines(session, f)
+        except FileNotFoundError:
+            return None
+        return session if session else None
+    def append(self, call_sid, events, session=None):
+        """Writes events to the journal. session is the caller's copy with the events already applied;
+        without it they are applied to the cached session"""
+        applied = session is not None
+        if not applied:
+            session = self.load(call_sid)
+        if session is None or not events:
+            return session
+        with self._lock:
+            written = self._write(self.path(call_sid), events, 'a')
+            if not applied:
+                for event in events:
+                    apply_event(session, event)
+            if self._sessions.get(call_sid) is session and session.get("status", "IN_PROGRESS") == "IN_PROGRESS":
+                self._offsets[call_sid] = self._offsets.get(call_sid, 0) + written
+            else:
+                self._evict(call_sid)
+        return session
+    def release(self, call_sid):
+        with self._lock:
+            self._evict(call_sid)
+    def discard(self, call_sid):
+        with self._lock:
+            self._evict(call_sid)
+            path = self.path(call_sid)
+            if os.path.exists(path):
+                os.remove(path)
+    def list_call_sids(self):
+        return [call_sid for call_sid, _ in iter_interview_paths("session", self.base_dir)]
+session_journal = SessionJournal()
+class SessionContext:
+    """Request-scoped unit of work: loads the session once, applies events to it in memory as they are
+    recorded and appends them all in one write when the outermost `with` block exits"""
+    def __init__(self, call_sid, journal=None):
+        self.call_sid = call_sid
+        self.journal = journal or session_journal
+        self.session = None
+        self.pending = []
+        self.closed = False
+        self.released = False
+        self._depth = 0
+    def __enter__(self):
+        if self._depth == 0:
+            self.session = self.journal.load(self.call_sid)
+            self.pending = []
+            self.closed = False
+            self.released = False
+        self._depth += 1
+        return self
+    def __exit__(self, exc_type, exc, tb):
+        self._depth -= 1
+        if self._depth > 0:
+            return False
+        if self.closed:
+            self.journal.discard(self.call_sid)
+        elif exc_type is not None:
+            self.journal.release(self.call_sid)
+        else:
+            if self.pending and self.session is not None:
+                self.journal.append(self.call_sid, self.pending, session=self.session)
+            if self.released:
+                self.journal.release(self.call_sid)
+        self.pending = []
+        return False
+    def record(self, *events):
+        if self.session is None:
+            return
+        for event in events:
+            apply_event(self.session, event)
+            self.pending.append(event)
+    def release(self):
+        """Drops the in-memory copy after the pending events are written; the journal stays on disk"""
+        self.released = True
+    def close(self):
+        """Marks the session as compacted into its final document; the journal is removed on exit"""
+        self.closed = True
@@ -0,0 +1,35 @@
+import re
+from functools import lru_cache
+def skill_variants(skill):
+    skill_lower = skill.lower().strip()
+    variants = {skill_lower, skill_lower.replace('.', ''), skill_lower.replace(' ', '')}
+    return {variant for variant in variants if variant}
+class SkillMatcher:
+    """Every JD skill and its spelling variants compiled into one alternation, so a transcript is scanned once"""
+    def __init__(self, skills):
+        self.skills = list(skills)
+        self._owners = {}
+        for skill in self.skills:
+            for variant in skill_variants(skill):
+                owners = self._owners.setdefault(variant, [])
+                if skill not in owners:
+                    owners.append(skill)
+        alternation = "|".join(re.escape(variant) for variant in sorted(self._owners, key=len, reverse=True))
+        self.pattern = re.compile(r'(?<!\w)(?:' + alternation + r')(?!\w)') if alternation else None
+    def count_mentions(self, text):
+        mentions = {}
+        if self.pattern is None or not text:
+            return mentions
+        for match in self.pattern.finditer(text.lower()):
+            for skill in self._owners[match.group(0)]:
+                mentions[skill] = mentions.get(skill, 0) + 1
+        return mentions
+    def match(self, text):
+        mentions = self.count_mentions(text)
+        matched_skills = [skill for skill in self.skills if skill in mentions]
+        return matched_skills, {skill: mentions[skill] for skill in matched_skills}
+@lru_cache(maxsize=16)
+def _compile_skill_matcher(skills):
+    return SkillMatcher(skills)
+def get_skill_matcher(skills):
+    return _compile_skill_matcher(tuple(skills))
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+SPEECH_DEDUPE_TTL = float(os.getenv("SPEECH_DEDUPE_TTL", "300"))
+SPEECH_DEDUPE_MAX_ENTRIES = int(os.getenv("SPEECH_DEDUPE_MAX_ENTRIES", "10000"))
+class WebhookReplayCache:
+    """Remembers the TwiML sent for each webhook key for ttl seconds. A retry of a finished request gets the
+    same bytes back and a retry that arrives while the first is still running waits for its result"""
+    def __init__(self, max_entries=SPEECH_DEDUPE_MAX_ENTRIES, ttl=SPEECH_DEDUPE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.inflight_hits = 0
+        self.misses = 0
+    def _evict(self, now):
+        while self._entries:
+            key, (expires, _) = next(iter(self._entries.items()))
+            if expires > now and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return entry[1]
+    async def run(self, key, handler):
+        """Returns handler()'s result, computed at most once per key while it is cached"""
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.inflight_hits += 1
+            return await asyncio.shield(pending)
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await handler()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        now = time.monotonic()
+        self._entries[key] = (now + self.ttl, result)
+        self._entries.move_to_end(key)
+        self._evict(now)
+        future.set_result(result)
+        return result
+    def metrics(self):
+        return {"entries": len(self._entries), "in_flight": len(self._inflight), "hits": self.hits, "in_flight_hits": self.inflight_hits, "misses": self.misses}
+speech_replay_cache = WebhookReplayCache()
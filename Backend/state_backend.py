@@ -0,0 +1,301 @@
+import asyncio
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import redis
+except ImportError:
+    redis = None
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+STATE_KEY_PREFIX = os.getenv("STATE_KEY_PREFIX", "ai_interviewer:")
+CALL_STATUS_TTL = int(os.getenv("CALL_STATUS_TTL", "86400"))
+LIVE_SESSION_MAX_AGE = int(os.getenv("LIVE_SESSION_MAX_AGE", "7200"))
+STATE_REDIS_WORKERS = int(os.getenv("STATE_REDIS_WORKERS", "8"))
+ANALYSIS_JOB_TTL = int(os.getenv("ANALYSIS_JOB_TTL", "86400"))
+class InMemoryStateBackend:
+    """Process-local campaigns, live sessions and counters; correct only with a single worker"""
+    shared = False
+    def __init__(self, max_call_statuses=5000, live_session_max_age=LIVE_SESSION_MAX_AGE):
+        self.max_call_statuses = max_call_statuses
+        self.live_session_max_age = live_session_max_age
+        self._campaigns = {}
+        self._live_sessions = {}
+        self._counters = {}
+        self._call_statuses = OrderedDict()
+        self._lock = threading.RLock()
+    async def run(self, fn, *args, **kwargs):
+        """Calls a backend method from async code; dict operations under a lock are safe on the event loop"""
+        return fn(*args, **kwargs)
+    def create_campaign(self, campaign_id, fields):
+        with self._lock:
+            self._campaigns[campaign_id] = {"fields": dict(fields), "results": [], "active_calls": {}}
+    def get_campaign(self, campaign_id):
+        with self._lock:
+            campaign = self._campaigns.get(campaign_id)
+            if campaign is None:
+                return None
+            return {**campaign["fields"], "results": list(campaign["results"]), "active_calls": {call_sid: dict(info) for call_sid, info in campaign["active_calls"].items()}}
+    def get_campaign_field(self, campaign_id, field):
+        with self._lock:
+            campaign = self._campaigns.get(campaign_id)
+            return campaign["fields"].get(field) if campaign else None
+    def update_campaign(self, campaign_id, fields):
+        with self._lock:
+            if campaign_id in self._campaigns:
+                self._campaigns[campaign_id]["fields"].update(fields)
+    def incr_campaign(self, campaign_id, field, amount=1):
+        with self._lock:
+            fields = self._campaigns[campaign_id]["fields"]
+            fields[field] = fields.get(field, 0) + amount
+            return fields[field]
+    def append_campaign_result(self, campaign_id, result):
+        with self._lock:
+            self._campaigns[campaign_id]["results"].append(result)
+    def set_active_call(self, campaign_id, call_sid, info):
+        with self._lock:
+            self._campaigns[campaign_id]["active_calls"][call_sid] = dict(info)
+    def update_active_call(self, campaign_id, call_sid, fields):
+        with self._lock:
+            campaign = self._campaigns.get(campaign_id)
+            if campaign and call_sid in campaign["active_calls"]:
+                campaign["active_calls"][call_sid].update(fields)
+    def remove_active_call(self, campaign_id, call_sid):
+        with self._lock:
+            campaign = self._campaigns.get(campaign_id)
+            if campaign:
+                campaign["active_calls"].pop(call_sid, None)
+    def start_live_session(self, call_sid, info):
+        with self._lock:
+            self._live_sessions[call_sid] = {**info, "_started": time.time()}
+    def end_live_session(self, call_sid):
+        with self._lock:
+            self._live_sessions.pop(call_sid, None)
+    def live_session_count(self):
+        """Sessions older than live_session_max_age are dropped: their end was never reported"""
+        with self._lock:
+            cutoff = time.time() - self.live_session_max_age
+            for call_sid in [call_sid for call_sid, info in self._live_sessions.items() if info["_started"] < cutoff]:
+                del self._live_sessions[call_sid]
+            return len(self._live_sessions)
+    def incr_counter(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+            return self._counters[name]
+    def get_counters(self, prefix):
+        with self._lock:
+            return {name[len(prefix):]: value for name, value in self._counters.items() if name.startswith(prefix)}
+    def reset_counters(self, prefix, values):
+        with self._lock:
+            for name in [name for name in self._counters if name.startswith(prefix)]:
+                del self._counters[name]
+            for name, value in values.items():
+                self._counters[f"{prefix}{name}"] = value
+    def record_call_status(self, call_sid, fields):
+        with self._lock:
+            entry = self._call_statuses.pop(call_sid, {})
+            entry.update(fields)
+            self._call_statuses[call_sid] = entry
+            while len(self._call_statuses) > self.max_call_statuses:
+                self._call_statuses.popitem(last=False)
+            return dict(entry)
+    def get_call_status(self, call_sid):
+        with self._lock:
+            entry = self._call_statuses.get(call_sid)
+            return dict(entry) if entry else None
+class RedisStateBackend:
+    """The same state in Redis so every worker process and host sees one copy. Campaign fields live in a hash
+    with JSON values (integers stay HINCRBY-able), results in a list and active calls in a second hash; the
+    bulk summary and JD analysis job records are kept here too when running several workers.
+    Read-modify-write updates run as WATCH/MULTI transactions, so concurrent workers never lose each other's
+    writes, and async code reaches the blocking client through run(), on a small thread pool"""
+    shared = True
+    def __init__(self, client, prefix=STATE_KEY_PREFIX, call_status_ttl=CALL_STATUS_TTL, live_session_max_age=LIVE_SESSION_MAX_AGE, max_workers=STATE_REDIS_WORKERS, analysis_job_ttl=ANALYSIS_JOB_TTL):
+        self.client = client
+        self.prefix = prefix
+        self.call_status_ttl = call_status_ttl
+        self.analysis_job_ttl = analysis_job_ttl
+        self.live_session_max_age = live_session_max_age
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="state-redis")
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+    def _key(self, *parts):
+        return self.prefix + ":".join(parts)
+    def create_campaign(self, campaign_id, fields):
+        pipe = self.client.pipeline()
+        pipe.delete(self._key("campaign", campaign_id), self._key("campaign", campaign_id, "results"), self._key("campaign", campaign_id, "active"))
+        pipe.hset(self._key("campaign", campaign_id), mapping={field: json.dumps(value) for field, value in fields.items()})
+        pipe.execute()
+    def get_campaign(self, campaign_id):
+        pipe = self.client.pipeline()
+        pipe.hgetall(self._key("campaign", campaign_id))
+        pipe.lrange(self._key("campaign", campaign_id, "results"), 0, -1)
+        pipe.hgetall(self._key("campaign", campaign_id, "active"))
+        fields, results, active_calls = pipe.execute()
+        if not fields:
+            return None
+        campaign = {field: json.loads(value) for field, value in fields.items()}
+        campaign["results"] = [json.loads(result) for result in results]
+        campaign["active_calls"] = {call_sid: json.loads(info) for call_sid, info in active_calls.items()}
+        return campaign
+    def get_campaign_field(self, campaign_id, field):
+        value = self.client.hget(self._key("campaign", campaign_id), field)
+        return json.loads(value) if value is not None else None
+    def update_campaign(self, campaign_id, fields):
+        key = self._key("campaign", campaign_id)
+        def update(pipe):
+            if pipe.exists(key):
+                pipe.multi()
+                pipe.hset(key, mapping={field: json.dumps(value) for field, value in fields.items()})
+        self.client.transaction(update, key)
+    def incr_campaign(self, campaign_id, field, amount=1):
+        return self.client.hincrby(self._key("campaign", campaign_id), field, amount)
+    def append_campaign_result(self, campaign_id, result):
+        self.client.rpush(self._key("campaign", campaign_id, "results"), json.dumps(result))
+    def set_active_call(self, campaign_id, call_sid, info):
+        self.client.hset(self._key("campaign", campaign_id, "active"), call_sid, json.dumps(info))
+    def update_active_call(self, campaign_id, call_sid, fields):
+        key = self._key("campaign", campaign_id, "active")
+        def update(pipe):
+            info = pipe.hget(key, call_sid)
+            if info is not None:
+                pipe.multi()
+                pipe.hset(key, call_sid, json.dumps({**json.loads(info), **fields}))
+        self.client.transaction(update, key)
+    def remove_active_call(self, campaign_id, call_sid):
+        self.client.hdel(self._key("campaign", campaign_id, "active"), call_sid)
+    def start_live_session(self, call_sid, info):
+        pipe = self.client.pipeline()
+        pipe.hset(self._key("live_sessions"), call_sid, json.dumps(info))
+        pipe.zadd(self._key("live_sessions", "started"), {call_sid: time.time()})
+        pipe.execute()
+    def end_live_session(self, call_sid):
+        pipe = self.client.pipeline()
+        pipe.hdel(self._key("live_sessions"), call_sid)
+        pipe.zrem(self._key("live_sessions", "started"), call_sid)
+        pipe.execute()
+    def live_session_count(self):
+        """Sessions older than live_session_max_age are dropped: their end was never reported, and the hash
+        would otherwise keep them across restarts"""
+        started = self._key("live_sessions", "started")
+        stale = self.client.zrangebyscore(started, "-inf", time.time() - self.live_session_max_age)
+        if stale:
+            pipe = self.client.pipeline()
+            pipe.hdel(self._key("live_sessions"), *stale)
+            pipe.zrem(started, *stale)
+            pipe.execute()
+        return self.client.hlen(self._key("live_sessions"))
+    def incr_counter(self, name, amount=1):
+        return self.client.hincrby(self._key("counters"), name, amount)
+    def get_counters(self, prefix):
+        return {name[len(prefix):]: int(value) for name, value in self.client.hgetall(self._key("counters")).items() if name.startswith(prefix)}
+    def reset_counters(self, prefix, values):
+        key = self._key("counters")
+        def reset(pipe):
+            stale = [name for name in pipe.hkeys(key) if name.startswith(prefix)]
+            pipe.multi()
+            if stale:
+                pipe.hdel(key, *stale)
+            if values:
+                pipe.hset(key, mapping={f"{prefix}{name}": value for name, value in values.items()})
+        self.client.transaction(reset, key)
+    def record_call_status(self, call_sid, fields):
+        key = self._key("call_status", call_sid)
+        def update(pipe):
+            entry = pipe.get(key)
+            entry = {**(json.loads(entry) if entry else {}), **fields}
+            pipe.multi()
+            pipe.set(key, json.dumps(entry), ex=self.call_status_ttl)
+            return entry
+        return self.client.transaction(update, key, value_from_callable=True)
+    def get_call_status(self, call_sid):
+        entry = self.client.get(self._key("call_status", call_sid))
+        return json.loads(entry) if entry else None
+    def claim_summary_load(self):
+        """True for the first worker to ask: that one seeds the shared summary from disk"""
+        return bool(self.client.set(self._key("summary", "loaded"), os.getpid(), nx=True))
+    def put_summary_entry(self, call_id, entry, score, bucket):
+        """Replaces a candidate's entry, moving it in the ranking (score ascending, then call_id) and between
+        match buckets in one transaction"""
+        entries, ranking, statistics = self._key("summary", "entries"), self._key("summary", "ranking"), self._key("summary", "statistics")
+        def put(pipe):
+            previous = pipe.hget(entries, call_id)
+            pipe.multi()
+            if previous is not None:
+                pipe.hincrby(statistics, json.loads(previous)["bucket"], -1)
+            pipe.hset(entries, call_id, json.dumps({"entry": entry, "bucket": bucket}))
+            pipe.zadd(ranking, {call_id: score})
+            pipe.hincrby(statistics, bucket, 1)
+        self.client.transaction(put, entries)
+    def get_summary(self):
+        """(entries in ranking order, match bucket counts)"""
+        pipe = self.client.pipeline(transaction=True)
+        pipe.zrange(self._key("summary", "ranking"), 0, -1)
+        pipe.hgetall(self._key("summary", "entries"))
+        pipe.hgetall(self._key("summary", "statistics"))
+        ranking, entries, statistics = pipe.execute()
+        return [json.loads(entries[call_id])["entry"] for call_id in ranking if call_id in entries], {bucket: int(count) for bucket, count in statistics.items()}
+    def claim_analysis_key(self, key, job_id):
+        """Registers job_id as the queued job for key unless another worker's job is already waiting; returns
+        the job that owns the key"""
+        pending = self._key("analysis", "pending", key)
+        if self.client.set(pending, job_id, nx=True, ex=self.analysis_job_ttl):
+            return job_id
+        return self.client.get(pending) or job_id
+    def release_analysis_key(self, key, job_id):
+        pending = self._key("analysis", "pending", key)
+        def release(pipe):
+            if pipe.get(pending) == job_id:
+                pipe.multi()
+                pipe.delete(pending)
+        self.client.transaction(release, pending)
+    def save_analysis_job(self, job):
+        self.client.set(self._key("analysis", "job", job["job_id"]), json.dumps(job), ex=self.analysis_job_ttl)
+    def update_analysis_job(self, job_id, fields, incr=None):
+        """Merges fields into a job record, and adds to the counter named by incr"""
+        key = self._key("analysis", "job", job_id)
+        def update(pipe):
+            job = pipe.get(key)
+            if job is not None:
+                job = {**json.loads(job), **fields}
+                if incr:
+                    job[incr] = job.get(incr, 0) + 1
+                pipe.multi()
+                pipe.set(key, json.dumps(job), ex=self.analysis_job_ttl)
+        self.client.transaction(update, key)
+    def get_analysis_job(self, job_id):
+        job = self.client.get(self._key("analysis", "job", job_id))
+        return json.loads(job) if job else None
+class CampaignState:
+    """Async handle on one bulk-call campaign stored in a state backend, for the dialer and the handlers"""
+    def __init__(self, backend, campaign_id):
+        self.backend = backend
+        self.campaign_id = campaign_id
+    async def status(self):
+        return await self.backend.run(self.backend.get_campaign_field, self.campaign_id, "status")
+    async def update(self, **fields):
+        await self.backend.run(self.backend.update_campaign, self.campaign_id, fields)
+    async def incr(self, field, amount=1):
+        return await self.backend.run(self.backend.incr_campaign, self.campaign_id, field, amount)
+    async def append_result(self, result):
+        await self.backend.run(self.backend.append_campaign_result, self.campaign_id, result)
+    async def set_active_call(self, call_sid, info):
+        await self.backend.run(self.backend.set_active_call, self.campaign_id, call_sid, info)
+    async def update_active_call(self, call_sid, **fields):
+        await self.backend.run(self.backend.update_active_call, self.campaign_id, call_sid, fields)
+    async def remove_active_call(self, call_sid):
+        await self.backend.run(self.backend.remove_active_call, self.campaign_id, call_sid)
+    async def snapshot(self):
+        return await self.backend.run(self.backend.get_campaign, self.campaign_id)
+def create_state_backend(kind=STATE_BACKEND, redis_url=REDIS_URL):
+    if kind == "redis":
+        if redis is None:
+            raise ImportError("STATE_BACKEND=redis needs the redis package (pip install redis)")
+        print(f"[STATE] Using Redis state backend at {redis_url}")
+        return RedisStateBackend(redis.Redis.from_url(redis_url, decode_responses=True))
+    return InMemoryStateBackend()
+state_backend = create_state_backend()
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+STORAGE_CALL_WORKERS = int(os.getenv("STORAGE_CALL_WORKERS", "8"))
+STORAGE_BULK_WORKERS = int(os.getenv("STORAGE_BULK_WORKERS", "2"))
+class StoragePool:
+    """Bounded thread pool for blocking file and SQLite work that keeps queue depth and wait-time counters"""
+    def __init__(self, name, max_workers):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"storage-{name}")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_queued = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    def _job(self, submitted, fn, args, kwargs):
+        waited = time.perf_counter() - submitted
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        failed = True
+        try:
+            result = fn(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.failed += failed
+    async def run(self, fn, *args, **kwargs):
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._job, time.perf_counter(), fn, args, kwargs)
+    def metrics(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queue_depth": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "max_queue_depth": self.max_queued,
+                "avg_wait_ms": round(self.total_wait / self.completed * 1000, 3) if self.completed else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3)}
+def read_json_file(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+class AsyncStorage:
+    """Awaitable storage for the async endpoints. Webhook work runs on the call pool and listings and
+    report reads on the bulk pool, so a heavy read waits behind other reads and never in front of a call"""
+    def __init__(self, call_workers=STORAGE_CALL_WORKERS, bulk_workers=STORAGE_BULK_WORKERS):
+        self.call_pool = StoragePool("call", call_workers)
+        self.bulk_pool = StoragePool("bulk", bulk_workers)
+    async def run_call(self, fn, *args, **kwargs):
+        return await self.call_pool.run(fn, *args, **kwargs)
+    async def run_bulk(self, fn, *args, **kwargs):
+        return await self.bulk_pool.run(fn, *args, **kwargs)
+    async def read_json(self, path):
+        return await self.bulk_pool.run(read_json_file, path)
+    def metrics(self):
+        return {"call": self.call_pool.metrics(), "bulk": self.bulk_pool.metrics()}
+storage = AsyncStorage()
@@ -0,0 +1,29 @@
+import os
+import re
+INTERVIEWS_DIR = "interviews"
+KIND_DIRS = {"session": "sessions", "completed": "completed", "terminated": "terminated", "analysis": "analysis"}
+KIND_EXTENSIONS = {"session": ".jsonl", "completed": ".json", "terminated": ".json", "analysis": ".json"}
+CALL_SID_PATTERN = re.compile(r'[A-Za-z0-9_-]+')
+def shard_for(call_sid):
+    """Twilio call sids end in random hex, so the last two characters spread files over 256 directories"""
+    return call_sid[-2:].lower()
+def interview_path(call_sid, kind, base_dir=INTERVIEWS_DIR):
+    if not call_sid or not CALL_SID_PATTERN.fullmatch(call_sid):
+        raise ValueError(f"Invalid call sid: {call_sid!r}")
+    return os.path.join(base_dir, KIND_DIRS[kind], shard_for(call_sid), f"{call_sid}{KIND_EXTENSIONS[kind]}")
+def ensure_parent(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+def iter_interview_paths(kind, base_dir=INTERVIEWS_DIR):
+    """Every stored document of one kind; for rebuilds and batch jobs, never for point lookups"""
+    kind_dir = os.path.join(base_dir, KIND_DIRS[kind])
+    if not os.path.isdir(kind_dir):
+        return
+    extension = KIND_EXTENSIONS[kind]
+    for shard in sorted(os.listdir(kind_dir)):
+        shard_dir = os.path.join(kind_dir, shard)
+        if not os.path.isdir(shard_dir):
+            continue
+        for name in sorted(os.listdir(shard_dir)):
+            if name.endswith(extension):
+                yield name[:-len(extension)], os.path.join(shard_dir, name)
@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import base64
+import json
+import re
+import time
+import urllib.parse
+import urllib.request
+import uuid
+import wave
+from array import array
+import websockets
+from audio_codec import pcm16_to_ulaw, ULAW_SILENCE
+FRAME_BYTES = 160
+FRAME_SECONDS = 0.02
+def load_wav_ulaw(path):
+    """8 kHz mono mu-law, the format Twilio streams; other WAVs are downmixed and resampled by nearest sample"""
+    with wave.open(path, 'rb') as wav:
+        channels, width, rate = wav.getnchannels(), wav.getsampwidth(), wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+    if width != 2:
+        raise ValueError(f"{path}: only 16-bit WAVs are supported")
+    samples = array('h')
+    samples.frombytes(frames[:len(frames) - len(frames) % 2])
+    samples = samples[::channels]
+    if rate != 8000:
+        samples = array('h', (samples[int(i * rate / 8000)] for i in range(int(len(samples) * 8000 / rate))))
+    return pcm16_to_ulaw(samples.tobytes())
+def start_call(base_url, call_sid):
+    """Posts /voice like Twilio does on answer and returns the Media Stream URL from the <Connect> reply"""
+    data = urllib.parse.urlencode({"CallSid": call_sid, "From": "+15550100", "To": "+15550199"}).encode()
+    with urllib.request.urlopen(urllib.request.Request(f"{base_url}/voice", data=data), timeout=10) as response:
+        twiml = response.read().decode()
+    match = re.search(r'<Stream url="([^"]+)"', twiml)
+    if not match:
+        raise SystemExit(f"/voice did not return a <Stream>; is the server running with INTERVIEW_MODE=stream?\n{twiml}")
+    return match.group(1)
+class ReplayCall:
+    """Plays the part of Twilio and the candidate on one Media Stream: echoes marks once the prompt audio
+    would have finished playing, then streams the next recording followed by silence until the server speaks"""
+    def __init__(self, websocket, call_sid, recordings, speed):
+        self.websocket = websocket
+        self.call_sid = call_sid
+        self.stream_sid = f"MZ{uuid.uuid4().hex}"
+        self.recordings = list(recordings)
+        self.speed = speed
+        self.prompt_bytes = 0
+        self.sequence = 0
+        self.speaker = None
+        self.answer_ends = None
+        self.turns = []
+    async def send(self, event, **fields):
+        self.sequence += 1
+        await self.websocket.send(json.dumps({"event": event, "sequenceNumber": str(self.sequence), "streamSid": self.stream_sid, **fields}))
+    async def speak(self, audio):
+        started = time.perf_counter()
+        for index, start in enumerate(range(0, len(audio), FRAME_BYTES)):
+            await self.send("media", media={"track": "inbound", "chunk": str(index), "payload": base64.b64encode(audio[start:start + FRAME_BYTES]).decode()})
+            if self.speed:
+                await asyncio.sleep(max(0.0, started + (index + 1) * FRAME_SECONDS / self.speed - time.perf_counter()))
+            else:
+                await asyncio.sleep(0)
+    async def answer(self):
+        if self.recordings:
+            audio = self.recordings.pop(0)
+            self.turns.append({"answer_seconds": len(audio) / 8000})
+            self.answer_ends = time.perf_counter() + len(audio) / 8000 / (self.speed or float("inf"))
+            await self.speak(audio)
+        while True:
+            await self.speak(ULAW_SILENCE * 8000)
+    async def run(self, parameters):
+        await self.send("connected", protocol="Call", version="1.0.0")
+        await self.send("start", start={"streamSid": self.stream_sid, "callSid": self.call_sid, "tracks": ["inbound"], "customParameters": parameters,
+                                        "mediaFormat": {"encoding": "audio/x-mulaw", "sampleRate": 8000, "channels": 1}})
+        try:
+            async for raw in self.websocket:
+                message = json.loads(raw)
+                if message["event"] == "media":
+                    if self.speaker is not None:
+                        self.speaker.cancel()
+                        self.speaker = None
+                        if self.answer_ends is not None:
+                            self.turns[-1]["reply_gap_ms"] = (time.perf_counter() - self.answer_ends) * 1000 * (self.speed or 1)
+                            self.answer_ends = None
+                    self.prompt_bytes += len(base64.b64decode(message["media"]["payload"]))
+                elif message["event"] == "mark":
+                    if self.speed:
+                        await asyncio.sleep(self.prompt_bytes / 8000 / self.speed)
+                    self.prompt_bytes = 0
+                    await self.send("mark", mark=message["mark"])
+                    self.speaker = asyncio.create_task(self.answer())
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            if self.speaker is not None:
+                self.speaker.cancel()
+async def replay(args):
+    call_sid = args.call_sid or f"CAreplay{uuid.uuid4().hex[:24]}"
+    url = start_call(args.base_url.rstrip("/"), call_sid)
+    if args.stream_url:
+        url = f"{args.stream_url.rstrip('/')}/media-stream/{call_sid}"
+    recordings = [load_wav_ulaw(path) for path in args.wavs]
+    started = time.perf_counter()
+    async with websockets.connect(url, max_size=None) as websocket:
+        call = ReplayCall(websocket, call_sid, recordings, args.speed)
+        await call.run({"answers": "|".join(args.answer)} if args.answer else {})
+    print(f"call {call_sid}: {len(call.turns)} answers streamed, {time.perf_counter() - started:.1f}s on the stream")
+    for index, turn in enumerate(call.turns, 1):
+        gap = f"{turn['reply_gap_ms']:+.0f} ms from the end of the recording" if "reply_gap_ms" in turn else "never"
+        print(f"  answer {index}: {turn['answer_seconds']:.1f}s recording, next prompt {gap}")
+    print("gaps are in call time; a negative gap means the turn ended during trailing silence in the recording")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replays recorded answers into the /media-stream websocket the way Twilio would")
+    parser.add_argument("wavs", nargs="*", help="one WAV per answer, in question order; missing answers are streamed as silence")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--stream-url", help="override the ws(s):// base from the <Stream> reply, e.g. when WEBHOOK_BASE_URL is a tunnel")
+    parser.add_argument("--call-sid")
+    parser.add_argument("--answer", action="append", help="transcript for the matching WAV, used with STREAM_TRANSCRIBER=scripted")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed; 0 streams as fast as possible")
+    asyncio.run(replay(parser.parse_args()))
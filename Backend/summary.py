@@ -1,41 +1,25 @@
 import json
 import re
 import os
-import glob
-import csv
 from datetime import datetime
+from session_journal import session_journal
+from skill_matcher import get_skill_matcher
+from jd_provider import jd_provider
+from bulk_summary import bulk_summary
+from call_store import call_store
+from storage_layout import interview_path, ensure_parent, iter_interview_paths
 def load_job_description():
-    try:
-        jd_file_path = "current_jd.json"     
-        if os.path.exists(jd_file_path):
-            with open(jd_file_path, 'r') as f:
-                jd_data = json.load(f)
-            return jd_data
-        else:
-            return {"error": "current_jd.json file not found"}        
-    except Exception as e:
-        return {"error": f"Failed to load JD: {str(e)}"}
+    jd_data = jd_provider.get()
+    if jd_data is None:
+        return {"error": "current_jd.json file not found"}
+    return jd_data
 def extract_candidate_info_from_csv(call_sid):
     try:
-        csv_mapping_file = "bulk_call_mapping.json"
-        if os.path.exists(csv_mapping_file):
-            with open(csv_mapping_file, 'r') as f:
-                mapping = json.load(f)
-                if call_sid in mapping:
-                    return mapping[call_sid]
-        csv_files = glob.glob("*.csv")
-        for csv_file in csv_files:
-            try:
-                with open(csv_file, 'r') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        if 'phone' in row and 'call_sid' in row:
-                            if row.get('call_sid') == call_sid:
-                                return {'name': row.get('name', ''), 'phone': row.get('phone', ''), 'email': row.get('email', ''), 'source': 'csv_bulk_call'}
-            except:
-                continue
+        contact = call_store.get_contact(call_sid)
+        if contact:
+            return {'name': contact.get('name') or '', 'phone': contact.get('phone') or '', 'email': contact.get('email') or '', 'source': contact.get('source') or 'csv_bulk_call'}
         return None
-    except Exception as e:
+    except Exception:
         return None
 def extract_candidate_name(responses, call_sid=None):
     if call_sid:
@@ -66,58 +50,25 @@ def get_candidate_metadata(call_sid):
     if csv_info:
         metadata.update(csv_info)
     return metadata
-def save_unique_match_report(report, call_sid, candidate_name):
+def save_unique_match_report(report, call_sid):
+    """Returns the analysis path, or None when the report could not be written or added to the bulk summary"""
     try:
-        os.makedirs("interviews", exist_ok=True)
-        safe_name = re.sub(r'[^\w\-_]', '_', candidate_name)
-        safe_name = safe_name[:30]
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"interviews/{safe_name}_{call_sid[:12]}_{timestamp}_JD_ANALYSIS.json"
-        existing_pattern = f"interviews/*{call_sid[:12]}*JD_ANALYSIS.json"
-        existing_files = glob.glob(existing_pattern)
-        for old_file in existing_files:
-            if old_file != filename:
-                try:
-                    os.remove(old_file)
-                except:
-                    pass
+        filename = ensure_parent(interview_path(call_sid, "analysis"))
         with open(filename, 'w') as f:
             json.dump(report, f, indent=2)
+        bulk_summary.upsert(report, filename)
         return filename
     except Exception as e:
+        print(f"[ERROR] Could not save analysis for {call_sid}: {e}")
         return None
 
 def create_bulk_call_summary():
     try:
-        pattern = "interviews/*_JD_ANALYSIS.json"
-        analysis_files = glob.glob(pattern)
-        if not analysis_files:
+        summary = bulk_summary.snapshot()
+        if not summary["candidates"]:
             return {"error": "No analysis files found"}
-        bulk_summary = {"total_candidates": len(analysis_files), "analysis_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "candidates": [], "statistics": {"excellent_match": 0, "strong_match": 0, "good_match": 0, "moderate_match": 0, "low_match": 0}}
-        for file_path in analysis_files:
-            try:
-                with open(file_path, 'r') as f:
-                    analysis = json.load(f)
-                candidate_summary = {"name": analysis.get("candidate_name", "Unknown"), "call_id": analysis.get("call_id", ""), "overall_score": analysis.get("candidate_analysis", {}).get("overall_score", 0), "recommendation": analysis.get("candidate_analysis", {}).get("recommendation", ""), "matched_skills": analysis.get("candidate_analysis", {}).get("matched_skills", []), "analysis_file": file_path}
-                bulk_summary["candidates"].append(candidate_summary)
-                recommendation = candidate_summary["recommendation"]
-                if "EXCELLENT" in recommendation:
-                    bulk_summary["statistics"]["excellent_match"] += 1
-                elif "STRONG" in recommendation:
-                    bulk_summary["statistics"]["strong_match"] += 1
-                elif "GOOD" in recommendation:
-                    bulk_summary["statistics"]["good_match"] += 1
-                elif "MODERATE" in recommendation:
-                    bulk_summary["statistics"]["moderate_match"] += 1
-                else:
-                    bulk_summary["statistics"]["low_match"] += 1
-            except Exception as e:
-                continue
-        bulk_summary["candidates"].sort(key=lambda x: x["overall_score"], reverse=True)
-        summary_filename = f"interviews/BULK_SUMMARY_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(summary_filename, 'w') as f:
-            json.dump(bulk_summary, f, indent=2)
-        return bulk_summary
+        bulk_summary.checkpoint(force=True)
+        return summary
     except Exception as e:
         return {"error": str(e)}
 def analyze_candidate_responses(responses, call_id="unknown"):
@@ -176,48 +127,20 @@ def analyze_candidate_responses(responses, call_id="unknown"):
 
 def get_phone_from_interview_data(call_sid):
     try:
-        session_file = f"interviews/session_{call_sid}.json"
-        if os.path.exists(session_file):
-            with open(session_file, 'r') as f:
-                session_data = json.load(f)
-                return session_data.get("phone_number")
-        pattern = f"interviews/{call_sid}_COMPLETED_*.json"
-        files = glob.glob(pattern)
-        if files:
-            with open(files[0], 'r') as f:
+        session_data = session_journal.read(call_sid)
+        if session_data:
+            return session_data.get("phone_number")
+        completed_path = interview_path(call_sid, "completed")
+        if os.path.exists(completed_path):
+            with open(completed_path, 'r') as f:
                 interview_data = json.load(f)
                 return interview_data.get("phone_number")
-        mapping_file = "call_phone_mapping.json"
-        if os.path.exists(mapping_file):
-            with open(mapping_file, 'r') as f:
-                mappings = json.load(f)
-                if call_sid in mappings:
-                    return mappings[call_sid].get("phone_number")
-        return None
+        return call_store.get_phone(call_sid)
     except Exception as e:
         print(f"Error getting phone from interview data: {e}")
         return None
 def extract_skills_mentioned_by_candidate(text, jd_skills):
-    text_lower = text.lower()
-    mentioned_skills = []
-    skill_mentions = {}
-    for jd_skill in jd_skills:
-        skill_lower = jd_skill.lower()
-        patterns = [
-            r'\b' + re.escape(skill_lower) + r'\b', 
-            r'\b' + re.escape(skill_lower.replace('.', '')) + r'\b', 
-            r'\b' + re.escape(skill_lower.replace(' ', '')) + r'\b', 
-            r'\b' + re.escape(skill_lower.replace('+', r'\+')) + r'\b'
-        ]
-        total_matches = 0
-        for pattern in patterns:
-            matches = re.findall(pattern, text_lower)
-            total_matches += len(matches)
-        if total_matches > 0:
-            mentioned_skills.append(jd_skill)
-            skill_mentions[jd_skill] = total_matches
-    return mentioned_skills, skill_mentions
-
+    return get_skill_matcher(jd_skills).match(text)
 def extract_experience_level(text):
     text_lower = text.lower()
     year_patterns = [r'(\d+)\s*(?:years?|yrs?)\s*(?:of\s*)?(?:experience|exp)', r'(\d+)\+?\s*(?:years?|yrs?)', r'over\s*(\d+)\s*(?:years?|yrs?)', r'(\d+)\s*to\s*(\d+)\s*(?:years?|yrs?)']
@@ -247,8 +170,7 @@ def calculate_match_score(matched_skills, total_required_skills, experience_data
     return {"skills_match_percent": round(skills_match_percent, 1), "experience_match_percent": round(experience_match, 1), "overall_score": round(overall_score, 1)}
 def analyze_all_completed_interviews():
     try:
-        pattern = "interviews/*_COMPLETED_*.json"
-        interview_files = glob.glob(pattern)
+        interview_files = [path for _, path in iter_interview_paths("completed")]
         if not interview_files:
             return {"error": "No completed interviews found"}
         results = []
@@ -260,25 +182,18 @@ def analyze_all_completed_interviews():
             responses = interview_data.get("responses", [])
             if not responses:
                 continue
-            existing_pattern = f"interviews/*{call_sid[:12]}*JD_ANALYSIS.json"
-            existing_files = glob.glob(existing_pattern)
-            if existing_files:
-                try:
-                    with open(existing_files[0], 'r') as f:
-                        existing_report = json.load(f)
-                        results.append(existing_report)
-                except:
-                    pass
+            existing_report = load_interview_data(interview_path(call_sid, "analysis"))
+            if existing_report:
+                results.append(existing_report)
+                continue
+            report = build_match_report(interview_data)
+            if "error" in report:
                 continue
-            candidate_name = extract_candidate_name(responses, call_sid)
-            analysis = analyze_candidate_responses(responses, call_sid)
-            if "error" in analysis:
+            if not save_unique_match_report(report, call_sid):
                 continue
-            report = {"call_id": call_sid, "candidate_name": candidate_name, "candidate_analysis": analysis, "interview_summary": {"questions_answered": len(responses), "total_questions": interview_data.get("total_questions", 5), "completion_rate": f"{len(responses)}/{interview_data.get('total_questions', 5)}"}, "analysis_created": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-            save_unique_match_report(report, call_sid, candidate_name)
             results.append(report)
         if len(results) > 1:
-            bulk_summary = create_bulk_call_summary()
+            create_bulk_call_summary()
         return {"success": True, "analyzed": len(results), "results": results}
     except Exception as e:
         return {"error": str(e)}
@@ -290,8 +205,7 @@ def load_interview_data(file_path):
         return None
 def get_latest_interview_file():
     try:
-        pattern = "interviews/*_COMPLETED_*.json"
-        files = glob.glob(pattern)
+        files = [path for _, path in iter_interview_paths("completed")]
         if not files:
             return None
         return max(files, key=os.path.getmtime)
@@ -309,20 +223,35 @@ def generate_match_report_from_file(file_path=None):
     responses = interview_data.get("responses", [])
     if not responses:
         return {"error": "No responses found"}
-    existing_pattern = f"interviews/*{call_sid[:12]}*JD_ANALYSIS.json"
-    existing_files = glob.glob(existing_pattern)
-    if existing_files:
-        try:
-            with open(existing_files[0], 'r') as f:
-                return json.load(f)
-        except:
-            pass
+    existing_report = load_interview_data(interview_path(call_sid, "analysis"))
+    if existing_report:
+        return existing_report
+    report = build_match_report(interview_data)
+    if "error" in report:
+        return report
+    if not save_unique_match_report(report, call_sid):
+        return {"error": f"Could not save analysis for {call_sid}"}
+    return report
+def build_match_report(interview_data):
+    call_sid = interview_data.get("interview_id", "unknown")
+    responses = interview_data.get("responses", [])
     candidate_name = extract_candidate_name(responses, call_sid)
     analysis = analyze_candidate_responses(responses, call_sid)
     if "error" in analysis:
         return analysis
-    report = {"call_id": call_sid, "candidate_name": candidate_name, "candidate_analysis": analysis, "interview_summary": {"questions_answered": len(responses), "total_questions": interview_data.get("total_questions", 5), "completion_rate": f"{len(responses)}/{interview_data.get('total_questions', 5)}"}, "analysis_created": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-    save_unique_match_report(report, call_sid, candidate_name)
+    return {"call_id": call_sid, "candidate_name": candidate_name, "candidate_analysis": analysis, "interview_summary": {"questions_answered": len(responses), "total_questions": interview_data.get("total_questions", 5), "completion_rate": f"{len(responses)}/{interview_data.get('total_questions', 5)}"}, "analysis_created": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+def analyze_completed_interview(file_path):
+    """Analyzes the one interview that just completed, replacing any earlier report for the same call"""
+    interview_data = load_interview_data(file_path)
+    if not interview_data:
+        return {"error": f"Could not load interview data from {file_path}"}
+    if not interview_data.get("responses"):
+        return {"error": "No responses found"}
+    report = build_match_report(interview_data)
+    if "error" in report:
+        return report
+    if not save_unique_match_report(report, report["call_id"]):
+        return {"error": f"Could not save analysis for {report['call_id']}"}
     return report
 def run_jd_analysis():
     result = analyze_all_completed_interviews()
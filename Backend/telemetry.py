@@ -0,0 +1,200 @@
+import bisect
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+TELEMETRY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30, 60, 120)
+TELEMETRY_QUANTILES = (0.5, 0.95, 0.99)
+TIMELINE_MAX_CALLS = int(os.getenv("TIMELINE_MAX_CALLS", "1000"))
+TIMELINE_MAX_TURNS = int(os.getenv("TIMELINE_MAX_TURNS", "100"))
+METRICS_PREFIX = "interviewer_"
+class LatencyHistogram:
+    """Fixed-bucket histogram; quantiles are interpolated inside the bucket that holds them"""
+    def __init__(self, buckets=TELEMETRY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+    def quantile(self, fraction):
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / bucket_count)
+            seen += bucket_count
+        return self.max
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+def format_labels(labels):
+    return ",".join(f'{name}="{escape_label(value)}"' for name, value in labels)
+class MetricsRegistry:
+    """Histograms and counters keyed by metric name and label tuple, rendered in the Prometheus text format"""
+    def __init__(self, buckets=TELEMETRY_BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._counters = {}
+        self._help = {}
+        self._lock = threading.Lock()
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+    def observe(self, name, labels, seconds):
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram(self.buckets)
+            histogram.observe(seconds)
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+    def render(self):
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        for name in sorted({name for (name, _), _ in histograms}):
+            metric = METRICS_PREFIX + name
+            lines.append(f"# HELP {metric} {self._help.get(name, name)}")
+            lines.append(f"# TYPE {metric} histogram")
+            for (_, labels), histogram in (item for item in histograms if item[0][0] == name):
+                cumulative = 0
+                for bound, bucket_count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{metric}_bucket{{{format_labels(labels + (("le", bound),))}}} {cumulative}')
+                lines.append(f"{metric}_sum{{{format_labels(labels)}}} {histogram.sum:.6f}")
+                lines.append(f"{metric}_count{{{format_labels(labels)}}} {histogram.count}")
+            lines.append(f"# HELP {metric}_quantile {self._help.get(name, name)}, estimated from the histogram buckets")
+            lines.append(f"# TYPE {metric}_quantile gauge")
+            for (_, labels), histogram in (item for item in histograms if item[0][0] == name):
+                for fraction in TELEMETRY_QUANTILES:
+                    lines.append(f'{metric}_quantile{{{format_labels(labels + (("quantile", fraction),))}}} {histogram.quantile(fraction):.6f}')
+        for name in sorted({name for (name, _), _ in counters}):
+            metric = METRICS_PREFIX + name
+            lines.append(f"# HELP {metric} {self._help.get(name, name)}")
+            lines.append(f"# TYPE {metric} counter")
+            for (_, labels), value in (item for item in counters if item[0][0] == name):
+                lines.append(f"{metric}{{{format_labels(labels)}}} {value}")
+        return "\n".join(lines) + "\n"
+metrics = MetricsRegistry()
+metrics.describe("http_request_duration_seconds", "Time from request arrival to the end of the response body, per route")
+metrics.describe("http_requests_total", "Requests per route and status code")
+metrics.describe("turn_stage_duration_seconds", "Time spent in each stage of a call turn")
+metrics.describe("candidate_turn_seconds", "Time between replying to Twilio and its next webhook for the same call: prompt playback, the answer and the Gather timeouts")
+class CallTimeline:
+    """Per-call list of turns, each a webhook (or streamed answer) with the offsets of the stages it went
+    through. Stages are appended from whichever thread does the work; one call has one turn open at a time.
+    Kept in process memory for the newest max_calls calls"""
+    def __init__(self, registry=metrics, max_calls=TIMELINE_MAX_CALLS, max_turns=TIMELINE_MAX_TURNS):
+        self.registry = registry
+        self.max_calls = max_calls
+        self.max_turns = max_turns
+        self._calls = OrderedDict()
+        self._lock = threading.Lock()
+    def _call(self, call_sid):
+        call = self._calls.get(call_sid)
+        if call is None:
+            call = self._calls[call_sid] = {"turns": deque(maxlen=self.max_turns), "events": deque(maxlen=self.max_turns), "open": None, "replied": None}
+            while len(self._calls) > self.max_calls:
+                self._calls.popitem(last=False)
+        return call
+    def begin(self, call_sid, kind, question=None):
+        now = time.perf_counter()
+        turn = {"kind": kind, "question": question, "received_at": datetime.now().isoformat(), "stages": [], "_start": now}
+        with self._lock:
+            call = self._call(call_sid)
+            if call["replied"] is not None:
+                turn["candidate_ms"] = round((now - call["replied"]) * 1000, 1)
+                self.registry.observe("candidate_turn_seconds", (), now - call["replied"])
+            call["open"] = turn
+            call["turns"].append(turn)
+        return turn
+    def stage(self, call_sid, name):
+        call = self._calls.get(call_sid)
+        turn = call["open"] if call is not None else None
+        if turn is not None:
+            turn["stages"].append((name, time.perf_counter() - turn["_start"]))
+    def finish(self, call_sid, name="twiml_returned"):
+        now = time.perf_counter()
+        with self._lock:
+            call = self._calls.get(call_sid)
+            turn = call["open"] if call is not None else None
+            if turn is None:
+                return
+            call["open"] = None
+            call["replied"] = now
+        turn["stages"].append((name, now - turn["_start"]))
+        previous = 0.0
+        for stage, offset in turn["stages"]:
+            self.registry.observe("turn_stage_duration_seconds", (("stage", stage),), offset - previous)
+            previous = offset
+    def event(self, call_sid, name, **fields):
+        with self._lock:
+            self._call(call_sid)["events"].append({"event": name, "at": datetime.now().isoformat(), **fields})
+    def get(self, call_sid):
+        with self._lock:
+            call = self._calls.get(call_sid)
+            if call is None:
+                return None
+            turns, events = list(call["turns"]), list(call["events"])
+        timeline = []
+        for turn in turns:
+            stages, previous = [], 0.0
+            for name, offset in list(turn["stages"]):
+                stages.append({"stage": name, "at_ms": round(offset * 1000, 3), "duration_ms": round((offset - previous) * 1000, 3)})
+                previous = offset
+            entry = {key: value for key, value in turn.items() if not key.startswith("_") and key != "stages"}
+            entry["stages"] = stages
+            entry["total_ms"] = stages[-1]["at_ms"] if stages else None
+            timeline.append(entry)
+        return {"call_sid": call_sid, "turns": timeline, "events": events}
+call_timeline = CallTimeline()
+class LatencyMiddleware:
+    """Plain ASGI middleware (no per-request task or body buffering) that times every HTTP request and
+    labels it with the route template, so /voice/speech/{call_sid} is one series however many calls there are"""
+    def __init__(self, app, registry=metrics):
+        self.app = app
+        self.registry = registry
+        self._route_paths = None
+    def route_path(self, scope):
+        if self._route_paths is None:
+            router = scope.get("router")
+            if router is None:
+                return "unmatched"
+            self._route_paths = {}
+            for route in router.routes:
+                self._route_paths.setdefault(getattr(route, "endpoint", None), []).append(route)
+        routes = self._route_paths.get(scope.get("endpoint"))
+        if not routes:
+            return "unmatched"
+        if len(routes) == 1:
+            return routes[0].path
+        return next((route.path for route in routes if route.path_regex.match(scope["path"])), routes[0].path)
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = [500]
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            labels = (("endpoint", self.route_path(scope)), ("method", scope["method"]))
+            self.registry.observe("http_request_duration_seconds", labels, time.perf_counter() - started)
+            self.registry.inc("http_requests_total", labels + (("status", status[0]),))
@@ -0,0 +1,27 @@
+import os
+import sys
+import pytest
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+from state_backend import InMemoryStateBackend, RedisStateBackend
+def create_backend(kind, **kwargs):
+    if kind == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        return RedisStateBackend(fakeredis.FakeRedis(decode_responses=True), **kwargs)
+    return InMemoryStateBackend(**kwargs)
+@pytest.fixture(params=["memory", "redis"])
+def backend_kind(request):
+    return request.param
+@pytest.fixture
+def backend(backend_kind):
+    return create_backend(backend_kind)
+@pytest.fixture(scope="session")
+def main_module(tmp_path_factory):
+    """main reads its settings and the interviews/ tree at import time, so it is imported once, with dummy
+    Twilio credentials, from an empty working directory"""
+    os.environ.setdefault("account_sid", "ACtest")
+    os.environ.setdefault("auth_token", "test")
+    os.environ.setdefault("WEBHOOK_BASE_URL", "http://test.local")
+    os.chdir(tmp_path_factory.mktemp("backend"))
+    import main
+    return main
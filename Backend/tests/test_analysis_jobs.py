@@ -0,0 +1,31 @@
+import json
+import summary
+from analysis_queue import AnalysisQueue
+def write_interview(tmp_path):
+    path = tmp_path / "CAjob1_COMPLETED.json"
+    path.write_text(json.dumps({"interview_id": "CAjob1", "responses": [{"question_number": 1, "answer": "python"}]}))
+    return str(path)
+def fake_report(interview_data):
+    return {"call_id": interview_data["interview_id"], "candidate_name": "Asha", "candidate_analysis": {"overall_score": 70, "recommendation": "GOOD MATCH"}}
+def test_failed_save_fails_the_job(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(summary, "build_match_report", fake_report)
+    def broken_upsert(report, file_path):
+        raise OSError("disk full")
+    monkeypatch.setattr(summary.bulk_summary, "upsert", broken_upsert)
+    queue = AnalysisQueue()
+    job_id = queue.submit(("interview", "CAjob1"), summary.analyze_completed_interview, write_interview(tmp_path))
+    queue.join()
+    job = queue.get(job_id)
+    assert job["status"] == "FAILED"
+    assert job["error"] == "Could not save analysis for CAjob1"
+def test_saved_report_completes_the_job(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(summary, "build_match_report", fake_report)
+    upserts = []
+    monkeypatch.setattr(summary.bulk_summary, "upsert", lambda report, file_path: upserts.append(file_path))
+    queue = AnalysisQueue()
+    job_id = queue.submit(("interview", "CAjob1"), summary.analyze_completed_interview, write_interview(tmp_path))
+    queue.join()
+    assert queue.get(job_id)["status"] == "COMPLETED"
+    assert upserts and (tmp_path / upserts[0]).exists()
@@ -0,0 +1,39 @@
+import json
+import os
+import time
+from bulk_summary import RollingBulkSummary
+from storage_layout import interview_path, ensure_parent
+def write_report(base_dir, call_id, score, recommendation, mtime=None):
+    path = ensure_parent(interview_path(call_id, "analysis", base_dir))
+    with open(path, 'w') as f:
+        json.dump({"call_id": call_id, "candidate_name": call_id, "candidate_analysis": {"overall_score": score, "recommendation": recommendation}}, f)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+def test_checkpoint_is_reconciled_with_analysis_files(tmp_path):
+    base_dir = str(tmp_path / "interviews")
+    checkpoint_path = os.path.join(base_dir, "BULK_SUMMARY.json")
+    summary = RollingBulkSummary(checkpoint_path)
+    summary.upsert({"call_id": "CAkept", "candidate_analysis": {"overall_score": 60, "recommendation": "GOOD MATCH"}}, write_report(base_dir, "CAkept", 60, "GOOD MATCH", 1000))
+    summary.upsert({"call_id": "CAgone", "candidate_analysis": {"overall_score": 70, "recommendation": "STRONG MATCH"}}, write_report(base_dir, "CAgone", 70, "STRONG MATCH", 1000))
+    assert summary.checkpoint(force=True)
+    os.utime(checkpoint_path, (2000, 2000))
+    os.remove(interview_path("CAgone", "analysis", base_dir))
+    write_report(base_dir, "CAmissed", 90, "EXCELLENT MATCH", 3000)
+    reloaded = RollingBulkSummary(checkpoint_path).snapshot()
+    assert [candidate["call_id"] for candidate in reloaded["candidates"]] == ["CAmissed", "CAkept"]
+    assert reloaded["statistics"]["excellent_match"] == 1
+    assert reloaded["statistics"]["strong_match"] == 0
+def test_change_inside_interval_is_checkpointed_by_timer(tmp_path):
+    base_dir = str(tmp_path / "interviews")
+    checkpoint_path = os.path.join(base_dir, "BULK_SUMMARY.json")
+    summary = RollingBulkSummary(checkpoint_path, checkpoint_interval=0.2)
+    summary.upsert({"call_id": "CAfirst", "candidate_analysis": {"overall_score": 60, "recommendation": "GOOD MATCH"}}, write_report(base_dir, "CAfirst", 60, "GOOD MATCH"))
+    summary.upsert({"call_id": "CAlast", "candidate_analysis": {"overall_score": 80, "recommendation": "STRONG MATCH"}}, write_report(base_dir, "CAlast", 80, "STRONG MATCH"))
+    with open(checkpoint_path) as f:
+        assert json.load(f)["total_candidates"] == 1
+    deadline = time.monotonic() + 5
+    while summary._dirty and time.monotonic() < deadline:
+        time.sleep(0.05)
+    with open(checkpoint_path) as f:
+        assert json.load(f)["total_candidates"] == 2
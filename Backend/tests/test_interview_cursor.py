@@ -0,0 +1,13 @@
+import base64
+import json
+import pytest
+def encode(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+def test_cursor_round_trip(main_module):
+    cursor = main_module.encode_interview_cursor({"start_time": "2025-06-20T10:33:37", "interview_id": "CA1"})
+    assert main_module.decode_interview_cursor(cursor) == ("2025-06-20T10:33:37", "CA1")
+@pytest.mark.parametrize("cursor", ["not base64!", base64.urlsafe_b64encode(b"\xff\xfe").decode(), encode({"a": 1}), encode(["2025-06-20"]), encode(["2025-06-20", 7]), encode("x")])
+def test_invalid_cursor(main_module, cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        main_module.decode_interview_cursor(cursor)
+    assert main_module.list_interview_page(None, 10, cursor, None, None, None, None) == {"error": "Invalid cursor", "interviews": []}
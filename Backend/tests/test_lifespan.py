@@ -0,0 +1,9 @@
+import asyncio
+def test_gather_refresh_runs_for_the_life_of_the_app(main_module):
+    async def run():
+        async with main_module.app.router.lifespan_context(main_module.app):
+            task = main_module.app.state.gather_refresh_task
+            await asyncio.sleep(0)
+            assert not task.done()
+        return task
+    assert asyncio.run(run()).cancelled()
@@ -0,0 +1,32 @@
+from session_journal import SessionJournal, SessionContext
+def start(journal, call_sid):
+    return journal.start(call_sid, {"call_sid": call_sid, "status": "IN_PROGRESS", "current_question": 1})
+def test_cache_is_bounded(tmp_path):
+    journal = SessionJournal(str(tmp_path), fsync=False, cache_size=2)
+    for call_sid in ("CA1", "CA2", "CA3"):
+        start(journal, call_sid)
+    assert list(journal._sessions) == ["CA2", "CA3"]
+    assert journal.load("CA1")["call_sid"] == "CA1"
+    assert list(journal._sessions) == ["CA3", "CA1"]
+def test_read_does_not_cache(tmp_path):
+    journal = SessionJournal(str(tmp_path), fsync=False)
+    start(journal, "CA1")
+    journal.release("CA1")
+    assert journal.read("CA1")["current_question"] == 1
+    assert journal.read("CA2") is None
+    assert not journal._sessions
+def test_terminal_status_leaves_cache(tmp_path):
+    journal = SessionJournal(str(tmp_path), fsync=False)
+    start(journal, "CA1")
+    with SessionContext("CA1", journal) as session_ctx:
+        session_ctx.record({"type": "session_updated", "fields": {"status": "TERMINATED"}})
+    assert "CA1" not in journal._sessions
+    assert journal.load("CA1")["status"] == "TERMINATED"
+    assert "CA1" not in journal._sessions
+def test_eviction_during_a_request_keeps_its_events(tmp_path):
+    journal = SessionJournal(str(tmp_path), fsync=False, cache_size=1)
+    start(journal, "CA1")
+    with SessionContext("CA1", journal) as session_ctx:
+        start(journal, "CA2")
+        session_ctx.record({"type": "question_advanced", "current_question": 2})
+    assert journal.load("CA1")["current_question"] == 2
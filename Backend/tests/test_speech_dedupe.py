@@ -0,0 +1,27 @@
+import asyncio
+import httpx
+def run_turns(main_module, call_sid, turns):
+    """Posts /voice, then each (path, form) in turns; returns the TwiML replies"""
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main_module.app), base_url="http://test.local") as client:
+            await client.post("/voice", data={"CallSid": call_sid, "From": "+919900000000", "To": "+14067601762"})
+            return [(await client.post(path.format(call_sid=call_sid), data=form)).text for path, form in turns]
+    return asyncio.run(run())
+def test_retried_empty_speech_counts_one_silence(main_module):
+    replies = run_turns(main_module, "CAdedupe1", [
+        ("/voice/speech/{call_sid}?q=1", {"SpeechResult": "", "Confidence": "0"}),
+        ("/voice/speech/{call_sid}?q=1", {"SpeechResult": "", "Confidence": "0"}),
+        ("/voice/speech/{call_sid}?q=1&attempt=2", {"SpeechResult": "I am Asha, a backend developer", "Confidence": "0.9"})])
+    assert replies[0] == replies[1]
+    assert "Please respond to the question." in replies[0]
+    assert "attempt=2" in replies[0]
+    assert "<Hangup" not in replies[1]
+    assert "Next question:" in replies[2]
+def test_retried_no_response_counts_one_silence(main_module):
+    replies = run_turns(main_module, "CAdedupe2", [
+        ("/voice/no-response/{call_sid}?q=1", {}),
+        ("/voice/no-response/{call_sid}?q=1", {}),
+        ("/voice/no-response/{call_sid}?q=1&attempt=2", {})])
+    assert replies[0] == replies[1]
+    assert "Please respond to the question." in replies[0]
+    assert "<Hangup" in replies[2]
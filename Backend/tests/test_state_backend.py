@@ -0,0 +1,59 @@
+import asyncio
+from conftest import create_backend
+from state_backend import CampaignState
+def test_campaign_progress(backend):
+    async def run():
+        await backend.run(backend.create_campaign, "bulk_1", {"contacts": [{"phone": "+1555"}], "status": "STARTING", "current_index": 0, "in_flight": 0, "total_contacts": 2})
+        campaign = CampaignState(backend, "bulk_1")
+        await campaign.update(status="IN_PROGRESS", current_index=1)
+        await asyncio.gather(*(campaign.incr("in_flight") for _ in range(20)))
+        await asyncio.gather(*(campaign.incr("in_flight", -1) for _ in range(15)))
+        await campaign.set_active_call("CA1", {"name": "Asha", "status": "initiated"})
+        await asyncio.gather(*(campaign.update_active_call("CA1", **{f"field{index}": index}) for index in range(10)))
+        await campaign.update_active_call("CA2", status="ringing")
+        await campaign.append_result({"call_sid": "CA0", "status": "SUCCESS"})
+        snapshot = await campaign.snapshot()
+        assert await campaign.status() == "IN_PROGRESS"
+        return snapshot
+    snapshot = asyncio.run(run())
+    assert snapshot["current_index"] == 1
+    assert snapshot["in_flight"] == 5
+    assert snapshot["contacts"] == [{"phone": "+1555"}]
+    assert snapshot["results"] == [{"call_sid": "CA0", "status": "SUCCESS"}]
+    assert list(snapshot["active_calls"]) == ["CA1"]
+    assert snapshot["active_calls"]["CA1"] == {"name": "Asha", "status": "initiated", **{f"field{index}": index for index in range(10)}}
+def test_remove_active_call_and_unknown_campaign(backend):
+    backend.create_campaign("bulk_1", {"status": "IN_PROGRESS"})
+    backend.set_active_call("bulk_1", "CA1", {"status": "initiated"})
+    backend.remove_active_call("bulk_1", "CA1")
+    assert backend.get_campaign("bulk_1")["active_calls"] == {}
+    backend.update_campaign("bulk_2", {"status": "STOPPED"})
+    assert backend.get_campaign("bulk_2") is None
+    assert backend.get_campaign_field("bulk_2", "status") is None
+def test_counters(backend):
+    assert backend.incr_counter("status:COMPLETED") == 1
+    assert backend.incr_counter("status:COMPLETED", 2) == 3
+    backend.incr_counter("status:TERMINATED")
+    backend.incr_counter("bulk_calls")
+    assert backend.get_counters("status:") == {"COMPLETED": 3, "TERMINATED": 1}
+    backend.reset_counters("status:", {"COMPLETED": 7})
+    assert backend.get_counters("status:") == {"COMPLETED": 7}
+    assert backend.get_counters("bulk_") == {"calls": 1}
+def test_live_sessions(backend):
+    backend.start_live_session("CA1", {"phone_number": "+1555"})
+    backend.start_live_session("CA2", {"phone_number": "+1556"})
+    backend.start_live_session("CA1", {"phone_number": "+1555"})
+    assert backend.live_session_count() == 2
+    backend.end_live_session("CA1")
+    backend.end_live_session("CA3")
+    assert backend.live_session_count() == 1
+def test_stale_live_sessions_expire(backend_kind):
+    backend = create_backend(backend_kind, live_session_max_age=-1)
+    backend.start_live_session("CA1", {})
+    assert backend.live_session_count() == 0
+def test_call_status_merges_fields(backend):
+    backend.record_call_status("CA1", {"status": "initiated", "bulk_call_id": "bulk_1"})
+    entry = backend.record_call_status("CA1", {"status": "completed", "duration": "42"})
+    assert entry == {"status": "completed", "bulk_call_id": "bulk_1", "duration": "42"}
+    assert backend.get_call_status("CA1") == entry
+    assert backend.get_call_status("CA2") is None
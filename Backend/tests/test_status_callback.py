@@ -0,0 +1,29 @@
+import asyncio
+import httpx
+def post_status(main_module, call_sid, call_status, duration=None):
+    async def run():
+        transport = httpx.ASGITransport(app=main_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test.local") as client:
+            form = {"CallSid": call_sid, "CallStatus": call_status, **({"CallDuration": duration} if duration else {})}
+            return (await client.post("/voice/status", data=form)).json()
+    return asyncio.run(run())
+def test_status_callback_updates_campaign(main_module, backend, monkeypatch):
+    monkeypatch.setattr(main_module, "state_backend", backend)
+    backend.create_campaign("bulk_1", {"status": "IN_PROGRESS", "current_index": 0, "in_flight": 1})
+    backend.set_active_call("bulk_1", "CAcampaign1", {"name": "Asha", "status": "initiated"})
+    backend.record_call_status("CAcampaign1", {"status": "initiated", "bulk_call_id": "bulk_1"})
+    backend.start_live_session("CAcampaign1", {"phone_number": "+1555"})
+    assert post_status(main_module, "CAcampaign1", "in-progress") == {"success": True}
+    active_call = backend.get_campaign("bulk_1")["active_calls"]["CAcampaign1"]
+    assert active_call["status"] == "in-progress"
+    assert active_call["name"] == "Asha"
+    assert backend.live_session_count() == 1
+    assert post_status(main_module, "CAcampaign1", "completed", "42") == {"success": True}
+    assert backend.get_campaign("bulk_1")["active_calls"]["CAcampaign1"]["status"] == "completed"
+    assert backend.get_call_status("CAcampaign1") == {"status": "completed", "bulk_call_id": "bulk_1", "duration": "42"}
+    assert backend.live_session_count() == 0
+def test_status_callback_requires_call_sid(main_module):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main_module.app), base_url="http://test.local") as client:
+            return (await client.post("/voice/status", data={"CallStatus": "completed"})).json()
+    assert asyncio.run(run()) == {"success": False, "error": "CallSid and CallStatus are required"}
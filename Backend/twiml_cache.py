@@ -0,0 +1,123 @@
+import threading
+from xml.sax.saxutils import escape
+from twilio.twiml.voice_response import VoiceResponse, Connect
+from gather_timeouts import DEFAULT_GATHER_TIMEOUTS, reprompt_timeouts
+CALL_SID_PLACEHOLDER = "__CALL_SID__"
+COMPLETION_MESSAGE = "Thank you for your time! Your interview has been completed successfully. We will review your responses and get back to you soon. Have a great day!"
+TERMINATION_MESSAGE = "Thank you so much for taking the time to speak with us today. We really appreciate your interest. We'll review everything and get back to you soon. Have a wonderful day!"
+SILENCE_HANGUP_MESSAGE = "Thank you for your time. We'll be in touch soon."
+def add_speech_gather(resp, base_url, call_sid, question_index, speech_timeout, timeout, attempt=1):
+    """The action and redirect URLs carry the question and the attempt at it (2 after a reprompt) so a
+    retried delivery can be recognised"""
+    turn = f'q={question_index}' + (f'&attempt={attempt}' if attempt > 1 else '')
+    resp.gather(
+        input='speech',
+        action=f'{base_url}/voice/speech/{call_sid}?{turn}',
+        method='POST',
+        speechTimeout=speech_timeout,
+        timeout=timeout,
+        language='en-US')
+    resp.redirect(f'{base_url}/voice/no-response/{call_sid}?{turn}')
+def add_prompt(resp, base_url, prompt_audio, text, **say_kwargs):
+    """<Play> of the cached recording when prompt audio is enabled, otherwise <Say> as before"""
+    url = prompt_audio.url_for(base_url, text, say_kwargs.get('voice'), say_kwargs.get('rate')) if prompt_audio is not None else None
+    if url:
+        resp.play(url)
+    else:
+        resp.say(text, **say_kwargs)
+def build_opening(base_url, call_sid, questions, prompt_audio=None, timeouts=DEFAULT_GATHER_TIMEOUTS):
+    resp = VoiceResponse()
+    resp.pause(length=0.3)
+    add_prompt(resp, base_url, prompt_audio, "Hello! I'm your AI interviewer from Onelab Ventures.", voice='Polly.Amy', rate='medium')
+    resp.pause(length=0.2)
+    add_prompt(resp, base_url, prompt_audio, "Let's begin.", voice='Polly.Amy', rate='medium')
+    resp.pause(length=0.2)
+    add_prompt(resp, base_url, prompt_audio, questions[1], voice='Polly.Amy', rate='medium')
+    add_speech_gather(resp, base_url, call_sid, 1, str(timeouts.speech_timeout), str(timeouts.timeout))
+    return str(resp)
+def build_question(base_url, call_sid, questions, question_index, prompt_audio=None, timeouts=DEFAULT_GATHER_TIMEOUTS):
+    resp = VoiceResponse()
+    if question_index > 1:
+        add_prompt(resp, base_url, prompt_audio, "Next question:", voice='Polly.Amy', rate='medium')
+        resp.pause(length=0.2)
+    add_prompt(resp, base_url, prompt_audio, questions[question_index], voice='Polly.Amy', rate='medium')
+    add_speech_gather(resp, base_url, call_sid, question_index, str(timeouts.speech_timeout), str(timeouts.timeout))
+    return str(resp)
+def build_reprompt(base_url, call_sid, questions, question_index, prompt_audio=None, timeouts=DEFAULT_GATHER_TIMEOUTS):
+    timeouts = reprompt_timeouts(timeouts)
+    resp = VoiceResponse()
+    add_prompt(resp, base_url, prompt_audio, "Please respond to the question.", voice='Polly.Amy', rate='medium')
+    if question_index <= len(questions):
+        resp.pause(length=0.3)
+        add_prompt(resp, base_url, prompt_audio, questions[question_index], voice='Polly.Amy', rate='medium')
+        add_speech_gather(resp, base_url, call_sid, question_index, str(timeouts.speech_timeout), str(timeouts.timeout), attempt=2)
+    return str(resp)
+def build_stream_connect(base_url, call_sid):
+    """Hands the call to the /media-stream websocket; the call ends when the server closes it"""
+    resp = VoiceResponse()
+    connect = Connect()
+    connect.stream(url=f"{base_url.replace('http', 'ws', 1)}/media-stream/{call_sid}")
+    resp.append(connect)
+    return str(resp)
+def build_goodbye(message, base_url=None, prompt_audio=None, **say_kwargs):
+    resp = VoiceResponse()
+    add_prompt(resp, base_url, prompt_audio, message, **say_kwargs)
+    resp.hangup()
+    return str(resp)
+class TwimlCache:
+    """Every prompt the interview sends, rendered once with a call_sid placeholder and split around it.
+    A turn is one str.join; the set is re-rendered when the webhook base URL or the questions change"""
+    def __init__(self):
+        self.base_url = None
+        self.questions = None
+        self.prompt_audio = None
+        self.timeouts = {}
+        self._fingerprint = None
+        self._templates = {}
+        self._lock = threading.Lock()
+    def configure(self, base_url, questions, prompt_audio=None, timeouts=None):
+        """timeouts maps question number to GatherTimeouts; questions without an entry use the defaults"""
+        timeouts = {question_index: (timeouts or {}).get(question_index, DEFAULT_GATHER_TIMEOUTS) for question_index in questions}
+        fingerprint = (base_url, tuple(sorted(questions.items())), id(prompt_audio), tuple(sorted(timeouts.items())))
+        with self._lock:
+            if fingerprint == self._fingerprint:
+                return False
+            templates = {"opening": build_opening(base_url, CALL_SID_PLACEHOLDER, questions, prompt_audio, timeouts[1]),
+                         "stream_connect": build_stream_connect(base_url, CALL_SID_PLACEHOLDER),
+                         "completion": build_goodbye(COMPLETION_MESSAGE, base_url, prompt_audio),
+                         "termination": build_goodbye(TERMINATION_MESSAGE, base_url, prompt_audio, voice='Polly.Amy', rate='medium'),
+                         "silence_hangup": build_goodbye(SILENCE_HANGUP_MESSAGE, base_url, prompt_audio, voice='Polly.Amy'),
+                         ("reprompt", len(questions) + 1): build_reprompt(base_url, CALL_SID_PLACEHOLDER, questions, len(questions) + 1, prompt_audio)}
+            for question_index in questions:
+                templates[("question", question_index)] = build_question(base_url, CALL_SID_PLACEHOLDER, questions, question_index, prompt_audio, timeouts[question_index])
+                templates[("reprompt", question_index)] = build_reprompt(base_url, CALL_SID_PLACEHOLDER, questions, question_index, prompt_audio, timeouts[question_index])
+            self._templates = {key: tuple(document.split(CALL_SID_PLACEHOLDER)) for key, document in templates.items()}
+            self.base_url = base_url
+            self.questions = dict(questions)
+            self.prompt_audio = prompt_audio
+            self.timeouts = timeouts
+            self._fingerprint = fingerprint
+            print(f"[TWIML] Pre-rendered {len(self._templates)} TwiML documents for {base_url}")
+            return True
+    def timeouts_for(self, question_index):
+        return self.timeouts.get(question_index, DEFAULT_GATHER_TIMEOUTS)
+    def render(self, key, call_sid=""):
+        parts = self._templates[key]
+        if len(parts) == 1:
+            return parts[0]
+        return escape(call_sid, {'"': "&quot;"}).join(parts)
+    def opening(self, call_sid):
+        return self.render("opening", call_sid)
+    def stream_connect(self, call_sid):
+        return self.render("stream_connect", call_sid)
+    def question(self, call_sid, question_index):
+        return self.render(("question", question_index), call_sid)
+    def reprompt(self, call_sid, question_index):
+        return self.render(("reprompt", question_index if question_index <= len(self.questions) else len(self.questions) + 1), call_sid)
+    def completion(self):
+        return self.render("completion")
+    def termination(self):
+        return self.render("termination")
+    def silence_hangup(self):
+        return self.render("silence_hangup")
+twiml_cache = TwimlCache()
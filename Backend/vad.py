@@ -0,0 +1,122 @@
+import os
+import numpy as np
+from audio_codec import ULAW_TO_PCM16
+VAD_SAMPLE_RATE = 8000
+VAD_FRAME_MS = 20
+VAD_MIN_RMS = float(os.getenv("VAD_MIN_RMS", "300"))
+VAD_NOISE_RATIO = float(os.getenv("VAD_NOISE_RATIO", "4"))
+VAD_MAX_ZCR = float(os.getenv("VAD_MAX_ZCR", "0.5"))
+VAD_ONSET_MS = int(os.getenv("VAD_ONSET_MS", "100"))
+VAD_END_OF_TURN_MS = int(os.getenv("VAD_END_OF_TURN_MS", "500"))
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "200"))
+VAD_NOISE_WINDOW_MS = int(os.getenv("VAD_NOISE_WINDOW_MS", "1000"))
+ULAW_TABLE = np.asarray(ULAW_TO_PCM16, dtype=np.float32)
+class VoiceActivityDetector:
+    """Energy and zero-crossing-rate VAD for 8 kHz telephone audio in 20 ms frames.
+
+    A frame is voiced when its energy clears VAD_MIN_RMS and VAD_NOISE_RATIO times the quietest frame of the
+    last VAD_NOISE_WINDOW_MS, and its zero-crossing rate is speech-like (very loud frames pass regardless).
+    Speech starts when most of the last VAD_ONSET_MS is voiced; the turn ends after VAD_END_OF_TURN_MS of
+    hangover, unless it held under VAD_MIN_SPEECH_MS of voice (a click or cough), which is dropped instead.
+    Features and decisions live in fixed-size ring buffers and the work buffers are allocated once.
+    feed() returns "speech_start", "end_of_turn" or None"""
+    def __init__(self, encoding="ulaw", sample_rate=VAD_SAMPLE_RATE, frame_ms=VAD_FRAME_MS, min_rms=VAD_MIN_RMS, noise_ratio=VAD_NOISE_RATIO,
+                 max_zcr=VAD_MAX_ZCR, onset_ms=VAD_ONSET_MS, end_of_turn_ms=VAD_END_OF_TURN_MS, min_speech_ms=VAD_MIN_SPEECH_MS,
+                 noise_window_ms=VAD_NOISE_WINDOW_MS):
+        self.encoding = encoding
+        self.frame_size = sample_rate * frame_ms // 1000
+        self.min_energy = min_rms * min_rms
+        self.noise_ratio = noise_ratio
+        self.max_crossings = max_zcr * (self.frame_size - 1)
+        self.onset_frames = max(1, onset_ms // frame_ms)
+        self.onset_votes = self.onset_frames // 2 + 1
+        self.end_frames = max(1, end_of_turn_ms // frame_ms)
+        self.min_speech_frames = min_speech_ms // frame_ms
+        self._energies = np.zeros(max(1, noise_window_ms // frame_ms), dtype=np.float32)
+        self._decisions = np.zeros(self.onset_frames, dtype=bool)
+        self._samples = np.zeros(self.frame_size, dtype=np.float32)
+        self._signs = np.zeros(self.frame_size, dtype=bool)
+        self._crossings = np.zeros(self.frame_size - 1, dtype=bool)
+        self.frames = 0
+        self.reset()
+    def reset(self):
+        """Starts a new turn; the noise floor is kept since the line has not changed"""
+        self._decisions[:] = False
+        self.in_speech = False
+        self.silent_frames = 0
+        self.speech_frames = 0
+    def _load(self, frame):
+        if self.encoding == "ulaw":
+            np.take(ULAW_TABLE, np.frombuffer(frame, dtype=np.uint8), out=self._samples[:len(frame)])
+            return self._samples[:len(frame)]
+        samples = np.frombuffer(frame, dtype=np.int16) if isinstance(frame, (bytes, bytearray, memoryview)) else frame
+        self._samples[:len(samples)] = samples
+        return self._samples[:len(samples)]
+    def _features(self, samples):
+        count = len(samples)
+        energy = float(np.dot(samples, samples)) / max(1, count)
+        np.signbit(samples, out=self._signs[:count])
+        np.not_equal(self._signs[1:count], self._signs[:count - 1], out=self._crossings[:count - 1])
+        return energy, int(np.count_nonzero(self._crossings[:count - 1]))
+    def _step(self, energy, crossings):
+        slot = self.frames % len(self._energies)
+        self._energies[slot] = energy
+        self.frames += 1
+        threshold = max(self.min_energy, float(self._energies.min() if self.frames >= len(self._energies) else self._energies[:self.frames].min()) * self.noise_ratio)
+        voiced = energy >= threshold and (crossings <= self.max_crossings or energy >= 4 * threshold)
+        self._decisions[self.frames % self.onset_frames] = voiced
+        if not self.in_speech:
+            if voiced and int(np.count_nonzero(self._decisions)) >= self.onset_votes:
+                self.in_speech = True
+                self.silent_frames = 0
+                self.speech_frames = int(np.count_nonzero(self._decisions))
+                return "speech_start"
+            return None
+        if voiced:
+            self.silent_frames = 0
+            self.speech_frames += 1
+        else:
+            self.silent_frames += 1
+        if self.silent_frames >= self.end_frames:
+            if self.speech_frames < self.min_speech_frames:
+                self.in_speech = False
+                self._decisions[:] = False
+                return None
+            self.reset()
+            return "end_of_turn"
+        return None
+    def feed(self, frame):
+        """One frame of mu-law bytes, or 16-bit PCM bytes / int16 array when encoding="pcm16\""""
+        return self._step(*self._features(self._load(frame)))
+    def frame_features(self, audio):
+        """Energy and zero-crossing count of every whole frame of a buffer, computed in one vectorized pass"""
+        if self.encoding == "ulaw":
+            samples = ULAW_TABLE[np.frombuffer(audio, dtype=np.uint8)]
+        else:
+            samples = (np.frombuffer(audio, dtype=np.int16) if isinstance(audio, (bytes, bytearray, memoryview)) else audio).astype(np.float32)
+        frames = samples[:len(samples) // self.frame_size * self.frame_size].reshape(-1, self.frame_size)
+        energies = np.einsum('ij,ij->i', frames, frames) / self.frame_size
+        crossings = np.count_nonzero(np.diff(np.signbit(frames), axis=1), axis=1)
+        return energies, crossings
+    def process(self, audio):
+        """Runs a whole recording through the detector; returns [(frame_index, event), ...]"""
+        energies, crossings = self.frame_features(audio)
+        events = []
+        for index, (energy, crossing_count) in enumerate(zip(energies.tolist(), crossings.tolist())):
+            event = self._step(energy, crossing_count)
+            if event is not None:
+                events.append((index, event))
+        return events
+def speech_segments(audio, encoding="ulaw", **options):
+    """(start_seconds, end_seconds) of each turn the detector finds in a recording"""
+    detector = VoiceActivityDetector(encoding=encoding, **options)
+    frame_seconds = detector.frame_size / VAD_SAMPLE_RATE
+    segments, start = [], None
+    for index, event in detector.process(audio):
+        if event == "speech_start":
+            start = (index + 1 - detector.onset_frames) * frame_seconds
+        else:
+            segments.append((max(0.0, start), (index + 1 - detector.end_frames) * frame_seconds))
+    if detector.in_speech:
+        segments.append((max(0.0, start), detector.frames * frame_seconds))
+    return segments